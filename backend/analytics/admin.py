@@ -19,7 +19,6 @@ class ManagerDashboardConfigAdmin(admin.ModelAdmin):
 
 @admin.register(DashboardSnapshot)
 class DashboardSnapshotAdmin(admin.ModelAdmin):
-    list_display = ['event', 'date', 'bookings_count', 'revenue', 'booking_velocity']
-    list_filter = ['date']
-    search_fields = ['event__name']
-    readonly_fields = ['date']
\ No newline at end of file
+    list_display = ['event', 'date', 'granularity', 'bookings_count', 'revenue', 'booking_velocity', 'current_price_tier']
+    list_filter = ['granularity', 'date']
+    search_fields = ['event__name']
\ No newline at end of file
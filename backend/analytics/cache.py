@@ -0,0 +1,101 @@
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+
+
+class DashboardCache:
+    """
+    Versioned cache of serialized event dashboard payloads.
+
+    Every event has a version counter that booking, feedback and price tier
+    changes bump. A payload built for the current version is served as is for
+    DASHBOARD_CACHE_FRESH_SECONDS. After that, or once the version moved on, it
+    is still served for up to DASHBOARD_CACHE_STALE_SECONDS while a single
+    background rebuild replaces it, so readers rarely wait for a recompute.
+    """
+
+    LOCK_TIMEOUT = 30
+
+    @staticmethod
+    def _cache():
+        return caches[getattr(settings, 'DASHBOARD_CACHE', 'default')]
+
+    @staticmethod
+    def _key(event_id, suffix):
+        return f'analytics:dashboard:{event_id}:{suffix}'
+
+    def version(self, event_id):
+        """Current version of an event's dashboard"""
+        cache = self._cache()
+        key = self._key(event_id, 'version')
+        version = cache.get(key)
+        if version is None:
+            # Start from the clock so a lost counter never reuses an old version
+            cache.add(key, time.time_ns(), timeout=None)
+            version = cache.get(key)
+        return version
+
+    def bump(self, event_id):
+        """Invalidate an event's dashboard, again once the transaction commits"""
+        self._bump(event_id)
+        # Readers inside other transactions may rebuild from the old rows until commit
+        transaction.on_commit(lambda: self._bump(event_id))
+
+    def _bump(self, event_id):
+        cache = self._cache()
+        key = self._key(event_id, 'version')
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+    def get(self, event_id, build):
+        """Return the cached payload of an event, building it with build() if needed"""
+        cache = self._cache()
+        version = self.version(event_id)
+        entry = cache.get(self._key(event_id, 'payload'))
+        if entry is not None:
+            age = time.time() - entry['built_at']
+            if entry['version'] == version and age < getattr(settings, 'DASHBOARD_CACHE_FRESH_SECONDS', 60):
+                return entry['payload']
+            if age < getattr(settings, 'DASHBOARD_CACHE_STALE_SECONDS', 300):
+                if cache.add(self._key(event_id, 'lock'), True, timeout=self.LOCK_TIMEOUT):
+                    self._spawn(lambda: self._revalidate(event_id, build))
+                return entry['payload']
+        return self._store(event_id, build(), version)
+
+    def warm(self, event_id, build):
+        """Build and cache an event's payload regardless of what is cached"""
+        # Read the version first so a change during the build leaves the entry stale
+        version = self.version(event_id)
+        return self._store(event_id, build(), version)
+
+    def _store(self, event_id, payload, version):
+        stale_seconds = getattr(settings, 'DASHBOARD_CACHE_STALE_SECONDS', 300)
+        self._cache().set(
+            self._key(event_id, 'payload'),
+            {'version': version, 'built_at': time.time(), 'payload': payload},
+            timeout=stale_seconds
+        )
+        return payload
+
+    def _revalidate(self, event_id, build):
+        """Rebuild a stale payload and release the rebuild lock"""
+        try:
+            self.warm(event_id, build)
+        finally:
+            self._cache().delete(self._key(event_id, 'lock'))
+
+    def _spawn(self, target):
+        """Run a rebuild off the request thread"""
+        def run():
+            try:
+                target()
+            finally:
+                connection.close()
+        threading.Thread(target=run, daemon=True).start()
+
+
+dashboard_cache = DashboardCache()
@@ -0,0 +1,74 @@
+"""
+Django management command to write daily dashboard snapshots and their rollups
+Usage: python manage.py generate_snapshots [--date 2025-01-31] [--backfill | --since 2025-01-01] [--events 1 2]
+"""
+import time
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from analytics.services import SnapshotService
+
+
+class Command(BaseCommand):
+    help = 'Write daily DashboardSnapshot rows for active events and roll them up into weeks and months'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            type=str,
+            help='Last day to snapshot (YYYY-MM-DD, default: yesterday)'
+        )
+        parser.add_argument(
+            '--since',
+            type=str,
+            help='First day to snapshot (YYYY-MM-DD, default: same as --date)'
+        )
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help='Snapshot every day since the first booking or price change'
+        )
+        parser.add_argument(
+            '--events',
+            nargs='+',
+            type=int,
+            help='Only snapshot these event IDs'
+        )
+        parser.add_argument(
+            '--skip-rollups',
+            action='store_true',
+            help='Do not rebuild the weekly and monthly rollups'
+        )
+
+    def parse_date(self, value, option):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f'{option} must be a date in YYYY-MM-DD format')
+
+    def handle(self, *args, **options):
+        end = self.parse_date(options['date'], '--date') if options['date'] else timezone.localdate() - timedelta(days=1)
+        if options['backfill']:
+            start = SnapshotService.first_activity_date()
+            if start is None:
+                self.stdout.write(self.style.WARNING('! No bookings or price changes to backfill from'))
+                return
+        elif options['since']:
+            start = self.parse_date(options['since'], '--since')
+        else:
+            start = end
+        if start > end:
+            raise CommandError(f'Nothing to snapshot between {start} and {end}')
+
+        self.stdout.write(f'Generating snapshots from {start} to {end}...')
+
+        started = time.perf_counter()
+        days = SnapshotService.generate_daily_snapshots(start, end, options['events'])
+        self.stdout.write(f'  {days} daily snapshots in {time.perf_counter() - started:.2f}s')
+
+        if not options['skip_rollups']:
+            started = time.perf_counter()
+            rollups = SnapshotService.build_rollups(start, end, options['events'])
+            self.stdout.write(f'  {rollups} weekly/monthly rollups in {time.perf_counter() - started:.2f}s')
+
+        self.stdout.write(self.style.SUCCESS('✓ Snapshots up to date'))
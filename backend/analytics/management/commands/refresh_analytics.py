@@ -1,54 +1,67 @@
-from django.core.management.base import BaseCommand
-from django.db.models import Sum, Avg, Count
-from decimal import Decimal
-from events.models import Event
-from analytics.models import EventAnalytics
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from analytics.services import AnalyticsService
 
 
 class Command(BaseCommand):
     help = 'Refresh analytics data for all events'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--events',
+            nargs='+',
+            type=int,
+            help='Only refresh these event IDs'
+        )
+        parser.add_argument(
+            '--since',
+            type=str,
+            help='Only refresh events with bookings, feedback or ticket changes since this date (YYYY-MM-DD)'
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report events whose incrementally maintained analytics have drifted'
+        )
+
     def handle(self, *args, **options):
-        self.stdout.write('Refreshing event analytics...')
+        self.stdout.write('Checking event analytics...' if options['check'] else 'Refreshing event analytics...')
         
-        events = Event.objects.all()
-        updated_count = 0
+        event_ids = options['events']
+        if options['since']:
+            try:
+                since = timezone.make_aware(datetime.strptime(options['since'], '%Y-%m-%d'))
+            except ValueError:
+                raise CommandError('--since must be a date in YYYY-MM-DD format')
+            changed = AnalyticsService.events_changed_since(since)
+            event_ids = [event_id for event_id in changed if event_ids is None or event_id in event_ids]
         
-        for event in events:
-            # Calculate analytics
-            tickets = event.tickets.all()
-            bookings = event.bookings.all()
-            feedback = event.feedback.all()
-            
-            total_tickets = tickets.count()
-            booked_tickets = tickets.filter(status='booked').count()
-            
-            total_bookings = bookings.filter(status__in=['confirmed', 'pending']).count()
-            total_revenue = bookings.filter(status='confirmed').aggregate(
-                total=Sum('total_amount')
-            )['total'] or Decimal('0.00')
-            
-            avg_rating = feedback.aggregate(avg=Avg('rating'))['avg']
-            
-            booking_percentage = (booked_tickets / total_tickets * 100) if total_tickets > 0 else 0
-            tickets_available = tickets.filter(status='available').count()
-            
-            # Update or create analytics record
-            analytics, created = EventAnalytics.objects.update_or_create(
-                event=event,
-                defaults={
-                    'total_bookings': total_bookings,
-                    'total_revenue': total_revenue,
-                    'avg_rating': avg_rating,
-                    'booking_percentage': Decimal(str(booking_percentage)),
-                    'tickets_available': tickets_available
-                }
-            )
-            
-            updated_count += 1
-            action = 'Created' if created else 'Updated'
-            self.stdout.write(f'  {action} analytics for: {event.name}')
+        if options['check']:
+            self.report_drift(AnalyticsService.find_drift(event_ids))
+            return
+        
+        created, updated, timings = AnalyticsService.refresh_event_analytics(event_ids)
+        
+        for phase, seconds in timings.items():
+            self.stdout.write(f'  {phase:<10} {seconds * 1000:8.1f}ms')
         
         self.stdout.write(
-            self.style.SUCCESS(f'\n✅ Successfully refreshed analytics for {updated_count} events')
-        )
\ No newline at end of file
+            self.style.SUCCESS(
+                f'\n✅ Successfully refreshed analytics for {created + updated} events '
+                f'({created} created, {updated} updated)'
+            )
+        )
+    
+    def report_drift(self, drift):
+        """Print every drifted field"""
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('✓ Event analytics are consistent'))
+            return
+        
+        for event_id, differences in sorted(drift.items()):
+            for field, (stored, expected) in differences.items():
+                self.stdout.write(f'  Event {event_id}: {field} is {stored}, expected {expected}')
+        self.stdout.write(self.style.WARNING(
+            f'! {len(drift)} events have drifted, run without --check to repair them'
+        ))
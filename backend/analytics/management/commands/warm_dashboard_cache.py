@@ -0,0 +1,39 @@
+"""
+Django management command to pre-build the dashboard cache of upcoming events
+Usage: python manage.py warm_dashboard_cache --days 7
+"""
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from events.models import Event
+from analytics.cache import dashboard_cache
+from analytics.services import AnalyticsService
+
+
+class Command(BaseCommand):
+    help = 'Build and cache the dashboard payload of events happening in the next N days'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=7,
+            help='Warm events taking place within this many days (default: 7)'
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        events = Event.objects.filter(
+            is_active=True,
+            date__gte=today,
+            date__lte=today + timedelta(days=options['days'])
+        ).select_related('venue').order_by('date')
+
+        warmed = 0
+        for event in events:
+            dashboard_cache.warm(event.id, lambda: AnalyticsService.build_event_dashboard(event))
+            warmed += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Warmed dashboard cache for {warmed} events in the next {options["days"]} days'
+        ))
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:51
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def populate_rating_totals(apps, schema_editor):
+    """Seed rating_sum/rating_count from the feedback table"""
+    EventAnalytics = apps.get_model('analytics', 'EventAnalytics')
+    Feedback = apps.get_model('customers', 'Feedback')
+    totals = {
+        row['event_id']: row
+        for row in Feedback.objects.values('event_id').annotate(
+            rating_sum=Sum('rating'),
+            rating_count=Count('id')
+        ).order_by()
+    }
+    rows = list(EventAnalytics.objects.filter(event_id__in=totals))
+    for analytics in rows:
+        analytics.rating_sum = totals[analytics.event_id]['rating_sum']
+        analytics.rating_count = totals[analytics.event_id]['rating_count']
+    EventAnalytics.objects.bulk_update(rows, ['rating_sum', 'rating_count'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('customers', '0005_alter_ticket_status_tickethold_ticket_hold_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventanalytics',
+            name='rating_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='eventanalytics',
+            name='rating_sum',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(populate_rating_totals, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='eventanalytics',
+            name='avg_rating',
+        ),
+    ]
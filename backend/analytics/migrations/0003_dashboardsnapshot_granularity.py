@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:58
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_eventanalytics_rating_sum_count'),
+        ('events', '0002_eventinventory'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='dashboardsnapshot',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='dashboardsnapshot',
+            name='granularity',
+            field=models.CharField(choices=[('day', 'Day'), ('week', 'Week'), ('month', 'Month')], default='day', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='dashboardsnapshot',
+            name='date',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dashboardsnapshot',
+            unique_together={('event', 'date', 'granularity')},
+        ),
+        migrations.AddIndex(
+            model_name='dashboardsnapshot',
+            index=models.Index(fields=['granularity', 'date'], name='analytics_d_granula_075abe_idx'),
+        ),
+    ]
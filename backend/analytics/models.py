@@ -1,5 +1,7 @@
+from decimal import Decimal
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
 class EventAnalytics(models.Model):
@@ -7,11 +9,20 @@ class EventAnalytics(models.Model):
     event = models.OneToOneField('events.Event', on_delete=models.CASCADE, related_name='analytics')
     total_bookings = models.IntegerField(default=0)
     total_revenue = models.DecimalField(max_digits=15, decimal_places=2, default=0)
-    avg_rating = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True)
+    # Stored as sum + count so ratings can be delta-maintained
+    rating_sum = models.IntegerField(default=0)
+    rating_count = models.IntegerField(default=0)
     booking_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0)
     tickets_available = models.IntegerField(default=0)
     last_updated = models.DateTimeField(auto_now=True)
     
+    @property
+    def avg_rating(self):
+        """Average feedback rating, or None without feedback"""
+        if not self.rating_count:
+            return None
+        return round(Decimal(self.rating_sum) / self.rating_count, 2)
+    
     def __str__(self):
         return f"Analytics for {self.event.name}"
     
@@ -37,17 +48,27 @@ class ManagerDashboardConfig(models.Model):
 
 
 class DashboardSnapshot(models.Model):
-    """Daily snapshots of key metrics for historical analysis"""
+    """Daily snapshots of key metrics for historical analysis, with weekly and monthly rollups"""
+    GRANULARITY_CHOICES = [
+        ('day', 'Day'),
+        ('week', 'Week'),
+        ('month', 'Month'),
+    ]
+    
     event = models.ForeignKey('events.Event', on_delete=models.CASCADE, related_name='snapshots')
-    date = models.DateField(auto_now_add=True)
-    bookings_count = models.IntegerField()
+    date = models.DateField(default=timezone.localdate)  # First day of the period
+    granularity = models.CharField(max_length=10, choices=GRANULARITY_CHOICES, default='day')
+    bookings_count = models.IntegerField()  # Confirmed bookings made during the period
     revenue = models.DecimalField(max_digits=15, decimal_places=2)
     booking_velocity = models.DecimalField(max_digits=8, decimal_places=2)  # bookings per day
-    current_price_tier = models.CharField(max_length=50, blank=True)
+    current_price_tier = models.CharField(max_length=50, blank=True)  # Tier at the end of the period
     
     def __str__(self):
         return f"{self.event.name} - {self.date}"
     
     class Meta:
-        unique_together = ['event', 'date']
-        ordering = ['-date']
\ No newline at end of file
+        unique_together = ['event', 'date', 'granularity']
+        ordering = ['-date']
+        indexes = [
+            models.Index(fields=['granularity', 'date']),
+        ]
@@ -0,0 +1,513 @@
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Avg, Case, Count, DecimalField, F, FloatField, Min, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, TruncDate
+from django.utils import timezone
+from events.models import Event, EventInventory
+from customers.models import Booking, Feedback
+from pricing.models import PriceHistory
+from .models import EventAnalytics, DashboardSnapshot
+
+
+class AnalyticsService:
+    """Service class for computing event analytics in bulk"""
+    
+    ACTIVE_BOOKING_STATUSES = ['confirmed', 'pending']
+    ANALYTICS_FIELDS = ['total_bookings', 'total_revenue', 'rating_sum', 'rating_count',
+                        'booking_percentage', 'tickets_available']
+    
+    @staticmethod
+    def events_changed_since(since):
+        """IDs of events with bookings, feedback or ticket changes since a point in time"""
+        from customers.models import Ticket
+        event_ids = set(Booking.objects.filter(booking_date__gte=since).values_list('event_id', flat=True).distinct())
+        event_ids.update(Feedback.objects.filter(created_at__gte=since).values_list('event_id', flat=True).distinct())
+        event_ids.update(Ticket.objects.filter(updated_at__gte=since).values_list('event_id', flat=True).distinct())
+        return sorted(event_ids)
+    
+    @staticmethod
+    def compute_event_analytics(event_ids, timings=None):
+        """
+        Compute analytics values for the given events straight from the source tables.
+        
+        Uses one GROUP BY query each over tickets, bookings and feedback and joins
+        the results in memory. Returns {event_id: {field: value}}.
+        """
+        timings = {} if timings is None else timings
+        
+        def phase(name, started):
+            timings[name] = time.perf_counter() - started
+            return time.perf_counter()
+        
+        started = time.perf_counter()
+        ticket_counts = EventInventory.count_tickets(event_ids)
+        started = phase('tickets', started)
+        
+        booking_stats = {
+            row['event_id']: row
+            for row in Booking.objects.filter(event_id__in=event_ids).values('event_id').annotate(
+                total_bookings=Count('id', filter=Q(status__in=AnalyticsService.ACTIVE_BOOKING_STATUSES)),
+                total_revenue=Sum('total_amount', filter=Q(status='confirmed'))
+            ).order_by()
+        }
+        started = phase('bookings', started)
+        
+        ratings = {
+            row['event_id']: row
+            for row in Feedback.objects.filter(event_id__in=event_ids).values('event_id').annotate(
+                rating_sum=Sum('rating'),
+                rating_count=Count('id')
+            ).order_by()
+        }
+        phase('feedback', started)
+        
+        values = {}
+        for event_id in event_ids:
+            tickets = ticket_counts.get(event_id, {})
+            bookings = booking_stats.get(event_id, {})
+            rating = ratings.get(event_id, {})
+            total_tickets = tickets.get('total_tickets', 0)
+            booked_tickets = tickets.get('booked_tickets', 0)
+            
+            values[event_id] = {
+                'total_bookings': bookings.get('total_bookings', 0),
+                'total_revenue': bookings.get('total_revenue') or Decimal('0.00'),
+                'rating_sum': rating.get('rating_sum', 0),
+                'rating_count': rating.get('rating_count', 0),
+                'booking_percentage': round(Decimal(str(booked_tickets / total_tickets * 100)), 2) if total_tickets else Decimal('0'),
+                'tickets_available': tickets.get('available_tickets', 0),
+            }
+        return values
+    
+    @staticmethod
+    def refresh_event_analytics(event_ids=None):
+        """
+        Recompute EventAnalytics for the given events (all events if None).
+        
+        Day to day the rows are kept current by delta updates (see
+        analytics.signals); a full refresh repairs any drift, e.g. after raw
+        queryset updates. Writes go through bulk_update/bulk_create, so the cost
+        depends on the number of queries rather than events.
+        Returns (created, updated, timings) where timings maps phase to seconds.
+        """
+        timings = {}
+        
+        started = time.perf_counter()
+        if event_ids is None:
+            event_ids = list(Event.objects.values_list('id', flat=True))
+        timings['events'] = time.perf_counter() - started
+        
+        computed = AnalyticsService.compute_event_analytics(event_ids, timings)
+        
+        started = time.perf_counter()
+        now = timezone.now()
+        existing = EventAnalytics.objects.in_bulk(event_ids, field_name='event_id')
+        to_create = []
+        to_update = []
+        for event_id, values in computed.items():
+            analytics = existing.get(event_id)
+            if analytics is None:
+                to_create.append(EventAnalytics(event_id=event_id, last_updated=now, **values))
+            else:
+                for field, value in values.items():
+                    setattr(analytics, field, value)
+                analytics.last_updated = now
+                to_update.append(analytics)
+        
+        with transaction.atomic():
+            EventAnalytics.objects.bulk_update(
+                to_update,
+                AnalyticsService.ANALYTICS_FIELDS + ['last_updated'],
+                batch_size=500
+            )
+            EventAnalytics.objects.bulk_create(to_create, batch_size=500)
+        timings['write'] = time.perf_counter() - started
+        
+        return len(to_create), len(to_update), timings
+    
+    @staticmethod
+    def find_drift(event_ids=None):
+        """
+        Compare stored analytics with freshly computed values without writing.
+        
+        Returns {event_id: {field: (stored, expected)}} for every event whose row
+        is missing or differs.
+        """
+        if event_ids is None:
+            event_ids = list(Event.objects.values_list('id', flat=True))
+        computed = AnalyticsService.compute_event_analytics(event_ids)
+        existing = EventAnalytics.objects.in_bulk(event_ids, field_name='event_id')
+        
+        drift = {}
+        for event_id, values in computed.items():
+            analytics = existing.get(event_id)
+            differences = {
+                field: (getattr(analytics, field) if analytics else None, value)
+                for field, value in values.items()
+                if analytics is None or getattr(analytics, field) != value
+            }
+            if differences:
+                drift[event_id] = differences
+        return drift
+    
+    @staticmethod
+    def apply_delta(event_id, bookings=0, revenue=0, rating_sum=0, rating_count=0):
+        """
+        Apply incremental changes to an event's analytics in one UPDATE.
+        
+        Used by the model signals and by bulk paths that bypass them. Events
+        without an analytics row are left alone until the next full refresh.
+        """
+        changes = {}
+        if bookings:
+            changes['total_bookings'] = F('total_bookings') + bookings
+        if revenue:
+            changes['total_revenue'] = F('total_revenue') + revenue
+        if rating_sum:
+            changes['rating_sum'] = F('rating_sum') + rating_sum
+        if rating_count:
+            changes['rating_count'] = F('rating_count') + rating_count
+        if changes:
+            EventAnalytics.objects.filter(event_id=event_id).update(last_updated=timezone.now(), **changes)
+    
+    @staticmethod
+    def apply_delta_on_commit(event_id, **deltas):
+        """
+        apply_delta() once the current transaction commits.
+
+        Ticket writers lock the EventInventory row; updating EventAnalytics
+        after commit means no transaction holds both rows, so bookings and
+        holds cannot deadlock on them or queue behind the analytics row.
+        """
+        transaction.on_commit(lambda: AnalyticsService.apply_delta(event_id, **deltas))
+    
+    @staticmethod
+    def booking_delta(status, total_amount):
+        """(bookings, revenue) a booking in the given state contributes to its event"""
+        return (
+            1 if status in AnalyticsService.ACTIVE_BOOKING_STATUSES else 0,
+            (total_amount or 0) if status == 'confirmed' else 0
+        )
+    
+    @staticmethod
+    def sync_availability(event_ids=None):
+        """Copy availability and booking percentage from EventInventory in one UPDATE"""
+        inventory = EventInventory.objects.filter(event_id=OuterRef('event_id'))
+        percentage = Case(
+            When(total_tickets=0, then=Value(0.0)),
+            default=Cast('booked_tickets', FloatField()) * 100 / F('total_tickets'),
+            output_field=FloatField()
+        )
+        analytics = EventAnalytics.objects.filter(event__inventory__isnull=False)
+        if event_ids is not None:
+            analytics = analytics.filter(event_id__in=event_ids)
+        analytics.update(
+            tickets_available=Subquery(inventory.values('available_tickets')[:1]),
+            booking_percentage=Subquery(
+                inventory.annotate(percentage=percentage).values('percentage')[:1],
+                output_field=DecimalField(max_digits=5, decimal_places=2)
+            ),
+            last_updated=timezone.now()
+        )
+    
+    @staticmethod
+    def build_event_dashboard(event):
+        """
+        Build the serialized dashboard payload of an event.
+        
+        Callers should go through analytics.cache.dashboard_cache rather than
+        calling this per request.
+        """
+        # Get or compute analytics
+        analytics = EventAnalytics.objects.filter(event=event).first()
+        if analytics is None:
+            # Compute on the fly
+            tickets = event.tickets.all()
+            bookings = event.bookings.filter(status__in=['confirmed', 'pending'])
+            feedback = event.feedback.all()
+            
+            total_tickets = tickets.count()
+            booked_tickets = tickets.filter(status='booked').count()
+            total_revenue = bookings.aggregate(total=Sum('total_amount'))['total'] or 0
+            avg_rating = feedback.aggregate(avg=Avg('rating'))['avg']
+            booking_percentage = (booked_tickets / total_tickets * 100) if total_tickets > 0 else 0
+            
+            analytics_data = {
+                'total_bookings': bookings.count(),
+                'total_revenue': float(total_revenue),
+                'avg_rating': float(avg_rating) if avg_rating else None,
+                'booking_percentage': float(booking_percentage),
+                'tickets_available': tickets.filter(status='available').count()
+            }
+        else:
+            analytics_data = {
+                'total_bookings': analytics.total_bookings,
+                'total_revenue': float(analytics.total_revenue),
+                'avg_rating': float(analytics.avg_rating) if analytics.avg_rating else None,
+                'booking_percentage': float(analytics.booking_percentage),
+                'tickets_available': analytics.tickets_available
+            }
+        
+        # Revenue by tier
+        revenue_by_tier = event.bookings.filter(status='confirmed').values(
+            'tickets__current_tier__tier_name'
+        ).annotate(
+            tier_revenue=Sum('total_amount'),
+            tier_bookings=Count('id')
+        )
+        
+        # Booking velocity over the last 7 days and trends from the precomputed snapshots
+        trends = SnapshotService.event_trends(event.id)
+        week_ago = timezone.now() - timedelta(days=7)
+        if trends['day']:
+            # Whole days of the window come from the snapshots, the partial days
+            # at either end (today is not snapshotted yet) from the bookings
+            first_day = timezone.localtime(week_ago).date() + timedelta(days=1)
+            today = timezone.localdate()
+            recent_bookings = sum(day['bookings'] for day in trends['day'] if first_day <= day['date'] < today)
+            live = (
+                Q(booking_date__gte=week_ago, booking_date__lt=SnapshotService.day_start(first_day))
+                | Q(booking_date__gte=SnapshotService.day_start(today))
+            )
+        else:
+            # No snapshots generated for this event yet
+            recent_bookings = 0
+            live = Q(booking_date__gte=week_ago)
+        recent_bookings += event.bookings.filter(live, status='confirmed').count()
+        booking_velocity = recent_bookings / 7.0
+        
+        # Customer demographics (top genres from customer preferences)
+        top_genres = event.bookings.filter(
+            status='confirmed'
+        ).values(
+            'customer__preferred_genres__name'
+        ).annotate(
+            count=Count('id')
+        ).order_by('-count')[:5]
+        
+        return {
+            'event': {
+                'id': event.id,
+                'name': event.name,
+                'date': event.date,
+                'venue': event.venue.name,
+                'total_capacity': event.venue.capacity
+            },
+            'analytics': analytics_data,
+            'revenue_by_tier': list(revenue_by_tier),
+            'booking_velocity_per_day': round(booking_velocity, 2),
+            'booking_trends': trends,
+            'top_customer_genres': list(top_genres),
+            'last_updated': analytics.last_updated if analytics is not None else None
+        }
+
+
+class SnapshotService:
+    """Service class for writing DashboardSnapshot time series"""
+    
+    BATCH_SIZE = 1000
+    SNAPSHOT_FIELDS = ['bookings_count', 'revenue', 'booking_velocity', 'current_price_tier']
+    
+    @staticmethod
+    def period_start(day, granularity):
+        """First day of the week (Monday) or month containing a day"""
+        if granularity == 'week':
+            return day - timedelta(days=day.weekday())
+        if granularity == 'month':
+            return day.replace(day=1)
+        return day
+    
+    @staticmethod
+    def period_end(day, granularity):
+        """Last day of the week (Sunday) or month containing a day"""
+        if granularity == 'week':
+            return SnapshotService.period_start(day, 'week') + timedelta(days=6)
+        if granularity == 'month':
+            return (day.replace(day=1) + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        return day
+    
+    @staticmethod
+    def day_start(day):
+        """Aware datetime of the local midnight a day starts at"""
+        return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+    
+    @staticmethod
+    def _tier_timelines(event_ids, end):
+        """{event_id: [(day, tier_name), ...]} of tier changes up to a day, oldest first"""
+        timelines = {}
+        changes = PriceHistory.objects.filter(
+            event_id__in=event_ids,
+            changed_at__date__lte=end
+        ).order_by('changed_at').values_list('event_id', 'changed_at', 'new_tier__tier_name')
+        for event_id, changed_at, tier_name in changes:
+            timelines.setdefault(event_id, []).append((timezone.localtime(changed_at).date(), tier_name))
+        return timelines
+    
+    @staticmethod
+    def generate_daily_snapshots(start, end, event_ids=None):
+        """
+        Write one 'day' snapshot per active event and day from start to end.
+        
+        Each event is covered from its first booking (or creation) up to the
+        event date, so the same call serves the nightly run (start == end) and
+        a backfill over the whole history. Bookings come from one GROUP BY over
+        Booking.booking_date and tiers from PriceHistory; rows are upserted with
+        bulk_create. Returns the number of snapshots written.
+        """
+        events = Event.objects.filter(is_active=True, date__gte=start)
+        if event_ids is not None:
+            events = events.filter(id__in=event_ids)
+        events = {
+            row['id']: row
+            for row in events.annotate(first_booking=Min('bookings__booking_date')).values(
+                'id', 'date', 'created_at', 'first_booking'
+            )
+        }
+        if not events:
+            return 0
+        
+        daily = {}
+        bookings = Booking.objects.filter(
+            event_id__in=events,
+            status='confirmed',
+            booking_date__date__gte=start,
+            booking_date__date__lte=end
+        ).annotate(day=TruncDate('booking_date')).values('event_id', 'day').annotate(
+            n=Count('id'),
+            revenue=Sum('total_amount')
+        ).order_by()
+        for row in bookings:
+            daily[row['event_id'], row['day']] = (row['n'], row['revenue'])
+        
+        timelines = SnapshotService._tier_timelines(events, end)
+        
+        def snapshots():
+            for event_id, event in events.items():
+                first_day = timezone.localtime(event['created_at']).date()
+                if event['first_booking']:
+                    first_day = min(first_day, timezone.localtime(event['first_booking']).date())
+                day = max(start, first_day)
+                last_day = min(end, event['date'])
+                timeline = timelines.get(event_id, [])
+                position = 0
+                tier_name = ''
+                while day <= last_day:
+                    while position < len(timeline) and timeline[position][0] <= day:
+                        tier_name = timeline[position][1]
+                        position += 1
+                    count, revenue = daily.get((event_id, day), (0, Decimal('0.00')))
+                    yield DashboardSnapshot(
+                        event_id=event_id,
+                        date=day,
+                        granularity='day',
+                        bookings_count=count,
+                        revenue=revenue,
+                        booking_velocity=Decimal(count),
+                        current_price_tier=tier_name
+                    )
+                    day += timedelta(days=1)
+        
+        return SnapshotService._upsert(snapshots())
+    
+    @staticmethod
+    def build_rollups(start, end, event_ids=None, granularities=('week', 'month')):
+        """
+        Roll the 'day' snapshots of every period touching start..end up into
+        'week' and 'month' snapshots. Returns the number of rollups written.
+        """
+        written = 0
+        for granularity in granularities:
+            days = DashboardSnapshot.objects.filter(
+                granularity='day',
+                date__gte=SnapshotService.period_start(start, granularity),
+                date__lte=SnapshotService.period_end(end, granularity)
+            )
+            if event_ids is not None:
+                days = days.filter(event_id__in=event_ids)
+            
+            periods = {}
+            for event_id, day, count, revenue, tier_name in days.order_by('date').values_list(
+                'event_id', 'date', 'bookings_count', 'revenue', 'current_price_tier'
+            ).iterator(chunk_size=SnapshotService.BATCH_SIZE):
+                period = periods.setdefault((event_id, SnapshotService.period_start(day, granularity)), {
+                    'days': 0, 'bookings_count': 0, 'revenue': Decimal('0.00'), 'current_price_tier': ''
+                })
+                period['days'] += 1
+                period['bookings_count'] += count
+                period['revenue'] += revenue
+                period['current_price_tier'] = tier_name
+            
+            written += SnapshotService._upsert(
+                DashboardSnapshot(
+                    event_id=event_id,
+                    date=period_date,
+                    granularity=granularity,
+                    bookings_count=period['bookings_count'],
+                    revenue=period['revenue'],
+                    booking_velocity=round(Decimal(period['bookings_count']) / period['days'], 2),
+                    current_price_tier=period['current_price_tier']
+                )
+                for (event_id, period_date), period in periods.items()
+            )
+        return written
+    
+    @staticmethod
+    def _upsert(snapshots):
+        """bulk_create snapshots in batches, replacing existing rows of the same period"""
+        written = 0
+        batch = []
+        for snapshot in snapshots:
+            batch.append(snapshot)
+            if len(batch) >= SnapshotService.BATCH_SIZE:
+                written += SnapshotService._write_batch(batch)
+                batch = []
+        if batch:
+            written += SnapshotService._write_batch(batch)
+        return written
+    
+    @staticmethod
+    def _write_batch(batch):
+        DashboardSnapshot.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=['event', 'date', 'granularity'],
+            update_fields=SnapshotService.SNAPSHOT_FIELDS
+        )
+        return len(batch)
+    
+    @staticmethod
+    def first_activity_date():
+        """Earliest booking or price change date, the natural start of a backfill"""
+        first_booking = Booking.objects.aggregate(first=Min('booking_date'))['first']
+        first_change = PriceHistory.objects.aggregate(first=Min('changed_at'))['first']
+        dates = [timezone.localtime(value).date() for value in (first_booking, first_change) if value]
+        return min(dates) if dates else None
+    
+    @staticmethod
+    def event_trends(event_id, today=None):
+        """
+        Read an event's precomputed series for the dashboard in one query:
+        the last 30 days, 12 weeks and 12 months.
+        """
+        today = today or timezone.localdate()
+        windows = {
+            'day': today - timedelta(days=30),
+            'week': SnapshotService.period_start(today, 'week') - timedelta(weeks=12),
+            'month': (today.replace(day=1) - timedelta(days=365)).replace(day=1),
+        }
+        condition = Q()
+        for granularity, since in windows.items():
+            condition |= Q(granularity=granularity, date__gte=since)
+        
+        trends = {granularity: [] for granularity in windows}
+        for snapshot in DashboardSnapshot.objects.filter(condition, event_id=event_id).order_by('date'):
+            trends[snapshot.granularity].append({
+                'date': snapshot.date,
+                'bookings': snapshot.bookings_count,
+                'revenue': float(snapshot.revenue),
+                'booking_velocity': float(snapshot.booking_velocity),
+                'price_tier': snapshot.current_price_tier
+            })
+        return trends
@@ -0,0 +1,109 @@
+from django.db import transaction
+from django.db.models import DEFERRED
+from django.db.models.signals import post_init, pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from customers.models import Booking, Feedback
+from events.models import Event, EventInventory
+from events.signals import inventory_changed
+from pricing.models import PriceTier
+from .cache import dashboard_cache
+from .models import EventAnalytics
+from .services import AnalyticsService
+
+
+@receiver(post_save, sender=Event)
+def create_event_analytics(sender, instance, created, **kwargs):
+    """Start new events with an empty analytics row for the deltas to land on"""
+    if created:
+        EventAnalytics.objects.get_or_create(event=instance)
+
+
+@receiver(post_init, sender=Booking)
+def remember_booking_state(sender, instance, **kwargs):
+    """Remember what the loaded booking contributes to its event's analytics"""
+    if not instance.pk:
+        instance._loaded_analytics = (0, 0)
+    elif 'status' in instance.__dict__ and 'total_amount' in instance.__dict__:
+        instance._loaded_analytics = AnalyticsService.booking_delta(instance.status, instance.total_amount)
+    else:
+        # Deferred fields: leave the event to the next full refresh
+        instance._loaded_analytics = None
+
+
+@receiver(post_save, sender=Booking)
+def update_analytics_on_booking_save(sender, instance, **kwargs):
+    """Apply the change in booking count and revenue"""
+    if instance._loaded_analytics is None:
+        dashboard_cache.bump(instance.event_id)
+        return
+    bookings, revenue = AnalyticsService.booking_delta(instance.status, instance.total_amount)
+    loaded_bookings, loaded_revenue = instance._loaded_analytics
+    AnalyticsService.apply_delta_on_commit(
+        instance.event_id,
+        bookings=bookings - loaded_bookings,
+        revenue=revenue - loaded_revenue
+    )
+    instance._loaded_analytics = (bookings, revenue)
+    dashboard_cache.bump(instance.event_id)
+
+
+@receiver(post_delete, sender=Booking)
+def update_analytics_on_booking_delete(sender, instance, **kwargs):
+    """Remove a deleted booking's contribution"""
+    dashboard_cache.bump(instance.event_id)
+    if instance._loaded_analytics is None:
+        return
+    bookings, revenue = instance._loaded_analytics
+    AnalyticsService.apply_delta_on_commit(instance.event_id, bookings=-bookings, revenue=-revenue)
+
+
+@receiver(post_init, sender=Feedback)
+def remember_feedback_rating(sender, instance, **kwargs):
+    """Remember the loaded rating so edits apply the difference"""
+    if not instance.pk:
+        instance._loaded_rating = None
+    else:
+        # Read from __dict__ so a deferred rating is not fetched for every loaded row
+        instance._loaded_rating = instance.__dict__.get('rating', DEFERRED)
+
+
+@receiver(pre_save, sender=Feedback)
+@receiver(pre_delete, sender=Feedback)
+def fetch_deferred_feedback_rating(sender, instance, **kwargs):
+    """A rating that was never loaded is read before it is overwritten or deleted"""
+    if instance._loaded_rating is DEFERRED:
+        instance._loaded_rating = Feedback.objects.filter(pk=instance.pk).values_list('rating', flat=True).first()
+
+
+@receiver(post_save, sender=Feedback)
+def update_analytics_on_feedback_save(sender, instance, created, **kwargs):
+    """Apply the change in the event's rating sum and count; only a first rating adds to the count"""
+    loaded, rating = instance._loaded_rating, instance.rating
+    AnalyticsService.apply_delta(
+        instance.event_id,
+        rating_sum=(rating or 0) - (loaded or 0),
+        rating_count=(rating is not None) - (loaded is not None)
+    )
+    instance._loaded_rating = rating
+    dashboard_cache.bump(instance.event_id)
+
+
+@receiver(post_delete, sender=Feedback)
+def update_analytics_on_feedback_delete(sender, instance, **kwargs):
+    """Remove a deleted rating"""
+    if instance._loaded_rating is not None:
+        AnalyticsService.apply_delta(instance.event_id, rating_sum=-instance._loaded_rating, rating_count=-1)
+    dashboard_cache.bump(instance.event_id)
+
+
+@receiver(post_save, sender=PriceTier)
+@receiver(post_delete, sender=PriceTier)
+def invalidate_dashboard_on_tier_change(sender, instance, **kwargs):
+    """Revenue by tier changes with the event's tiers"""
+    dashboard_cache.bump(instance.event_id)
+
+
+@receiver(inventory_changed, sender=EventInventory)
+def sync_analytics_availability(sender, event_ids, **kwargs):
+    """Follow ticket status changes through the inventory counters, once they are committed"""
+    transaction.on_commit(lambda: AnalyticsService.sync_availability(event_ids))
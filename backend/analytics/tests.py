@@ -1 +1,338 @@
-from django.test import TestCase
\ No newline at end of file
+from datetime import time, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from artists.models import Artist, Genre
+from django.utils import timezone
+from events.models import Event, Venue, EventType, EventInventory, EventManager, Performs
+from customers.models import Customer, Ticket, Booking, Feedback
+from .cache import dashboard_cache
+from pricing.models import PriceTier, PriceHistory
+from .models import EventAnalytics, DashboardSnapshot
+from .services import AnalyticsService, SnapshotService
+
+
+class AnalyticsTestCase(TestCase):
+    """Three events with tickets, bookings and feedback"""
+
+    def setUp(self):
+        self.venue = Venue.objects.create(
+            name='Test Arena', location='Mumbai', address='123 Main St',
+            city='Mumbai', state='Maharashtra', capacity=100
+        )
+        self.event_type = EventType.objects.create(name='Concert')
+        self.customer = Customer.objects.create(user=User.objects.create_user(username='customer1'))
+        self.events = [self.create_event(f'Concert {i}') for i in range(3)]
+
+    def create_event(self, name, bookings=2):
+        event = Event.objects.create(
+            name=name,
+            venue=self.venue,
+            event_type=self.event_type,
+            date=timezone.now().date() + timedelta(days=30),
+            start_time=time(20, 0),
+            end_time=time(23, 0),
+            ticket_price=Decimal('100.00')
+        )
+        tickets = Ticket.objects.bulk_create([
+            Ticket(
+                event=event,
+                seat_number=f'A-{seat:03d}',
+                section='A',
+                base_price=Decimal('100.00'),
+                final_price=Decimal('100.00'),
+                status='booked' if seat <= bookings else 'available'
+            )
+            for seat in range(1, 11)
+        ])
+        for ticket in tickets[:bookings]:
+            booking = Booking.objects.create(
+                customer=self.customer, event=event, total_amount=Decimal('100.00'), status='pending'
+            )
+            Booking.objects.filter(pk=booking.pk).update(status='confirmed')
+            booking.tickets.add(ticket)
+        Feedback.objects.create(customer=self.customer, event=event, rating=4)
+        return event
+
+
+class RefreshAnalyticsTests(AnalyticsTestCase):
+    """Grouped analytics refresh tests"""
+
+    def test_refresh_computes_event_metrics(self):
+        EventAnalytics.objects.all().delete()
+        created, updated, _ = AnalyticsService.refresh_event_analytics()
+        self.assertEqual((created, updated), (3, 0))
+
+        analytics = EventAnalytics.objects.get(event=self.events[0])
+        self.assertEqual(analytics.total_bookings, 2)
+        self.assertEqual(analytics.total_revenue, Decimal('200.00'))
+        self.assertEqual(analytics.avg_rating, Decimal('4.00'))
+        self.assertEqual(analytics.booking_percentage, Decimal('20.00'))
+        self.assertEqual(analytics.tickets_available, 8)
+
+    def test_query_count_does_not_grow_with_events(self):
+        AnalyticsService.refresh_event_analytics()
+        with self.assertNumQueries(8):
+            AnalyticsService.refresh_event_analytics()
+        self.events += [self.create_event(f'Extra {i}') for i in range(5)]
+        AnalyticsService.refresh_event_analytics()
+        with self.assertNumQueries(8):
+            AnalyticsService.refresh_event_analytics()
+
+    def test_partial_refresh(self):
+        EventAnalytics.objects.all().delete()
+        out = StringIO()
+        call_command('refresh_analytics', '--events', str(self.events[1].id), stdout=out)
+        self.assertEqual(list(EventAnalytics.objects.values_list('event_id', flat=True)), [self.events[1].id])
+
+        call_command('refresh_analytics', '--since', timezone.now().strftime('%Y-%m-%d'), stdout=out)
+        self.assertEqual(EventAnalytics.objects.count(), 3)
+
+    def test_holds_count_as_changes(self):
+        from customers.services import SeatHoldService
+        past = timezone.now() - timedelta(days=1)
+        Ticket.objects.update(updated_at=past)
+        Booking.objects.update(booking_date=past)
+        Feedback.objects.update(created_at=past)
+        since = timezone.now()
+        self.assertEqual(AnalyticsService.events_changed_since(since), [])
+
+        SeatHoldService.create_hold(self.customer, self.events[2], quantity=2)
+        self.assertEqual(AnalyticsService.events_changed_since(since), [self.events[2].id])
+
+
+class IncrementalAnalyticsTests(AnalyticsTestCase):
+    """Delta maintenance of EventAnalytics"""
+
+    def setUp(self):
+        super().setUp()
+        AnalyticsService.refresh_event_analytics()
+        EventInventory.rebuild()
+        self.event = self.events[0]
+
+    def analytics(self):
+        return EventAnalytics.objects.get(event=self.event)
+
+    def test_booking_lifecycle_applies_deltas(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            booking = Booking.objects.create(
+                customer=self.customer, event=self.event, total_amount=Decimal('150.00'), status='confirmed'
+            )
+            # Nothing is written to the analytics row inside the booking transaction
+            self.assertEqual(self.analytics().total_bookings, 2)
+        self.assertTrue(callbacks)
+        self.assertEqual(self.analytics().total_bookings, 3)
+        self.assertEqual(self.analytics().total_revenue, Decimal('350.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.status = 'cancelled'
+            booking.save()
+        self.assertEqual(self.analytics().total_bookings, 2)
+        self.assertEqual(self.analytics().total_revenue, Decimal('200.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.get(pk=booking.pk).delete()
+        self.assertEqual(AnalyticsService.find_drift([self.event.id]), {})
+
+    def test_feedback_changes_update_rating(self):
+        other = Customer.objects.create(user=User.objects.create_user(username='customer2'))
+        feedback = Feedback.objects.create(customer=other, event=self.event, rating=1)
+        self.assertEqual(self.analytics().avg_rating, Decimal('2.50'))
+
+        feedback = Feedback.objects.get(pk=feedback.pk)
+        feedback.rating = 5
+        feedback.save()
+        self.assertEqual(self.analytics().avg_rating, Decimal('4.50'))
+
+        feedback.delete()
+        self.assertEqual(self.analytics().avg_rating, Decimal('4.00'))
+        self.assertEqual(self.analytics().rating_count, 1)
+
+    def test_rating_saved_without_loading_it_is_not_counted_twice(self):
+        feedback = Feedback.objects.only('id', 'event_id').get(event=self.event)
+        feedback.rating = 2
+        feedback.save()
+        self.assertEqual(self.analytics().rating_count, 1)
+        self.assertEqual(self.analytics().avg_rating, Decimal('2.00'))
+
+        Feedback.objects.only('id', 'event_id').get(pk=feedback.pk).delete()
+        self.assertEqual(AnalyticsService.find_drift([self.event.id]), {})
+
+    def test_ticket_status_changes_sync_availability(self):
+        ticket = Ticket.objects.filter(event=self.event, status='available').first()
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.status = 'booked'
+            ticket.save()
+        analytics = self.analytics()
+        self.assertEqual(analytics.tickets_available, 7)
+        self.assertEqual(analytics.booking_percentage, Decimal('30.00'))
+
+    def test_check_reports_drift_without_writing(self):
+        EventAnalytics.objects.filter(event=self.event).update(total_bookings=99)
+        out = StringIO()
+        call_command('refresh_analytics', '--check', stdout=out)
+        self.assertIn('total_bookings is 99, expected 2', out.getvalue())
+        self.assertEqual(self.analytics().total_bookings, 99)
+
+
+class ManagerDashboardTests(AnalyticsTestCase):
+    """Manager dashboard query tests"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='manager1')
+        self.manager = EventManager.objects.create(user=self.user)
+        self.manager.managed_events.add(*self.events)
+        artist = Artist.objects.create(name='Band', genre=Genre.objects.create(name='Rock'))
+        for event in self.events[:2]:
+            Performs.objects.create(artist=artist, event=event, performance_time=time(20, 0))
+        AnalyticsService.refresh_event_analytics()
+        EventInventory.rebuild()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_dashboard(self):
+        response = self.client.get('/api/analytics/manager-dashboard/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_summary_venue_and_genre_metrics(self):
+        # Drop one analytics row to exercise the fallback counts
+        EventAnalytics.objects.filter(event=self.events[2]).delete()
+        data = self.get_dashboard()
+
+        self.assertEqual(data['summary']['total_events'], 3)
+        self.assertEqual(data['summary']['total_bookings'], 4)
+        fallback = next(event for event in data['events'] if event['id'] == self.events[2].id)
+        self.assertEqual(fallback['tickets_available'], 8)
+        self.assertEqual(fallback['booking_percentage'], 20.0)
+
+        venue = data['venue_utilization'][0]
+        self.assertEqual((venue['events_count'], venue['total_bookings']), (3, 4))
+        self.assertEqual(venue['utilization_percentage'], 20.0)
+        self.assertEqual(data['top_genres'], [
+            {'artists__genre__name': 'Rock', 'event_count': 2, 'avg_booking_percentage': 20.0}
+        ])
+
+    def test_query_count_does_not_grow_with_events(self):
+        with self.assertNumQueries(3):
+            self.get_dashboard()
+        extra = [self.create_event(f'Extra {i}') for i in range(5)]
+        self.manager.managed_events.add(*extra)
+        with self.assertNumQueries(3):
+            data = self.get_dashboard()
+        self.assertEqual(data['summary']['total_events'], 8)
+
+
+class DashboardCacheTests(AnalyticsTestCase):
+    """Versioned event dashboard cache tests"""
+
+    def setUp(self):
+        super().setUp()
+        caches['default'].clear()
+        AnalyticsService.refresh_event_analytics()
+        self.event = self.events[0]
+        self.url = f'/api/analytics/dashboard/{self.event.id}/'
+        self.client = APIClient()
+
+    def test_cached_payload_skips_recompute(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.data['analytics']['total_bookings'], 2)
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url)
+        self.assertEqual(second.data, first.data)
+
+    def test_booking_serves_stale_then_revalidates(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(
+                customer=self.customer, event=self.event, total_amount=Decimal('100.00'), status='confirmed'
+            )
+
+        with mock.patch.object(dashboard_cache, '_spawn', side_effect=lambda target: target()) as spawn:
+            stale = self.client.get(self.url)
+        spawn.assert_called_once()
+        self.assertEqual(stale.data['analytics']['total_bookings'], 2)
+        self.assertEqual(self.client.get(self.url).data['analytics']['total_bookings'], 3)
+
+    def test_other_events_stay_cached(self):
+        self.client.get(self.url)
+        version = dashboard_cache.version(self.event.id)
+        Booking.objects.create(
+            customer=self.customer, event=self.events[1], total_amount=Decimal('100.00'), status='confirmed'
+        )
+        self.assertEqual(dashboard_cache.version(self.event.id), version)
+
+    def test_warm_upcoming_events(self):
+        out = StringIO()
+        call_command('warm_dashboard_cache', '--days', '60', stdout=out)
+        self.assertIn('3 events', out.getvalue())
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+
+class SnapshotTests(AnalyticsTestCase):
+    """Dashboard snapshot pipeline tests"""
+
+    def setUp(self):
+        super().setUp()
+        self.today = timezone.localdate()
+        self.event = self.events[0]
+        first, second = Booking.objects.filter(event=self.event).order_by('id')
+        Booking.objects.filter(pk=first.pk).update(booking_date=timezone.now() - timedelta(days=10))
+        Booking.objects.filter(pk=second.pk).update(booking_date=timezone.now() - timedelta(days=3))
+        tier = PriceTier.objects.create(
+            event=self.event, tier_name='Early Bird', tier_percentage_start=0, tier_percentage_end=100,
+            price=Decimal('80.00'), created_by_manager=User.objects.create_user(username='manager1')
+        )
+        history = PriceHistory.objects.create(
+            event=self.event, new_tier=tier, booking_percentage=0, tickets_sold_count=0
+        )
+        PriceHistory.objects.filter(pk=history.pk).update(changed_at=timezone.now() - timedelta(days=5))
+
+    def test_backfill_writes_daily_series_and_rollups(self):
+        call_command('generate_snapshots', '--backfill', stdout=StringIO())
+
+        days = list(DashboardSnapshot.objects.filter(event=self.event, granularity='day').order_by('date'))
+        self.assertEqual(len(days), 10)
+        self.assertEqual(days[0].date, self.today - timedelta(days=10))
+        self.assertEqual(days[-1].date, self.today - timedelta(days=1))
+        self.assertEqual([day.bookings_count for day in days].count(1), 2)
+        self.assertEqual(days[0].current_price_tier, '')
+        self.assertEqual(days[-1].current_price_tier, 'Early Bird')
+
+        for granularity in ['week', 'month']:
+            rollups = DashboardSnapshot.objects.filter(event=self.event, granularity=granularity)
+            self.assertEqual(sum(rollup.bookings_count for rollup in rollups), 2)
+            self.assertEqual(sum(rollup.revenue for rollup in rollups), Decimal('200.00'))
+
+    def test_daily_run_is_idempotent(self):
+        self.assertEqual(SnapshotService.generate_daily_snapshots(self.today, self.today), 3)
+        self.assertEqual(SnapshotService.generate_daily_snapshots(self.today, self.today), 3)
+        self.assertEqual(DashboardSnapshot.objects.filter(granularity='day', date=self.today).count(), 3)
+
+    def test_dashboard_reads_precomputed_series(self):
+        call_command('generate_snapshots', '--backfill', stdout=StringIO())
+        DashboardSnapshot.objects.filter(
+            event=self.event, granularity='day', date=self.today - timedelta(days=3)
+        ).update(bookings_count=7)
+
+        payload = AnalyticsService.build_event_dashboard(self.event)
+        self.assertEqual(payload['booking_velocity_per_day'], 1.0)
+        self.assertEqual(len(payload['booking_trends']['day']), 10)
+
+    def test_velocity_counts_the_bookings_of_today(self):
+        call_command('generate_snapshots', '--backfill', stdout=StringIO())
+        for _ in range(6):
+            Booking.objects.create(
+                customer=self.customer, event=self.event, total_amount=Decimal('100.00'), status='confirmed'
+            )
+        # The booking of 3 days ago from the snapshots, today's six from the bookings
+        payload = AnalyticsService.build_event_dashboard(self.event)
+        self.assertEqual(payload['booking_velocity_per_day'], 1.0)
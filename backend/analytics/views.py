@@ -1,89 +1,19 @@
 from django.shortcuts import render, get_object_or_404
-from django.db.models import Sum, Avg, Count, Q
 from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from events.models import Event, EventManager
-from .models import EventAnalytics
+from events.models import Event, EventInventory, EventManager, Performs
+from .cache import dashboard_cache
+from .services import AnalyticsService
 
 
 class EventDashboardView(generics.RetrieveAPIView):
     """Get comprehensive dashboard metrics for a specific event"""
     
     def get(self, request, event_id):
-        event = get_object_or_404(Event, id=event_id)
-        
-        # Get or compute analytics
-        try:
-            analytics = EventAnalytics.objects.get(event=event)
-        except EventAnalytics.DoesNotExist:
-            # Compute on the fly
-            tickets = event.tickets.all()
-            bookings = event.bookings.filter(status__in=['confirmed', 'pending'])
-            feedback = event.feedback.all()
-            
-            total_tickets = tickets.count()
-            booked_tickets = tickets.filter(status='booked').count()
-            total_revenue = bookings.aggregate(total=Sum('total_amount'))['total'] or 0
-            avg_rating = feedback.aggregate(avg=Avg('rating'))['avg']
-            booking_percentage = (booked_tickets / total_tickets * 100) if total_tickets > 0 else 0
-            
-            analytics_data = {
-                'total_bookings': bookings.count(),
-                'total_revenue': float(total_revenue),
-                'avg_rating': float(avg_rating) if avg_rating else None,
-                'booking_percentage': float(booking_percentage),
-                'tickets_available': tickets.filter(status='available').count()
-            }
-        else:
-            analytics_data = {
-                'total_bookings': analytics.total_bookings,
-                'total_revenue': float(analytics.total_revenue),
-                'avg_rating': float(analytics.avg_rating) if analytics.avg_rating else None,
-                'booking_percentage': float(analytics.booking_percentage),
-                'tickets_available': analytics.tickets_available
-            }
-        
-        # Revenue by tier
-        revenue_by_tier = event.bookings.filter(status='confirmed').values(
-            'tickets__current_tier__tier_name'
-        ).annotate(
-            tier_revenue=Sum('total_amount'),
-            tier_bookings=Count('id')
-        )
-        
-        # Booking velocity (last 7 days)
-        from datetime import datetime, timedelta
-        seven_days_ago = datetime.now() - timedelta(days=7)
-        recent_bookings = event.bookings.filter(
-            booking_date__gte=seven_days_ago,
-            status='confirmed'
-        ).count()
-        booking_velocity = recent_bookings / 7.0
-        
-        # Customer demographics (top genres from customer preferences)
-        top_genres = event.bookings.filter(
-            status='confirmed'
-        ).values(
-            'customer__preferred_genres__name'
-        ).annotate(
-            count=Count('id')
-        ).order_by('-count')[:5]
-        
-        return Response({
-            'event': {
-                'id': event.id,
-                'name': event.name,
-                'date': event.date,
-                'venue': event.venue.name,
-                'total_capacity': event.venue.capacity
-            },
-            'analytics': analytics_data,
-            'revenue_by_tier': list(revenue_by_tier),
-            'booking_velocity_per_day': round(booking_velocity, 2),
-            'top_customer_genres': list(top_genres),
-            'last_updated': analytics.last_updated if hasattr(analytics, 'last_updated') else None
-        })
+        event = get_object_or_404(Event.objects.select_related('venue'), id=event_id)
+        payload = dashboard_cache.get(event.id, lambda: AnalyticsService.build_event_dashboard(event))
+        return Response(payload)
 
 
 class ManagerDashboardView(generics.ListAPIView):
@@ -100,14 +30,22 @@ class ManagerDashboardView(generics.ListAPIView):
         except EventManager.DoesNotExist:
             events = Event.objects.none()
         
+        # One query for every event, its venue, its analytics row and its
+        # ticket counters, needed when the analytics row does not exist yet
+        events = list(events.select_related('venue', 'analytics', 'inventory').order_by('date', 'id'))
+        inventories = [
+            getattr(event, 'inventory', None) or EventInventory.for_event(event.pk)
+            for event in events
+        ]
+        
         # Aggregate data for all events
         event_summaries = []
         total_revenue = 0
         total_bookings = 0
         
-        for event in events:
-            try:
-                analytics = EventAnalytics.objects.get(event=event)
+        for event, inventory in zip(events, inventories):
+            analytics = getattr(event, 'analytics', None)
+            if analytics is not None:
                 event_data = {
                     'id': event.id,
                     'name': event.name,
@@ -121,7 +59,7 @@ class ManagerDashboardView(generics.ListAPIView):
                 }
                 total_revenue += float(analytics.total_revenue)
                 total_bookings += analytics.total_bookings
-            except EventAnalytics.DoesNotExist:
+            else:
                 event_data = {
                     'id': event.id,
                     'name': event.name,
@@ -129,26 +67,52 @@ class ManagerDashboardView(generics.ListAPIView):
                     'venue': event.venue.name,
                     'total_bookings': 0,
                     'total_revenue': 0,
-                    'booking_percentage': 0,
+                    'booking_percentage': round(inventory.booking_percentage, 2),
                     'avg_rating': None,
-                    'tickets_available': event.tickets.filter(status='available').count()
+                    'tickets_available': inventory.available_tickets
                 }
             
             event_summaries.append(event_data)
         
-        # Venue utilization (events managed)
-        venue_stats = events.values('venue__name').annotate(
-            events_count=Count('id'),
-            total_bookings=Sum('bookings__id')
-        )
+        # Venue utilization: share of the venue's seats sold across managed events
+        venues = {}
+        for event, inventory, event_data in zip(events, inventories, event_summaries):
+            venue = venues.setdefault(event.venue_id, {
+                'venue__name': event.venue.name,
+                'events_count': 0,
+                'total_bookings': 0,
+                'tickets_booked': 0,
+                'total_tickets': 0
+            })
+            venue['events_count'] += 1
+            venue['total_bookings'] += event_data['total_bookings']
+            venue['tickets_booked'] += inventory.booked_tickets
+            venue['total_tickets'] += inventory.total_tickets
+        for venue in venues.values():
+            venue['utilization_percentage'] = (
+                round(venue['tickets_booked'] / venue['total_tickets'] * 100, 2) if venue['total_tickets'] else 0
+            )
         
-        # Genre performance
-        genre_performance = events.values(
-            'artists__genre__name'
-        ).annotate(
-            event_count=Count('id'),
-            avg_booking_percentage=Avg('tickets__status')  # This is simplified
-        ).order_by('-event_count')[:5]
+        # Genre performance: average booking percentage of the events per genre
+        percentages = {event.id: event_data['booking_percentage'] for event, event_data in zip(events, event_summaries)}
+        genres = {}
+        event_genres = Performs.objects.filter(
+            event_id__in=percentages,
+            artist__genre__isnull=False
+        ).values_list('artist__genre__name', 'event_id').distinct()
+        for genre_name, event_id in event_genres:
+            genres.setdefault(genre_name, []).append(percentages[event_id])
+        genre_performance = sorted(
+            (
+                {
+                    'artists__genre__name': genre_name,
+                    'event_count': len(genre_percentages),
+                    'avg_booking_percentage': round(sum(genre_percentages) / len(genre_percentages), 2)
+                }
+                for genre_name, genre_percentages in genres.items()
+            ),
+            key=lambda genre: (-genre['event_count'], -genre['avg_booking_percentage'])
+        )[:5]
         
         return Response({
             'manager': {
@@ -156,11 +120,11 @@ class ManagerDashboardView(generics.ListAPIView):
                 'email': user.email
             },
             'summary': {
-                'total_events': events.count(),
+                'total_events': len(events),
                 'total_revenue': round(total_revenue, 2),
                 'total_bookings': total_bookings
             },
             'events': event_summaries,
-            'venue_utilization': list(venue_stats),
-            'top_genres': list(genre_performance)
-        })
\ No newline at end of file
+            'venue_utilization': list(venues.values()),
+            'top_genres': genre_performance
+        })
@@ -13,7 +13,7 @@ class GenreAdmin(admin.ModelAdmin):
 class ArtistAdmin(admin.ModelAdmin):
     list_display = ['name', 'genre', 'followers', 'popularity', 'is_active', 'created_at']
     list_filter = ['genre', 'is_active', 'created_at']
-    search_fields = ['name', 'contact_email']
+    search_fields = ['name', 'contact_email', 'external_id']
     list_editable = ['is_active']
     ordering = ['name']
 
@@ -22,7 +22,7 @@ class ArtistAdmin(admin.ModelAdmin):
 class AlbumAdmin(admin.ModelAdmin):
     list_display = ['album_name', 'artist', 'release_date', 'total_tracks', 'created_at']
     list_filter = ['artist', 'release_date']
-    search_fields = ['album_name', 'artist__name']
+    search_fields = ['album_name', 'artist__name', 'external_id']
     autocomplete_fields = ['artist']
     ordering = ['-release_date']
 
@@ -31,6 +31,6 @@ class AlbumAdmin(admin.ModelAdmin):
 class TrackAdmin(admin.ModelAdmin):
     list_display = ['track_name', 'album', 'track_number', 'duration_formatted', 'created_at']
     list_filter = ['album__artist', 'album']
-    search_fields = ['track_name', 'album__album_name', 'album__artist__name']
+    search_fields = ['track_name', 'album__album_name', 'album__artist__name', 'external_id']
     autocomplete_fields = ['album']
     ordering = ['album', 'track_number']
\ No newline at end of file
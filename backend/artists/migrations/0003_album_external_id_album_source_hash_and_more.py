@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artists', '0002_album_track_artist_followers_artist_popularity_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='album',
+            name='external_id',
+            field=models.CharField(blank=True, help_text='album_id of the import files', max_length=100, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='album',
+            name='source_hash',
+            field=models.CharField(blank=True, help_text='Hash of the import row, to skip unchanged rows', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='artist',
+            name='external_id',
+            field=models.CharField(blank=True, help_text='artist_id of the import files', max_length=100, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='artist',
+            name='source_hash',
+            field=models.CharField(blank=True, help_text='Hash of the import row, to skip unchanged rows', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='track',
+            name='external_id',
+            field=models.CharField(blank=True, help_text='track_id of the import files', max_length=100, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='track',
+            name='source_hash',
+            field=models.CharField(blank=True, help_text='Hash of the import row, to skip unchanged rows', max_length=32),
+        ),
+    ]
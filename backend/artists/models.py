@@ -26,6 +26,8 @@ class Artist(models.Model):
     # Fields from Excel data
     followers = models.IntegerField(default=0)
     popularity = models.IntegerField(default=0)  # 0-100 scale
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True, help_text='artist_id of the import files')
+    source_hash = models.CharField(max_length=32, blank=True, help_text='Hash of the import row, to skip unchanged rows')
     
     social_media_links = models.JSONField(default=dict, blank=True)
     is_active = models.BooleanField(default=True)
@@ -55,6 +57,8 @@ class Album(models.Model):
     cover_image = models.ImageField(upload_to='albums/', blank=True, null=True)
     description = models.TextField(blank=True)
     spotify_url = models.URLField(blank=True)
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True, help_text='album_id of the import files')
+    source_hash = models.CharField(max_length=32, blank=True, help_text='Hash of the import row, to skip unchanged rows')
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -82,6 +86,8 @@ class Track(models.Model):
     spotify_url = models.URLField(blank=True)
     preview_url = models.URLField(blank=True)
     is_explicit = models.BooleanField(default=False)
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True, help_text='track_id of the import files')
+    source_hash = models.CharField(max_length=32, blank=True, help_text='Hash of the import row, to skip unchanged rows')
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 import os
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -103,6 +104,32 @@ DATABASES = {
 }
 
 
+# Caches
+# Seat maps, dashboards and idempotent responses (and price tiers, with
+# PRICING_TIER_CACHE='default') are kept in the default cache and invalidated
+# by bumping versions there, so every process must share it: set REDIS_URL
+# (e.g. redis://localhost:6379/0). The per-process local-memory fallback is
+# only fit for development and tests.
+
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+elif DEBUG:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    raise ImproperlyConfigured('REDIS_URL must be set when DEBUG is off: cache versions must be shared between processes')
+
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -179,3 +206,40 @@ ROLE_PERMISSIONS = {
         'customers.add_feedback',
     ]
 }
+
+# Seat holds: how long seats stay reserved between selection and payment
+TICKET_HOLD_TTL_SECONDS = int(os.getenv('TICKET_HOLD_TTL_SECONDS', 600))
+
+# Dynamic pricing: 'coalesced' marks events dirty on booking and lets the
+# reprice_events worker update them at most once per interval; 'immediate'
+# reprices synchronously on every booking
+PRICING_REPRICE_MODE = os.getenv('PRICING_REPRICE_MODE', 'coalesced')
+PRICING_REPRICE_INTERVAL_SECONDS = int(os.getenv('PRICING_REPRICE_INTERVAL_SECONDS', 5))
+
+# Price tier index: seconds a process keeps an event's tiers in memory, and an
+# optional cache alias (e.g. a shared Redis/Memcached cache) to share them and
+# their invalidations between processes
+PRICING_TIER_CACHE_TTL_SECONDS = int(os.getenv('PRICING_TIER_CACHE_TTL_SECONDS', 60))
+PRICING_TIER_CACHE = os.getenv('PRICING_TIER_CACHE') or None
+
+# Event dashboard cache: payloads are served as is for the fresh window, then
+# (or once a booking, feedback or price tier change bumps the event's version)
+# served stale for up to the stale window while one background rebuild runs
+DASHBOARD_CACHE = os.getenv('DASHBOARD_CACHE', 'default')
+DASHBOARD_CACHE_FRESH_SECONDS = int(os.getenv('DASHBOARD_CACHE_FRESH_SECONDS', 60))
+DASHBOARD_CACHE_STALE_SECONDS = int(os.getenv('DASHBOARD_CACHE_STALE_SECONDS', 300))
+
+# Seat maps: per-section availability bitmaps are cached per event in this
+# cache alias, which must be shared between processes (see CACHES); writers
+# bump the event's version there, and the TTL bounds how long bitmaps can be
+# served stale should the cache evict a version before its bitmaps
+SEAT_MAP_CACHE = os.getenv('SEAT_MAP_CACHE', 'default')
+SEAT_MAP_CACHE_TTL_SECONDS = int(os.getenv('SEAT_MAP_CACHE_TTL_SECONDS', 300))
+
+# Idempotent bookings: responses to requests with an Idempotency-Key are
+# cached for the TTL (retries within it cost one cache hit) and kept in the
+# database for the retention period, after which prune_idempotency_records
+# deletes them
+IDEMPOTENCY_CACHE = os.getenv('IDEMPOTENCY_CACHE', 'default')
+IDEMPOTENCY_CACHE_TTL_SECONDS = int(os.getenv('IDEMPOTENCY_CACHE_TTL_SECONDS', 300))
+IDEMPOTENCY_RETENTION_HOURS = int(os.getenv('IDEMPOTENCY_RETENTION_HOURS', 24))
@@ -1,11 +1,14 @@
 from django.contrib import admin
-from .models import Customer, Ticket, Booking, Feedback, FanInteraction
+from .models import (
+    Customer, Ticket, TicketHold, SectionAvailability, WaitingRoom, QueueEntry, Booking, IdempotencyRecord,
+    Feedback, FanInteraction, ImportRun, ImportCheckpoint, QuarantinedRow
+)
 
 
 @admin.register(Customer)
 class CustomerAdmin(admin.ModelAdmin):
     list_display = ['user', 'phone', 'country', 'created_at']
-    search_fields = ['user__username', 'user__email', 'phone']
+    search_fields = ['user__username', 'user__email', 'phone', 'external_id']
     list_filter = ['country', 'created_at']
 
 
@@ -17,6 +20,37 @@ class TicketAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at', 'updated_at']
 
 
+@admin.register(TicketHold)
+class TicketHoldAdmin(admin.ModelAdmin):
+    list_display = ['id', 'customer', 'event', 'status', 'expires_at', 'created_at']
+    list_filter = ['status', 'expires_at']
+    search_fields = ['customer__user__username', 'event__name']
+    readonly_fields = ['created_at']
+
+
+@admin.register(SectionAvailability)
+class SectionAvailabilityAdmin(admin.ModelAdmin):
+    list_display = ['event', 'section', 'seats', 'available', 'updated_at']
+    search_fields = ['event__name', 'section']
+    readonly_fields = ['rows', 'unnumbered', 'seats', 'available', 'bitmap', 'updated_at']
+
+
+@admin.register(WaitingRoom)
+class WaitingRoomAdmin(admin.ModelAdmin):
+    list_display = ['event', 'is_active', 'admit_per_minute', 'admission_ttl_seconds', 'last_admission_at']
+    list_filter = ['is_active']
+    search_fields = ['event__name']
+    readonly_fields = ['last_admission_at', 'created_at']
+
+
+@admin.register(QueueEntry)
+class QueueEntryAdmin(admin.ModelAdmin):
+    list_display = ['room', 'customer', 'priority', 'status', 'joined_at', 'admitted_at', 'expires_at']
+    list_filter = ['status']
+    search_fields = ['customer__user__username', 'room__event__name']
+    readonly_fields = ['token', 'joined_at', 'admitted_at']
+
+
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
     list_display = ['id', 'customer', 'event', 'total_amount', 'status', 'booking_date']
@@ -24,6 +58,29 @@ class BookingAdmin(admin.ModelAdmin):
     search_fields = ['customer__user__username', 'event__name', 'payment_reference']
     readonly_fields = ['booking_date']
     filter_horizontal = ['tickets']
+    actions = ['cancel_bookings', 'refund_bookings']
+
+    @admin.action(description='Cancel selected bookings and release their seats')
+    def cancel_bookings(self, request, queryset):
+        from .services import BookingCancellationService
+
+        bookings, tickets = BookingCancellationService.cancel_bookings(queryset)
+        self.message_user(request, f'Cancelled {bookings} bookings and released {tickets} tickets')
+
+    @admin.action(description='Refund selected bookings and release their seats')
+    def refund_bookings(self, request, queryset):
+        from .services import BookingCancellationService
+
+        bookings, tickets = BookingCancellationService.cancel_bookings(queryset, refund=True)
+        self.message_user(request, f'Refunded {bookings} bookings and released {tickets} tickets')
+
+
+@admin.register(IdempotencyRecord)
+class IdempotencyRecordAdmin(admin.ModelAdmin):
+    list_display = ['customer', 'key', 'status_code', 'created_at']
+    list_filter = ['status_code', 'created_at']
+    search_fields = ['customer__user__username', 'key']
+    readonly_fields = ['request_hash', 'response', 'created_at']
 
 
 @admin.register(Feedback)
@@ -40,4 +97,27 @@ class FanInteractionAdmin(admin.ModelAdmin):
     list_filter = ['interaction_type', 'device_type', 'timestamp']
     search_fields = ['fan__user__username', 'track__track_name', 'track__album__album_name']
     readonly_fields = ['created_at']
-    date_hierarchy = 'timestamp'
\ No newline at end of file
+    date_hierarchy = 'timestamp'
+
+
+class ImportCheckpointInline(admin.TabularInline):
+    model = ImportCheckpoint
+    extra = 0
+    readonly_fields = ['entity', 'file_name', 'content_hash', 'rows_done', 'rows_written', 'completed', 'updated_at']
+
+
+@admin.register(ImportRun)
+class ImportRunAdmin(admin.ModelAdmin):
+    list_display = ['id', 'data_dir', 'loader', 'status', 'started_at', 'finished_at']
+    list_filter = ['status', 'started_at']
+    search_fields = ['data_dir', 'error']
+    readonly_fields = ['started_at', 'finished_at']
+    inlines = [ImportCheckpointInline]
+
+
+@admin.register(QuarantinedRow)
+class QuarantinedRowAdmin(admin.ModelAdmin):
+    list_display = ['run', 'entity', 'file_name', 'row_index', 'reason', 'created_at']
+    list_filter = ['entity', 'run']
+    search_fields = ['reason', 'file_name']
+    readonly_fields = ['created_at']
@@ -0,0 +1,928 @@
+"""
+Chunked bulk import of the RhythmLink data files.
+
+Each file is streamed in chunks (see import_sources). Foreign keys are
+resolved through dict maps of source IDs to primary keys, filled as the
+entities they point at are written, and every chunk is written with bulk_create (upserting or ignoring rows that
+already exist) instead of one get_or_create round trip per row.
+
+With loader='copy' on PostgreSQL, the high-volume models are instead streamed
+into a staging table with COPY FROM STDIN and merged with INSERT ... ON
+CONFLICT; other databases fall back to batched bulk_create.
+
+Every chunk commits on its own. Given an ImportRun, each file's progress is
+committed with its chunks as an ImportCheckpoint, so a failed import resumes
+after the last committed chunk, and rows that cannot be loaded are kept as
+QuarantinedRows with the reason instead of failing the import.
+
+Rows carrying a source ID (artist_id, album_id, ...) are stored under it as
+external_id together with a hash of the row. In delta mode rows whose hash
+did not change since the last import are skipped before any other work, so
+a sync costs time in proportion to what changed.
+"""
+import csv
+import hashlib
+import io
+import os
+import threading
+import time
+from datetime import time as clock
+from decimal import Decimal, InvalidOperation
+import pandas as pd
+from django.contrib.auth.models import User
+from django.db import connection, transaction, DataError, IntegrityError
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from artists.models import Genre, Artist, Album, Track
+from events.models import EventType, Venue, Event, Performs, EventInventory
+from pricing.services import DynamicPricingService
+from .import_sources import file_hash, open_source
+from .models import Customer, Ticket, FanInteraction, ImportCheckpoint, QuarantinedRow
+from .services import TicketInventoryService
+
+
+DEFAULT_CHUNK_SIZE = 5000
+LOADERS = ['orm', 'copy']
+
+# Errors caused by the content of a row rather than by the database or the code
+ROW_ERRORS = (IntegrityError, DataError, ValueError, InvalidOperation)
+
+
+class ImportStats:
+    """Row counts and timing of one imported entity"""
+
+    def __init__(self, entity):
+        self.entity = entity
+        self.rows = 0
+        self.written = 0
+        self.skipped = 0
+        self.quarantined = 0
+        self.unchanged = 0
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class ImportEngine:
+    """Generic chunked reader and bulk writer"""
+
+    # Models written through COPY when loader='copy'
+    COPY_MODELS = ()
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, batch_size=1000, loader='orm', import_run=None,
+                 delta=False, stdout=None, style=None):
+        if loader not in LOADERS:
+            raise ValueError(f'Unknown loader {loader!r}, expected one of {", ".join(LOADERS)}')
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.loader = loader
+        self.import_run = import_run
+        self.delta = delta
+        self.stdout = stdout
+        self.style = style
+        self.stats = {}
+        # Per-thread chunk state, as stages may load concurrently
+        self.state = threading.local()
+
+    def log(self, message, style_name=None):
+        if self.stdout is None:
+            return
+        if style_name and self.style:
+            message = getattr(self.style, style_name)(message)
+        self.stdout.write(message)
+
+    def read_chunks(self, path):
+        """Yield the rows of a CSV or XLSX file as DataFrames of at most chunk_size rows, all values as text"""
+        return open_source(path).batches(self.chunk_size)
+
+    def load(self, entity, path, process_chunk, batches=None, checkpoint=None, replay=False):
+        """
+        Stream a file through process_chunk(df), which writes the chunk and
+        returns how many rows it wrote. Already parsed batches may be passed
+        instead of reading the file. Returns the entity's ImportStats.
+
+        Each chunk commits together with the checkpoint. Rows the checkpoint
+        already covers are skipped, or with replay run through process_chunk
+        without writing anything, so that the key maps later entities need
+        are rebuilt.
+        """
+        stats = ImportStats(entity)
+        started = time.perf_counter()
+        committed = checkpoint.rows_done if checkpoint else 0
+        position = 0
+        for chunk in batches if batches is not None else self.read_chunks(path):
+            done = min(max(committed - position, 0), len(chunk))
+            position += len(chunk)
+            if done:
+                if replay:
+                    self.replay_chunk(chunk.iloc[:done], process_chunk)
+                chunk = chunk.iloc[done:]
+                if chunk.empty:
+                    continue
+
+            stats.rows += len(chunk)
+            with transaction.atomic():
+                written = self.load_chunk(entity, os.path.basename(path), chunk, process_chunk, stats)
+                if checkpoint:
+                    ImportCheckpoint.objects.filter(pk=checkpoint.pk).update(
+                        rows_done=F('rows_done') + len(chunk),
+                        rows_written=F('rows_written') + written,
+                        updated_at=timezone.now()
+                    )
+            stats.written += written
+        stats.skipped = stats.rows - stats.written
+        stats.seconds = time.perf_counter() - started
+        self.stats[entity] = stats
+        return stats
+
+    def load_chunk(self, entity, file_name, chunk, process_chunk, stats):
+        """
+        Write one chunk. If it fails on bad data, it is retried row by row and
+        the rows that still fail are quarantined with the error.
+        """
+        self.state.rejected = []
+        self.state.unchanged = 0
+        try:
+            with transaction.atomic():
+                written = process_chunk(chunk)
+        except ROW_ERRORS:
+            self.state.rejected = []
+            self.state.unchanged = 0
+            written = 0
+            for position in range(len(chunk)):
+                row = chunk.iloc[position:position + 1]
+                rejected = len(self.state.rejected)
+                try:
+                    with transaction.atomic():
+                        written += process_chunk(row)
+                except ROW_ERRORS as e:
+                    del self.state.rejected[rejected:]
+                    self.reject(row, row.index[0], f'{type(e).__name__}: {e}')
+
+        rejected, self.state.rejected = self.state.rejected, None
+        stats.quarantined += len(rejected)
+        stats.unchanged += self.state.unchanged
+        if rejected and self.import_run:
+            QuarantinedRow.objects.bulk_create([
+                QuarantinedRow(
+                    run=self.import_run,
+                    entity=entity,
+                    file_name=file_name,
+                    row_index=int(idx),
+                    data=data,
+                    reason=reason
+                )
+                for idx, data, reason in rejected
+            ], batch_size=self.batch_size)
+        return written
+
+    def replay_chunk(self, chunk, process_chunk):
+        """Run rows that are already committed through process_chunk without writing them"""
+        self.state.replaying = True
+        try:
+            process_chunk(chunk)
+        finally:
+            self.state.replaying = False
+
+    @property
+    def replaying(self):
+        return getattr(self.state, 'replaying', False)
+
+    def reject(self, df, idx, reason):
+        """Quarantine a row of the chunk being loaded"""
+        rejected = getattr(self.state, 'rejected', None)
+        if rejected is not None and not self.replaying:
+            rejected.append((idx, df.loc[idx].to_dict(), reason))
+
+    def checkpoint(self, entity, path):
+        """The import run's checkpoint of a file, reset if the file changed; None without a run"""
+        if self.import_run is None:
+            return None
+        file_name = os.path.basename(path)
+        content_hash = file_hash(path)
+        checkpoint, created = ImportCheckpoint.objects.get_or_create(
+            run=self.import_run,
+            entity=entity,
+            defaults={'file_name': file_name, 'content_hash': content_hash}
+        )
+        if created:
+            return checkpoint
+        if checkpoint.content_hash != content_hash:
+            self.log(f'  ! {file_name} changed since the import started, loading it from the start', 'WARNING')
+            checkpoint.file_name = file_name
+            checkpoint.content_hash = content_hash
+            checkpoint.rows_done = 0
+            checkpoint.rows_written = 0
+            checkpoint.completed = False
+            checkpoint.save()
+        elif checkpoint.rows_done and not checkpoint.completed:
+            self.log(f'  Resuming {file_name} after row {checkpoint.rows_done}')
+        return checkpoint
+
+    @staticmethod
+    def complete(checkpoint):
+        if checkpoint:
+            ImportCheckpoint.objects.filter(pk=checkpoint.pk).update(completed=True, updated_at=timezone.now())
+            checkpoint.completed = True
+
+    def bulk_write(self, model, objects, unique_fields=None, update_fields=None, ignore_conflicts=False):
+        """
+        bulk_create one chunk. With update_fields, rows colliding on unique_fields
+        are updated in place; with ignore_conflicts they are left alone. Returns
+        the number of rows inserted or updated.
+        """
+        if self.replaying:
+            return 0
+        if unique_fields:
+            # A single INSERT ... ON CONFLICT may not touch the same row twice
+            deduplicated = {}
+            for obj in objects:
+                key = tuple(getattr(obj, model._meta.get_field(field).attname) for field in unique_fields)
+                deduplicated[key] = obj
+            objects = list(deduplicated.values())
+        if not objects:
+            return 0
+        if self.uses_copy(model):
+            return self.copy_write(model, objects, unique_fields, update_fields)
+
+        options = {'batch_size': self.batch_size}
+        if update_fields:
+            options.update(update_conflicts=True, unique_fields=unique_fields, update_fields=update_fields)
+        elif ignore_conflicts:
+            options['ignore_conflicts'] = True
+            if unique_fields:
+                # Skipped conflicts are not reported, so count the rows the insert added
+                # among those sharing the leading unique field, which its index covers
+                attname = model._meta.get_field(unique_fields[0]).attname
+                scope = model.objects.filter(**{f'{attname}__in': {getattr(obj, attname) for obj in objects}})
+                before = scope.count()
+                model.objects.bulk_create(objects, **options)
+                return scope.count() - before
+        model.objects.bulk_create(objects, **options)
+        return len(objects)
+
+    def uses_copy(self, model):
+        """Whether a model is written through COPY; needs PostgreSQL"""
+        return self.loader == 'copy' and model in self.COPY_MODELS and connection.vendor == 'postgresql'
+
+    def copy_write(self, model, objects, unique_fields=None, update_fields=None):
+        """
+        Stream one chunk into a staging table with COPY FROM STDIN, then merge it
+        into the model's table with a single INSERT ... SELECT ... ON CONFLICT.
+        Without update_fields, conflicting rows are left alone.
+        """
+        opts = model._meta
+        quote = connection.ops.quote_name
+        fields = [field for field in opts.concrete_fields if not field.primary_key]
+        columns = ', '.join(quote(field.column) for field in fields)
+        table = quote(opts.db_table)
+        stage = quote(f'import_stage_{opts.db_table}')
+
+        buffer = io.StringIO()
+        # Strings are always quoted so that only None becomes an unquoted empty field, i.e. NULL
+        writer = csv.writer(buffer, quoting=csv.QUOTE_STRINGS)
+        for obj in objects:
+            writer.writerow([field.get_db_prep_save(field.pre_save(obj, True), connection) for field in fields])
+        buffer.seek(0)
+
+        merge = f'INSERT INTO {table} ({columns}) SELECT {columns} FROM {stage}'
+        if unique_fields:
+            conflict = ', '.join(quote(opts.get_field(name).column) for name in unique_fields)
+            if update_fields:
+                assignments = ', '.join(
+                    f'{quote(opts.get_field(name).column)} = EXCLUDED.{quote(opts.get_field(name).column)}'
+                    for name in update_fields
+                )
+                merge += f' ON CONFLICT ({conflict}) DO UPDATE SET {assignments}'
+            else:
+                merge += f' ON CONFLICT ({conflict}) DO NOTHING'
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMP TABLE IF NOT EXISTS {stage} ON COMMIT DROP AS '
+                f'SELECT {columns} FROM {table} WITH NO DATA'
+            )
+            cursor.execute(f'TRUNCATE {stage}')
+            cursor.cursor.copy_expert(f'COPY {stage} ({columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+            cursor.execute(merge)
+            # Rows skipped by ON CONFLICT DO NOTHING are not in the count
+            return cursor.rowcount
+
+    def skip_unchanged(self, model, df, id_column, hashes, keys, *fields):
+        """
+        In delta mode, drop the rows of a chunk stored with the same source
+        hash. Their keys are added to keys, as the pk or as (pk, *fields).
+        """
+        if not self.delta or df.empty:
+            return df
+        ids = column(df, id_column)
+        stored = {
+            row[0]: row[1:]
+            for row in model.objects.filter(
+                external_id__in=set(ids) - {''}
+            ).values_list('external_id', 'source_hash', 'id', *fields)
+        }
+        unchanged = pd.Series(
+            [external_id in stored and stored[external_id][0] == row_hash for external_id, row_hash in zip(ids, hashes)],
+            index=df.index
+        )
+        for external_id in ids[unchanged]:
+            keys[external_id] = stored[external_id][1:] if fields else stored[external_id][1]
+        if not self.replaying:
+            self.state.unchanged = getattr(self.state, 'unchanged', 0) + int(unchanged.sum())
+        return df[~unchanged]
+
+    def sync_keyed(self, model, objects, update_fields, natural_key):
+        """
+        Write rows identified by their source ID (external_id) and return
+        ({external_id: pk}, rows written, objects inserted).
+
+        Rows are upserted on external_id. A row whose source ID is not stored
+        yet is first matched on natural_key, the attnames rows were told apart
+        by before source IDs were kept: a match without a source ID is adopted
+        by the row, a match owned by another source ID absorbs the row as an
+        alias. Rows without a source ID are only inserted when unmatched.
+        """
+        keyed = {}
+        unkeyed = []
+        for obj in objects:
+            if obj.external_id:
+                keyed[obj.external_id] = obj
+            else:
+                unkeyed.append(obj)
+
+        def natural(obj):
+            return tuple(getattr(obj, attname) for attname in natural_key)
+
+        stored = set(model.objects.filter(external_id__in=keyed).values_list('external_id', flat=True))
+        new = [obj for external_id, obj in keyed.items() if external_id not in stored] + unkeyed
+        matches = self.natural_matches(model, natural_key, {natural(obj) for obj in new})
+
+        upserts = [obj for external_id, obj in keyed.items() if external_id in stored]
+        inserts = {}
+        adopted = []
+        aliases = {}
+        for obj in new:
+            key = natural(obj)
+            if key in matches:
+                pk, owner = matches[key]
+                if obj.external_id and owner is None:
+                    obj.pk = pk
+                    adopted.append(obj)
+                    matches[key] = (pk, obj.external_id)
+                elif obj.external_id:
+                    aliases[obj.external_id] = key
+            elif key in inserts:
+                if obj.external_id:
+                    aliases[obj.external_id] = key
+            else:
+                inserts[key] = obj
+
+        inserted = list(inserts.values())
+        update_fields = update_fields + ['source_hash']
+        written = self.bulk_write(
+            model, upserts + [obj for obj in inserted if obj.external_id],
+            unique_fields=['external_id'],
+            update_fields=update_fields
+        )
+        written += self.bulk_write(model, [obj for obj in inserted if not obj.external_id])
+        if adopted and not self.replaying:
+            # bulk_update does not fill auto_now fields itself
+            now = timezone.now()
+            for name in update_fields:
+                if getattr(model._meta.get_field(name), 'auto_now', False):
+                    for obj in adopted:
+                        setattr(obj, name, now)
+            model.objects.bulk_update(adopted, update_fields + ['external_id'], batch_size=self.batch_size)
+            written += len(adopted)
+
+        keys = self.key_map(model.objects.filter(external_id__in=keyed), 'external_id')
+        if aliases:
+            resolved = self.natural_matches(model, natural_key, set(aliases.values()))
+            for external_id, key in aliases.items():
+                if key in resolved:
+                    keys[external_id] = resolved[key][0]
+        return keys, written, inserted
+
+    @staticmethod
+    def natural_matches(model, natural_key, values):
+        """{natural key: (pk, external_id)} of the stored rows among the given natural key tuples"""
+        if not values:
+            return {}
+        rows = model.objects.filter(
+            **{f'{natural_key[0]}__in': {value[0] for value in values}}
+        ).values_list(*natural_key, 'id', 'external_id')
+        return {tuple(row[:-2]): tuple(row[-2:]) for row in rows if tuple(row[:-2]) in values}
+
+    @staticmethod
+    def key_map(queryset, *key_fields):
+        """{key: pk} for a queryset, keys being a value or a tuple of values"""
+        rows = queryset.values_list(*key_fields, 'id')
+        if len(key_fields) == 1:
+            return {row[0]: row[1] for row in rows}
+        return {row[:-1]: row[-1] for row in rows}
+
+    def report(self):
+        """Print rows/sec per entity"""
+        for stats in self.stats.values():
+            self.log(
+                f'  {stats.entity:<18} {stats.rows:>8} rows  {stats.written:>8} written  '
+                f'{stats.skipped:>6} skipped  {stats.unchanged:>8} unchanged  {stats.quarantined:>6} quarantined  '
+                f'{stats.seconds:7.2f}s  {stats.rows_per_second:10.0f} rows/sec'
+            )
+
+
+def column(df, name, default=''):
+    """A column of a chunk as stripped strings, or the default for every row when missing"""
+    if name not in df:
+        return pd.Series([default] * len(df), index=df.index)
+    return df[name].astype(str).str.strip()
+
+
+def row_hashes(df):
+    """MD5 of each row's source values, to tell which rows changed since the last import"""
+    if df.empty:
+        return pd.Series([], index=df.index, dtype=str)
+    columns = [df[name].astype(str) for name in sorted(df.columns)]
+    text = columns[0].str.cat(columns[1:], sep='\x1f')
+    return pd.Series([hashlib.md5(row.encode()).hexdigest() for row in text], index=df.index)
+
+
+def to_int(value, default):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return default
+
+
+class DataImporter(ImportEngine):
+    """Imports the data directory: artists, albums, tracks, fans, events and fan interactions"""
+
+    # (entity, file name, entities it references)
+    STAGES = [
+        ('artists', 'Artists.xlsx', []),
+        ('albums', 'Albums.xlsx', ['artists']),
+        ('tracks', 'Tracks.xlsx', ['albums']),
+        ('fans', 'Fans.xlsx', []),
+        ('events', 'Events.xlsx', ['artists']),
+        ('fan_interactions', 'Fan_interactions.xlsx', ['fans', 'tracks']),
+    ]
+
+    INTERACTION_TYPES = {
+        'play': 'play',
+        'stream': 'play',
+        'streamed': 'play',
+        'listen': 'play',
+        'like': 'like',
+        'liked': 'like',
+        'favorite': 'like',
+        'share': 'share',
+        'shared': 'share',
+        'playlist': 'playlist_add',
+        'playlist_add': 'playlist_add',
+        'download': 'download'
+    }
+
+    SAMPLE_TICKETS_PER_EVENT = 50
+
+    COPY_MODELS = (Track, FanInteraction)
+
+    def __init__(self, data_dir, tier_manager=None, **kwargs):
+        super().__init__(**kwargs)
+        self.data_dir = data_dir
+        # User recorded as creator of the default price tiers of new events; None leaves them without tiers
+        self.tier_manager = tier_manager
+        # Source ID -> primary key maps
+        self.genre_ids = {}
+        self.artist_ids = {}
+        self.album_ids = {}
+        self.track_ids = {}
+        self.fan_ids = {}  # fan_id -> (customer pk, country)
+        self.recount_album_ids = set()
+        self.fallback_artist_id = None
+        self.taken_usernames = None
+
+    def run(self):
+        """Import every file present in dependency order"""
+        for entity, file_name, _ in self.STAGES:
+            self.import_file(entity, file_name)
+        return self.stats
+
+    @classmethod
+    def referenced_entities(cls):
+        """Entities whose key maps other stages resolve foreign keys through"""
+        return {dependency for _, _, dependencies in cls.STAGES for dependency in dependencies}
+
+    def path(self, file_name):
+        return os.path.join(self.data_dir, file_name)
+
+    def import_file(self, entity, file_name, batches=None):
+        path = self.path(file_name)
+        if batches is None and not os.path.exists(path):
+            self.log(f'  ! Skipping {file_name} - file not found', 'WARNING')
+            return None
+
+        checkpoint = self.checkpoint(entity, path)
+        replay = entity in self.referenced_entities()
+        if checkpoint and checkpoint.completed:
+            if not replay:
+                self.log(f'  ✓ {file_name} already imported', 'SUCCESS')
+                return None
+            self.log(f'Reloading {entity.replace("_", " ")} keys ({file_name} already imported)...')
+            return self.load(entity, path, getattr(self, f'import_{entity}_chunk'), batches, checkpoint, replay)
+
+        self.log(f'Importing {entity.replace("_", " ").title()}...')
+        stats = self.load(entity, path, getattr(self, f'import_{entity}_chunk'), batches, checkpoint, replay)
+        with transaction.atomic():
+            finish = getattr(self, f'finish_{entity}', None)
+            if finish:
+                finish()
+            self.complete(checkpoint)
+        self.log(
+            f'  ✓ {stats.written} {entity.replace("_", " ")} written from {stats.rows} rows '
+            f'({stats.rows_per_second:.0f} rows/sec)',
+            'SUCCESS'
+        )
+        return stats
+
+    # Artists
+
+    def import_artists_chunk(self, df):
+        hashes = row_hashes(df)
+        df = self.skip_unchanged(Artist, df, 'artist_id', hashes, self.artist_ids)
+        rows = []
+        for idx, artist_id, name, genres, followers, popularity in zip(
+            df.index, column(df, 'artist_id'), column(df, 'name'), column(df, 'genres'),
+            column(df, 'followers', '0'), column(df, 'popularity', '0')
+        ):
+            # Use the first genre as the primary genre
+            genre = genres.split(',')[0].strip() if genres and genres != 'nan' else ''
+            rows.append((artist_id, name or f'Artist_{idx}', genre or 'Unknown', followers, popularity, hashes[idx]))
+
+        new_genres = {row[2] for row in rows} - set(self.genre_ids)
+        self.bulk_write(
+            Genre,
+            [Genre(name=name, description=f'{name} music genre') for name in new_genres],
+            unique_fields=['name'],
+            ignore_conflicts=True
+        )
+        genre_ids = self.key_map(Genre.objects.filter(name__in=new_genres), 'name')
+
+        # Artist names are not unique in the schema, so artists without a source ID are matched by name
+        keys, written, _ = self.sync_keyed(
+            Artist,
+            [
+                Artist(
+                    external_id=artist_id or None,
+                    source_hash=row_hash,
+                    name=name,
+                    genre_id=self.genre_ids.get(genre) or genre_ids[genre],
+                    followers=to_int(followers, 0),
+                    popularity=to_int(popularity, 0),
+                    is_active=True
+                )
+                for artist_id, name, genre, followers, popularity, row_hash in rows
+            ],
+            ['name', 'genre', 'followers', 'popularity', 'updated_at'],
+            ('name',)
+        )
+
+        # Maps are only filled once the chunk is written, so a failed chunk leaves no stale keys
+        self.genre_ids.update(genre_ids)
+        self.artist_ids.update(keys)
+        return written
+
+    # Albums
+
+    def import_albums_chunk(self, df):
+        today = timezone.now().date()
+        hashes = row_hashes(df)
+        df = self.skip_unchanged(Album, df, 'album_id', hashes, self.album_ids)
+        release_dates = pd.to_datetime(column(df, 'release_date'), errors='coerce')
+        albums = []
+        for idx, album_id, artist_id, name, spotify_url, released in zip(
+            df.index, column(df, 'album_id'), column(df, 'artist_id'), column(df, 'album_name'),
+            column(df, 'spotify_url'), release_dates
+        ):
+            if not name or name == 'nan':
+                self.reject(df, idx, 'Missing album_name')
+                continue
+            artist_pk = self.artist_ids.get(artist_id) or self.get_fallback_artist_id()
+            if not artist_pk:
+                self.reject(df, idx, f'Unknown artist_id {artist_id!r} and no artist to fall back to')
+                continue
+            albums.append(Album(
+                external_id=album_id or None,
+                source_hash=hashes[idx],
+                artist_id=artist_pk,
+                album_name=name,
+                release_date=released.date() if pd.notna(released) else today,
+                total_tracks=0,  # Updated once the tracks are imported
+                spotify_url=spotify_url
+            ))
+
+        keys, written, _ = self.sync_keyed(
+            Album, albums,
+            ['artist', 'album_name', 'release_date', 'spotify_url', 'updated_at'],
+            ('artist_id', 'album_name')
+        )
+        self.album_ids.update(keys)
+        return written
+
+    def get_fallback_artist_id(self):
+        """Albums of unknown artists are attached to the first artist, as before"""
+        if self.fallback_artist_id is None:
+            self.fallback_artist_id = Artist.objects.values_list('id', flat=True).first() or 0
+        return self.fallback_artist_id
+
+    # Tracks
+
+    def import_tracks_chunk(self, df):
+        hashes = row_hashes(df)
+        df = self.skip_unchanged(Track, df, 'track_id', hashes, self.track_ids)
+        tracks = []
+        for idx, track_id, album_id, name, number, duration in zip(
+            df.index, column(df, 'track_id'), column(df, 'album_id'), column(df, 'track_name'),
+            column(df, 'track_number', '1'), column(df, 'duration_ms', '180000')
+        ):
+            album_pk = self.album_ids.get(album_id)
+            if not name or name == 'nan':
+                self.reject(df, idx, 'Missing track_name')
+                continue
+            if not album_pk:
+                self.reject(df, idx, f'Unknown album_id {album_id!r}')
+                continue
+            tracks.append(Track(
+                external_id=track_id or None,
+                source_hash=hashes[idx],
+                album_id=album_pk,
+                track_number=to_int(number, 1),
+                track_name=name,
+                duration_ms=to_int(duration, 180000)
+            ))
+
+        # Albums that gain or lose tracks, including the ones tracks move away from
+        if not self.replaying:
+            self.recount_album_ids.update(track.album_id for track in tracks)
+            self.recount_album_ids.update(Track.objects.filter(
+                external_id__in={track.external_id for track in tracks if track.external_id}
+            ).values_list('album_id', flat=True))
+        keys, written, _ = self.sync_keyed(
+            Track, tracks,
+            ['album', 'track_number', 'track_name', 'duration_ms', 'updated_at'],
+            ('album_id', 'track_number')
+        )
+        self.track_ids.update(keys)
+        return written
+
+    def finish_tracks(self):
+        """Recount Album.total_tracks of the albums whose tracks changed in one UPDATE"""
+        track_counts = Track.objects.filter(album=OuterRef('pk')).values('album').annotate(n=Count('id')).values('n')
+        Album.objects.filter(id__in=self.recount_album_ids).update(total_tracks=Coalesce(Subquery(track_counts), 0))
+        self.recount_album_ids = set()
+
+    # Fans
+
+    def import_fans_chunk(self, df):
+        hashes = row_hashes(df)
+        df = self.skip_unchanged(Customer, df, 'fan_id', hashes, self.fan_ids, 'country')
+        if df.empty:
+            return 0
+        if self.taken_usernames is None:
+            self.taken_usernames = set(User.objects.values_list('username', flat=True))
+
+        fans = []
+        for idx, fan_id, name, email, country in zip(
+            df.index, column(df, 'fan_id'), column(df, 'name'), column(df, 'email'), column(df, 'country')
+        ):
+            fans.append((
+                fan_id or f'fan_{idx}',
+                name or f'Fan {idx}',
+                email or f'fan{idx}@example.com',
+                '' if country == 'nan' else country,
+                idx
+            ))
+
+        # Users are matched by email like get_or_create(email=...) did
+        user_ids = {}
+        for email, user_id in User.objects.filter(email__in={fan[2] for fan in fans}).order_by('id').values_list('email', 'id'):
+            user_ids.setdefault(email, user_id)
+
+        new_users = {}
+        for fan_id, name, email, country, idx in fans:
+            if email in user_ids or email in new_users:
+                continue
+            base_username = email.split('@')[0][:30] if '@' in email else f'fan_{idx}'
+            username = base_username
+            counter = 1
+            while username in self.taken_usernames:
+                username = f'{base_username}{counter}'
+                counter += 1
+            self.taken_usernames.add(username)
+            new_users[email] = User(
+                username=username,
+                email=email,
+                first_name=name.split()[0] if name else 'Fan',
+                last_name=' '.join(name.split()[1:]) if len(name.split()) > 1 else ''
+            )
+        self.bulk_write(User, list(new_users.values()))
+        if new_users:
+            user_ids.update(self.key_map(User.objects.filter(email__in=new_users), 'email'))
+
+        # A user has one customer profile, the first fan row of an email creates it
+        _, written, _ = self.sync_keyed(
+            Customer,
+            [
+                Customer(
+                    external_id=column_id or None,
+                    source_hash=hashes[idx],
+                    user_id=user_ids[email],
+                    country=country,
+                    marketing_consent=True
+                )
+                for (fan_id, name, email, country, idx), column_id in zip(fans, column(df, 'fan_id'))
+            ],
+            ['country', 'updated_at'],
+            ('user_id',)
+        )
+
+        customers = {
+            user_id: (customer_id, country)
+            for user_id, customer_id, country in Customer.objects.filter(
+                user_id__in={user_ids[fan[2]] for fan in fans}
+            ).values_list('user_id', 'id', 'country')
+        }
+        for fan_id, name, email, country, idx in fans:
+            self.fan_ids[fan_id] = customers[user_ids[email]]
+        return written
+
+    # Events
+
+    def import_events_chunk(self, df):
+        today = timezone.now().date()
+        start_time, end_time = clock(20, 0), clock(23, 0)
+        event_type, _ = EventType.objects.get_or_create(
+            name='Concert',
+            defaults={'description': 'Live concert performance'}
+        )
+
+        hashes = row_hashes(df)
+        df = self.skip_unchanged(Event, df, 'event_id', hashes, {})
+        if df.empty:
+            return 0
+
+        dates = pd.to_datetime(column(df, 'date'), errors='coerce')
+        rows = []
+        for idx, event_id, name, location, artist_id, revenue, event_date in zip(
+            df.index, column(df, 'event_id'), column(df, 'name'), column(df, 'location'), column(df, 'artist_id'),
+            column(df, 'revenue'), dates
+        ):
+            location = location or 'Unknown Location'
+            city = location.split(',')[0] if ',' in location else location
+            rows.append({
+                'event_id': event_id,
+                'hash': hashes[idx],
+                'name': name or f'Event {idx}',
+                'location': location,
+                'city': city,
+                'venue_name': f'Venue - {city}',
+                'artist_id': artist_id,
+                'revenue': revenue,
+                'date': event_date.date() if pd.notna(event_date) else today,
+            })
+
+        # Venues
+        venue_ids = self.key_map(Venue.objects.filter(name__in={row['venue_name'] for row in rows}), 'name')
+        new_venues = {}
+        for row in rows:
+            if row['venue_name'] not in venue_ids and row['venue_name'] not in new_venues:
+                location = row['location']
+                new_venues[row['venue_name']] = Venue(
+                    name=row['venue_name'],
+                    location=location,
+                    address=location,
+                    city=row['city'],
+                    state=location.split(',')[-1].strip() if ',' in location else 'Unknown',
+                    capacity=5000
+                )
+        self.bulk_write(Venue, list(new_venues.values()))
+        if new_venues:
+            venue_ids.update(self.key_map(Venue.objects.filter(name__in=new_venues), 'name'))
+
+        # Events without a source ID are matched on (name, date, venue) like get_or_create did
+        events = []
+        for row in rows:
+            ticket_price = Decimal('50.00')
+            revenue = pd.to_numeric(row['revenue'], errors='coerce')
+            if pd.notna(revenue) and revenue > 0:
+                # Assume 100 tickets sold on average
+                ticket_price = Decimal(str(min(revenue / 100, 500)))
+            events.append(Event(
+                external_id=row['event_id'] or None,
+                source_hash=row['hash'],
+                name=row['name'],
+                date=row['date'],
+                venue_id=venue_ids[row['venue_name']],
+                description=f'{row["name"]} at {row["location"]}',
+                start_time=start_time,
+                end_time=end_time,
+                event_type=event_type,
+                ticket_price=ticket_price,
+                is_active=row['date'] >= today
+            ))
+        # The price of an existing event is left to its price tiers
+        natural_key = ('name', 'date', 'venue_id')
+        keys, written, inserted = self.sync_keyed(
+            Event, events,
+            ['name', 'date', 'venue', 'description', 'is_active', 'updated_at'],
+            natural_key
+        )
+        created = {
+            key: pk for key, (pk, _) in self.natural_matches(
+                Event, natural_key, {(event.name, event.date, event.venue_id) for event in inserted}
+            ).items()
+        }
+
+        performances = []
+        for row, event in zip(rows, events):
+            event_pk = keys.get(event.external_id) or created.get((event.name, event.date, event.venue_id))
+            artist_pk = self.artist_ids.get(row['artist_id'])
+            if event_pk and artist_pk:
+                performances.append(Performs(
+                    artist_id=artist_pk,
+                    event_id=event_pk,
+                    performance_time=start_time,
+                    duration_minutes=90,
+                    is_headliner=True
+                ))
+        for event in inserted:
+            event.pk = created[(event.name, event.date, event.venue_id)]
+        # New events get the default schedule in one insert; their tickets start at the opening tier
+        opening_tiers = {}
+        if self.tier_manager and inserted:
+            tiers = DynamicPricingService.create_default_price_tiers_for_events(
+                [(event, event.ticket_price) for event in inserted], self.tier_manager
+            )
+            opening_tiers = {tier.event_id: tier for tier in tiers if tier.tier_percentage_start == 0}
+        tickets = []
+        for event in inserted:
+            tickets.extend(self.sample_tickets(event, self.SAMPLE_TICKETS_PER_EVENT, opening_tiers.get(event.pk)))
+        self.bulk_write(Performs, performances, unique_fields=['artist', 'event'], ignore_conflicts=True)
+        self.bulk_write(Ticket, tickets, unique_fields=['event', 'seat_number'], ignore_conflicts=True)
+
+        # Bulk writes skip the signals that maintain these
+        from analytics.cache import dashboard_cache
+        from analytics.services import AnalyticsService
+        event_ids = [event.pk for event in inserted]
+        EventInventory.rebuild(event_ids)
+        AnalyticsService.refresh_event_analytics(event_ids)
+        for event_pk in set(keys.values()) - set(event_ids):
+            dashboard_cache.bump(event_pk)
+        return written
+
+    @staticmethod
+    def sample_tickets(event, num_tickets, tier=None):
+        """Unsaved sample tickets for a new event, priced at the given tier"""
+        return list(TicketInventoryService.build_tickets(event, num_tickets, tier=tier))
+
+    # Fan interactions
+
+    def import_fan_interactions_chunk(self, df):
+        now = timezone.now()
+        timestamps = pd.to_datetime(column(df, 'timestamp'), errors='coerce')
+        interactions = []
+        for idx, fan_id, track_id, interaction_type, timestamp in zip(
+            df.index, column(df, 'fan_id'), column(df, 'track_id'),
+            column(df, 'type_of_interaction', 'play').str.lower(), timestamps
+        ):
+            fan = self.fan_ids.get(fan_id)
+            track_pk = self.track_ids.get(track_id)
+            if not fan:
+                self.reject(df, idx, f'Unknown fan_id {fan_id!r}')
+                continue
+            if not track_pk:
+                self.reject(df, idx, f'Unknown track_id {track_id!r}')
+                continue
+            if pd.isna(timestamp):
+                timestamp = now
+            else:
+                timestamp = timestamp.to_pydatetime()
+                if timezone.is_naive(timestamp):
+                    timestamp = timezone.make_aware(timestamp)
+            interactions.append(FanInteraction(
+                fan_id=fan[0],
+                track_id=track_pk,
+                timestamp=timestamp,
+                interaction_type=self.INTERACTION_TYPES.get(interaction_type, 'play'),
+                device_type='web',
+                location=fan[1]
+            ))
+        return self.bulk_write(
+            FanInteraction, interactions,
+            unique_fields=['fan', 'track', 'timestamp', 'interaction_type'],
+            ignore_conflicts=True
+        )
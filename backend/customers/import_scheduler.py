@@ -0,0 +1,184 @@
+"""
+Dependency-aware scheduling of the DataImporter stages.
+
+Files are parsed inline by the stage loading them by default. With workers,
+they are parsed in a process pool as soon as the import starts, since that
+is CPU-bound pandas work that does not touch the database; each parser hands
+its batches to the loader through a queue of QUEUED_BATCHES, so memory stays
+bounded by the batch size as when parsing inline. Loading follows
+the DAG declared in DataImporter.STAGES: a stage starts once the stages it
+references have committed, so fans load alongside the artist/album/track
+chain. Stages are parsed and loaded level by level of the DAG, largest
+file first, so the fans parser does not wait behind the track parses. Every chunk commits on its own, so stages that completed stay
+committed when another one fails.
+"""
+import os
+import queue
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from multiprocessing import Manager
+from django.db import connection
+
+from .import_sources import stream_batches
+
+
+class ImportStageError(Exception):
+    """Raised when one or more import stages failed"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join(f'{entity}: {error}' for entity, error in errors.items()))
+
+
+class ImportScheduler:
+    """Runs a DataImporter's stages with parallel parsing and concurrent loading"""
+
+    # Parsed batches a parser process may be ahead of its loader
+    QUEUED_BATCHES = 2
+
+    def __init__(self, importer, workers=0, parallel=None):
+        self.importer = importer
+        self.stages = {entity: (file_name, dependencies) for entity, file_name, dependencies in importer.STAGES}
+        # Parser processes; 0 parses inline while loading
+        self.workers = min(workers, len(self.stages))
+        self.parsers = {}
+        # SQLite allows a single writer, so stages are loaded one at a time there
+        self.parallel = connection.vendor != 'sqlite' if parallel is None else parallel
+
+    def order(self):
+        """
+        Stages in a dependency-respecting order: by depth in the DAG, so stages
+        that can load together come together, then the largest file first.
+        """
+        depths = {}
+        visiting = set()
+
+        def depth(entity):
+            if entity not in depths:
+                if entity in visiting:
+                    raise ValueError(f'Import stages have a dependency cycle through {entity}')
+                visiting.add(entity)
+                depths[entity] = 1 + max((depth(dependency) for dependency in self.stages[entity][1]), default=-1)
+                visiting.discard(entity)
+            return depths[entity]
+
+        return sorted(self.stages, key=lambda entity: (depth(entity), -self.expected_cost(entity)))
+
+    def expected_cost(self, entity):
+        """Size of a stage's file, as a guide to how long it parses and loads"""
+        path = self.importer.path(self.stages[entity][0])
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def run(self):
+        """Import every stage; raises ImportStageError if any stage failed"""
+        if not self.workers:
+            return self.load_stages()
+
+        with Manager() as manager:
+            pool = ProcessPoolExecutor(max_workers=self.workers)
+            try:
+                # Submitted in load order, so a parser only ever waits on a loader that is running or next,
+                # and a stage's parser never queues behind those of stages that load after it
+                for entity in self.order():
+                    path = self.importer.path(self.stages[entity][0])
+                    if os.path.exists(path):
+                        batches, stop = manager.Queue(self.QUEUED_BATCHES), manager.Event()
+                        future = pool.submit(stream_batches, path, self.importer.chunk_size, batches, stop)
+                        self.parsers[entity] = (future, batches, stop)
+                return self.load_stages()
+            finally:
+                for _, _, stop in self.parsers.values():
+                    stop.set()
+                pool.shutdown(cancel_futures=True)
+                self.parsers = {}
+
+    def load_stages(self):
+        if self.parallel:
+            errors = self.run_concurrently()
+        else:
+            errors = self.run_sequentially()
+        if errors:
+            raise ImportStageError(errors)
+        return self.importer.stats
+
+    def parsed_batches(self, entity):
+        """The batches of a stage's parser process, as they arrive"""
+        future, batches, _ = self.parsers[entity]
+        while True:
+            try:
+                batch = batches.get(timeout=1)
+            except queue.Empty:
+                if future.done():
+                    # The parser died without reaching the end of the file
+                    future.result()
+                    raise RuntimeError(f'{entity} parser stopped before the end of the file')
+                continue
+            if batch is None:
+                return
+            if isinstance(batch, Exception):
+                raise batch
+            yield batch
+
+    def load_stage(self, entity):
+        """Load one stage"""
+        file_name = self.stages[entity][0]
+        try:
+            batches = self.parsed_batches(entity) if entity in self.parsers else None
+            self.importer.import_file(entity, file_name, batches)
+        finally:
+            self.stop_parser(entity)
+
+    def stop_parser(self, entity):
+        """Let a stage's parser process go once nothing reads its batches"""
+        if entity in self.parsers:
+            self.parsers[entity][2].set()
+
+    def run_sequentially(self):
+        errors = {}
+        for entity in self.order():
+            failed = [dependency for dependency in self.stages[entity][1] if dependency in errors]
+            if failed:
+                errors[entity] = f'skipped, {", ".join(failed)} failed'
+                self.stop_parser(entity)
+                continue
+            try:
+                self.load_stage(entity)
+            except Exception as e:
+                errors[entity] = e
+        return errors
+
+    def run_concurrently(self):
+        def load_in_thread(entity):
+            try:
+                self.load_stage(entity)
+            finally:
+                # Each loader thread has its own database connection
+                connection.close()
+
+        errors = {}
+        done = set()
+        pending = set(self.stages)
+        running = {}
+        with ThreadPoolExecutor(max_workers=len(self.stages)) as threads:
+            while pending or running:
+                for entity in [entity for entity in self.order() if entity in pending]:
+                    dependencies = self.stages[entity][1]
+                    failed = [dependency for dependency in dependencies if dependency in errors]
+                    if failed:
+                        pending.discard(entity)
+                        errors[entity] = f'skipped, {", ".join(failed)} failed'
+                        self.stop_parser(entity)
+                    elif all(dependency in done for dependency in dependencies):
+                        pending.discard(entity)
+                        running[threads.submit(load_in_thread, entity)] = entity
+                if not running:
+                    continue
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    entity = running.pop(future)
+                    try:
+                        future.result()
+                        done.add(entity)
+                    except Exception as e:
+                        errors[entity] = e
+        return errors
@@ -0,0 +1,134 @@
+"""
+Streaming readers for import files.
+
+The export files are named .xlsx whether they are real workbooks or CSV, so
+the format is sniffed from the file header. Both readers yield DataFrames of
+at most batch_size rows with every value as text ('' for empty cells), so the
+importers parse values the same way whatever the source, and memory stays
+bounded by the batch size rather than the file size.
+"""
+import hashlib
+import queue
+from datetime import date, datetime
+import pandas as pd
+
+
+ZIP_MAGIC = b'PK\x03\x04'  # .xlsx workbooks are zip archives
+OLE_MAGIC = b'\xd0\xcf\x11\xe0'  # legacy .xls workbooks
+
+
+def sniff_format(path):
+    """Return 'xlsx', 'xls' or 'csv' from the first bytes of a file"""
+    with open(path, 'rb') as f:
+        header = f.read(4)
+    if header == ZIP_MAGIC:
+        return 'xlsx'
+    if header == OLE_MAGIC:
+        return 'xls'
+    return 'csv'
+
+
+def file_hash(path, block_size=1 << 20):
+    """SHA-256 of a file's content, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CSVSource:
+    """Reads a CSV file in chunks through pandas"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def batches(self, batch_size):
+        yield from pd.read_csv(self.path, chunksize=batch_size, dtype=str, keep_default_na=False)
+
+
+class XLSXSource:
+    """Reads the first sheet of a workbook row by row with openpyxl in read-only mode"""
+
+    def __init__(self, path):
+        self.path = path
+
+    @staticmethod
+    def to_text(value):
+        if value is None:
+            return ''
+        if isinstance(value, datetime):
+            return value.isoformat(sep=' ')
+        if isinstance(value, date):
+            return value.isoformat()
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
+
+    def batches(self, batch_size):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = [self.to_text(name).strip() for name in header]
+
+            batch = []
+            start = 0
+            for row in rows:
+                if not any(value is not None for value in row):
+                    continue
+                values = [self.to_text(value) for value in row[:len(columns)]]
+                batch.append(values + [''] * (len(columns) - len(values)))
+                if len(batch) >= batch_size:
+                    yield self.frame(batch, columns, start)
+                    start += len(batch)
+                    batch = []
+            if batch:
+                yield self.frame(batch, columns, start)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def frame(batch, columns, start):
+        """Build a batch DataFrame indexed by row number like the CSV reader"""
+        return pd.DataFrame(batch, columns=columns, index=range(start, start + len(batch)), dtype=str)
+
+
+def open_source(path):
+    """The streaming reader matching a file's real format"""
+    file_format = sniff_format(path)
+    if file_format == 'xlsx':
+        return XLSXSource(path)
+    if file_format == 'xls':
+        raise ValueError(f'{path} is a legacy .xls workbook; save it as .xlsx or CSV to import it')
+    return CSVSource(path)
+
+
+def stream_batches(path, batch_size, batches, stop):
+    """
+    Parse a file onto the bounded batches queue, ending with None; runs in
+    the import scheduler's process pool. A parse error is put on the queue
+    in place of the end marker. Gives up once stop is set, which the
+    scheduler does when it no longer reads the queue.
+    """
+    def put(item):
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        for batch in open_source(path).batches(batch_size):
+            if not put(batch):
+                return
+    except Exception as e:
+        put(e)
+        return
+    put(None)
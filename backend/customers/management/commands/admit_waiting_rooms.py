@@ -0,0 +1,35 @@
+"""
+Django management command to admit queued customers from event waiting rooms
+Usage: python manage.py admit_waiting_rooms [--loop --interval 1]
+"""
+import time
+from django.core.management.base import BaseCommand
+
+from customers.services import WaitingRoomService
+
+
+class Command(BaseCommand):
+    help = 'Admit waiting customers at each room\'s rate and expire unused admission tokens'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep admitting every --interval seconds instead of running once'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1,
+            help='Seconds between admission rounds in --loop mode (default: 1)'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            admitted, expired = WaitingRoomService.admit_all()
+            if admitted or expired or not options['loop']:
+                self.stdout.write(f'Admitted {admitted} customers and expired {expired} admission tokens')
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,211 @@
+"""
+Django management command to benchmark booking throughput under contention
+Usage: python manage.py benchmark_booking --workers 32 --tickets 2000 --per-booking 2 [--pricing-mode both]
+"""
+import random
+import statistics
+import threading
+import time as timer
+from concurrent.futures import ThreadPoolExecutor
+from datetime import time, timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from django.db import connection, OperationalError
+from django.db.models import Count
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from events.models import EventType, Venue, Event, EventInventory
+from customers.models import Customer, Ticket, Booking
+from customers.services import BookingService, TicketsUnavailableError
+from pricing.services import DynamicPricingService
+
+
+class Command(BaseCommand):
+    help = 'Drive N concurrent booking workers against a single event and report throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=16, help='Number of concurrent workers')
+        parser.add_argument('--tickets', type=int, default=1000, help='Tickets on sale for the event')
+        parser.add_argument('--per-booking', type=int, default=2, help='Tickets requested per booking')
+        parser.add_argument(
+            '--pricing-mode',
+            choices=['immediate', 'coalesced', 'both'],
+            default=getattr(settings, 'PRICING_REPRICE_MODE', 'coalesced'),
+            help='Repricing strategy to benchmark; "both" compares them'
+        )
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark data afterwards')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        ticket_count = options['tickets']
+        per_booking = options['per_booking']
+        modes = ['immediate', 'coalesced'] if options['pricing_mode'] == 'both' else [options['pricing_mode']]
+
+        throughput = {}
+        for mode in modes:
+            with override_settings(PRICING_REPRICE_MODE=mode):
+                event, customers = self.create_fixture(ticket_count, per_booking, workers)
+                self.stdout.write(
+                    f'Benchmarking {workers} workers against "{event.name}" '
+                    f'({ticket_count} tickets, {per_booking} per booking, {mode} repricing)...'
+                )
+
+                try:
+                    results = self.run(event, customers, workers, per_booking)
+                    throughput[mode] = self.report(event, results)
+                finally:
+                    if not options['keep']:
+                        self.cleanup(event, customers)
+
+        if len(throughput) > 1:
+            self.stdout.write(
+                f'Coalesced repricing: {throughput["coalesced"]:.1f} bookings/sec vs '
+                f'{throughput["immediate"]:.1f} bookings/sec immediate '
+                f'({throughput["coalesced"] / throughput["immediate"]:.2f}x)'
+            )
+
+    def create_fixture(self, ticket_count, per_booking, workers):
+        """Create a throwaway event, its tickets and enough customers to sell it out"""
+        stamp = timezone.now().strftime('%Y%m%d%H%M%S%f')
+        event_type, _ = EventType.objects.get_or_create(
+            name='Concert',
+            defaults={'description': 'Live concert performance'}
+        )
+        venue = Venue.objects.create(
+            name=f'Benchmark Arena {stamp}',
+            location='Benchmark',
+            address='Benchmark',
+            city='Benchmark',
+            state='Benchmark',
+            capacity=ticket_count
+        )
+        event = Event.objects.create(
+            name=f'Booking Benchmark {stamp}',
+            date=timezone.now().date() + timedelta(days=30),
+            start_time=time(20, 0),
+            end_time=time(23, 0),
+            venue=venue,
+            event_type=event_type,
+            ticket_price=Decimal('100.00'),
+            max_tickets_per_customer=per_booking
+        )
+        manager = User.objects.create(username=f'bench_{stamp}_manager')
+        DynamicPricingService.create_default_price_tiers(event, manager, event.ticket_price)
+        Ticket.objects.bulk_create([
+            Ticket(
+                event=event,
+                seat_number=f'B-{seat:06d}',
+                section='Benchmark',
+                base_price=event.ticket_price,
+                final_price=event.ticket_price
+            )
+            for seat in range(1, ticket_count + 1)
+        ], batch_size=1000)
+        EventInventory.rebuild([event.id])
+
+        customer_count = ticket_count // per_booking + workers
+        User.objects.bulk_create([
+            User(username=f'bench_{stamp}_{i}', email=f'bench_{stamp}_{i}@example.com')
+            for i in range(customer_count)
+        ], batch_size=1000)
+        users = User.objects.filter(username__startswith=f'bench_{stamp}_')
+        Customer.objects.bulk_create([Customer(user=user) for user in users], batch_size=1000)
+        customers = list(Customer.objects.filter(user__username__startswith=f'bench_{stamp}_'))
+        return event, customers
+
+    def run(self, event, customers, workers, per_booking):
+        """Run the workers until the event is sold out"""
+        random.shuffle(customers)
+        pools = [customers[i::workers] for i in range(workers)]
+
+        def worker(pool):
+            latencies = []
+            retries = 0
+            try:
+                for customer in pool:
+                    while True:
+                        started = timer.perf_counter()
+                        try:
+                            BookingService.create_booking(customer, event, quantity=per_booking)
+                        except TicketsUnavailableError:
+                            return latencies, retries
+                        except OperationalError:
+                            # SQLite reports write contention as "database is locked"
+                            retries += 1
+                            continue
+                        latencies.append(timer.perf_counter() - started)
+                        break
+                return latencies, retries
+            finally:
+                connection.close()
+
+        done = threading.Event()
+
+        def repricer():
+            # Stands in for the reprice_events worker in coalesced mode
+            try:
+                while not done.wait(1):
+                    DynamicPricingService.reprice_dirty_events()
+                DynamicPricingService.reprice_dirty_events(min_interval=timedelta(0))
+            finally:
+                connection.close()
+
+        repricer_thread = threading.Thread(target=repricer)
+        if settings.PRICING_REPRICE_MODE == 'coalesced':
+            repricer_thread.start()
+
+        started = timer.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(executor.map(worker, pools))
+        elapsed = timer.perf_counter() - started
+
+        done.set()
+        if repricer_thread.is_alive():
+            repricer_thread.join()
+
+        latencies = [latency for worker_latencies, _ in outcomes for latency in worker_latencies]
+        retries = sum(worker_retries for _, worker_retries in outcomes)
+        return {'elapsed': elapsed, 'latencies': latencies, 'retries': retries}
+
+    def report(self, event, results):
+        """Print throughput and verify that nothing was oversold"""
+        latencies = sorted(results['latencies'])
+        elapsed = results['elapsed']
+        bookings = len(latencies)
+
+        booked_tickets = Ticket.objects.filter(event=event, status='booked').count()
+        linked_tickets = Booking.tickets.through.objects.filter(booking__event=event).count()
+        double_booked = Booking.tickets.through.objects.filter(
+            booking__event=event
+        ).values('ticket_id').annotate(n=Count('id')).filter(n__gt=1).count()
+
+        self.stdout.write(f'  Bookings:          {bookings}')
+        self.stdout.write(f'  Elapsed:           {elapsed:.2f}s')
+        self.stdout.write(f'  Throughput:        {bookings / elapsed:.1f} bookings/sec')
+        if latencies:
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            self.stdout.write(f'  Latency p50 / p95: {statistics.median(latencies) * 1000:.1f}ms / {p95 * 1000:.1f}ms')
+        self.stdout.write(f'  Lock retries:      {results["retries"]}')
+
+        if double_booked or booked_tickets != linked_tickets:
+            self.stdout.write(self.style.ERROR(
+                f'✗ Oversold: {booked_tickets} booked tickets, {linked_tickets} booking links, '
+                f'{double_booked} seats in more than one booking'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✓ No oversell ({booked_tickets} tickets booked)'))
+
+        return bookings / elapsed
+
+    def cleanup(self, event, customers):
+        """Remove the benchmark fixture"""
+        venue = event.venue
+        User.objects.filter(customer_profile__in=customers).delete()
+        User.objects.filter(created_price_tiers__event=event).delete()
+        # Through the queryset, so the counters are adjusted once rather than per ticket
+        event.tickets.all().delete()
+        event.delete()
+        venue.delete()
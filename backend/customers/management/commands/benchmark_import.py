@@ -0,0 +1,135 @@
+"""
+Django management command to benchmark bulk loading of fan interactions
+Usage: python manage.py benchmark_import --interactions 1000000 [--loader both] [--chunk-size 50000]
+"""
+import time as timer
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from artists.models import Genre, Artist, Album, Track
+from customers.import_engine import ImportEngine, LOADERS
+from customers.models import Customer, FanInteraction
+
+
+class InteractionLoader(ImportEngine):
+    """Engine that routes fan interactions through COPY in copy mode"""
+    COPY_MODELS = (FanInteraction,)
+
+
+class Command(BaseCommand):
+    help = 'Load N synthetic fan interactions through the ORM and COPY loaders and report rows/sec'
+
+    INTERACTION_TYPES = ['play', 'like', 'share', 'playlist_add', 'download']
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interactions', type=int, default=1000000, help='Interactions to load')
+        parser.add_argument('--fans', type=int, default=1000, help='Fans the interactions are spread over')
+        parser.add_argument('--tracks', type=int, default=1000, help='Tracks the interactions are spread over')
+        parser.add_argument('--chunk-size', type=int, default=50000, help='Rows written per chunk')
+        parser.add_argument(
+            '--loader',
+            choices=LOADERS + ['both'],
+            default='both',
+            help='Loader to benchmark; "both" compares them'
+        )
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark data afterwards')
+
+    def handle(self, *args, **options):
+        loaders = LOADERS if options['loader'] == 'both' else [options['loader']]
+        if 'copy' in loaders and connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(
+                f'! COPY needs PostgreSQL; the copy run falls back to batched inserts on {connection.vendor}'
+            ))
+
+        fan_ids, track_ids, stamp = self.create_fixture(options['fans'], options['tracks'])
+        throughput = {}
+        try:
+            for loader in loaders:
+                FanInteraction.objects.filter(fan_id__in=fan_ids).delete()
+                self.stdout.write(
+                    f'Loading {options["interactions"]} interactions with the {loader} loader '
+                    f'({options["chunk_size"]} rows per chunk)...'
+                )
+                throughput[loader] = self.run(
+                    loader, fan_ids, track_ids, options['interactions'], options['chunk_size']
+                )
+        finally:
+            if not options['keep']:
+                self.cleanup(fan_ids, stamp)
+
+        if len(throughput) > 1:
+            self.stdout.write(
+                f'COPY loader: {throughput["copy"]:.0f} rows/sec vs {throughput["orm"]:.0f} rows/sec ORM '
+                f'({throughput["copy"] / throughput["orm"]:.2f}x)'
+            )
+
+    def create_fixture(self, fan_count, track_count):
+        """Create throwaway fans and tracks to attach the interactions to"""
+        stamp = timezone.now().strftime('%Y%m%d%H%M%S%f')
+        genre = Genre.objects.create(name=f'Benchmark {stamp}')
+        artist = Artist.objects.create(name=f'Benchmark Artist {stamp}', genre=genre)
+        album = Album.objects.create(artist=artist, album_name='Benchmark', release_date=timezone.now().date())
+        Track.objects.bulk_create([
+            Track(album=album, track_number=number, track_name=f'Track {number}', duration_ms=180000)
+            for number in range(1, track_count + 1)
+        ], batch_size=1000)
+        User.objects.bulk_create([
+            User(username=f'import_bench_{stamp}_{i}', email=f'import_bench_{stamp}_{i}@example.com')
+            for i in range(fan_count)
+        ], batch_size=1000)
+        users = User.objects.filter(username__startswith=f'import_bench_{stamp}_')
+        Customer.objects.bulk_create([Customer(user=user) for user in users], batch_size=1000)
+
+        fan_ids = list(Customer.objects.filter(user__in=users).values_list('id', flat=True))
+        track_ids = list(album.tracks.values_list('id', flat=True))
+        return fan_ids, track_ids, stamp
+
+    def interactions(self, fan_ids, track_ids, count, chunk_size):
+        """Yield chunks of unique synthetic interactions"""
+        started = timezone.now() - timedelta(seconds=count)
+        for offset in range(0, count, chunk_size):
+            yield [
+                FanInteraction(
+                    fan_id=fan_ids[i % len(fan_ids)],
+                    track_id=track_ids[(i * 7) % len(track_ids)],
+                    interaction_type=self.INTERACTION_TYPES[i % len(self.INTERACTION_TYPES)],
+                    timestamp=started + timedelta(seconds=i),
+                    device_type='web'
+                )
+                for i in range(offset, min(offset + chunk_size, count))
+            ]
+
+    def run(self, loader, fan_ids, track_ids, count, chunk_size):
+        """Load the interactions chunk by chunk and report write throughput"""
+        engine = InteractionLoader(chunk_size=chunk_size, batch_size=min(chunk_size, 5000), loader=loader)
+        write_seconds = 0.0
+        started = timer.perf_counter()
+        with transaction.atomic():
+            for chunk in self.interactions(fan_ids, track_ids, count, chunk_size):
+                chunk_started = timer.perf_counter()
+                engine.bulk_write(
+                    FanInteraction, chunk,
+                    unique_fields=['fan', 'track', 'timestamp', 'interaction_type'],
+                    ignore_conflicts=True
+                )
+                write_seconds += timer.perf_counter() - chunk_started
+        elapsed = timer.perf_counter() - started
+
+        loaded = FanInteraction.objects.filter(fan_id__in=fan_ids).count()
+        self.stdout.write(f'  Loaded:            {loaded} rows')
+        self.stdout.write(f'  Elapsed:           {elapsed:.2f}s ({write_seconds:.2f}s writing)')
+        self.stdout.write(f'  Throughput:        {count / write_seconds:.0f} rows/sec written')
+        if loaded != count:
+            self.stdout.write(self.style.ERROR(f'✗ Expected {count} rows, found {loaded}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✓ All {count} interactions loaded'))
+        return count / write_seconds
+
+    def cleanup(self, fan_ids, stamp):
+        """Remove the benchmark fixture"""
+        FanInteraction.objects.filter(fan_id__in=fan_ids).delete()
+        User.objects.filter(username__startswith=f'import_bench_{stamp}_').delete()
+        Genre.objects.filter(name=f'Benchmark {stamp}').delete()
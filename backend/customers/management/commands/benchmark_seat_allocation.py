@@ -0,0 +1,106 @@
+"""
+Django management command to benchmark the best available seat allocator on fragmented seat maps
+Usage: python manage.py benchmark_seat_allocation --capacity 50000 --iterations 2000 [--event 1]
+"""
+import random
+import statistics
+import time as timer
+from django.core.management.base import BaseCommand
+
+from customers.services import SeatMapService, SeatAllocationService, TicketInventoryService
+
+
+class Command(BaseCommand):
+    help = 'Time best available seat searches over seat maps with fragmented availability'
+
+    PATTERNS = ['scattered', 'checkerboard', 'pairs', 'front_sold', 'nearly_sold_out']
+
+    def add_arguments(self, parser):
+        parser.add_argument('--capacity', type=int, default=50000, help='Seats of the synthetic venue')
+        parser.add_argument('--seats-per-row', type=int, default=TicketInventoryService.SEATS_PER_ROW)
+        parser.add_argument('--rows-per-section', type=int, default=TicketInventoryService.ROWS_PER_SECTION)
+        parser.add_argument('--iterations', type=int, default=2000, help='Searches per pattern and block size')
+        parser.add_argument(
+            '--quantities',
+            nargs='+',
+            type=int,
+            default=[1, 2, 4, 6, 8],
+            help='Block sizes to search for'
+        )
+        parser.add_argument('--event', type=int, help='Also benchmark the seat map of this event')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.stdout.write(
+            f'Benchmarking {options["iterations"]} searches per case on {options["capacity"]} seats...'
+        )
+
+        for pattern in self.PATTERNS:
+            sections = self.seat_map(
+                options['capacity'], options['seats_per_row'], options['rows_per_section'], pattern, rng
+            )
+            self.benchmark(pattern, sections, options['quantities'], options['iterations'])
+
+        if options['event']:
+            sections = SeatMapService.sections(options['event'])
+            self.benchmark(f'event {options["event"]}', sections, options['quantities'], options['iterations'])
+
+    def seat_map(self, capacity, seats_per_row, rows_per_section, pattern, rng):
+        """Build an in-memory seat map shaped like generate_tickets output with the given availability"""
+        seats_per_section = seats_per_row * rows_per_section
+        sections = {}
+        for first in range(0, capacity, seats_per_section):
+            seats = min(seats_per_section, capacity - first)
+            full_rows, last_row = divmod(seats, seats_per_row)
+            rows = [[TicketInventoryService.label(row), seats_per_row] for row in range(full_rows)]
+            if last_row:
+                rows.append([TicketInventoryService.label(full_rows), last_row])
+
+            bits = 0
+            for position in range(seats):
+                if self.is_available(pattern, position, seats_per_row, rows_per_section, rng):
+                    bits |= 1 << position
+            sections[f'Section {TicketInventoryService.label(len(sections))}'] = {
+                'rows': rows,
+                'unnumbered': [],
+                'seats': seats,
+                'available': bits.bit_count(),
+                'bitmap': bits.to_bytes((seats + 7) // 8, 'little'),
+                'row_starts': SeatMapService.row_starts(rows, []),
+            }
+        return sections
+
+    @staticmethod
+    def is_available(pattern, position, seats_per_row, rows_per_section, rng):
+        row, seat = divmod(position, seats_per_row)
+        if pattern == 'scattered':
+            return rng.random() < 0.35
+        if pattern == 'checkerboard':
+            return (row + seat) % 2 == 0
+        if pattern == 'pairs':
+            # Free pairs separated by a sold seat: nothing larger than 2 fits
+            return seat % 3 != 2
+        if pattern == 'front_sold':
+            return row >= rows_per_section * 3 // 4 and rng.random() < 0.8
+        return rng.random() < 0.01
+
+    def benchmark(self, label, sections, quantities, iterations):
+        """Time best_available for each block size and print the latency distribution"""
+        seats = sum(data['seats'] for data in sections.values())
+        available = sum(data['available'] for data in sections.values())
+        self.stdout.write(f'  {label} ({available}/{seats} seats available, {len(sections)} sections):')
+
+        for quantity in quantities:
+            latencies = []
+            for _ in range(iterations):
+                started = timer.perf_counter()
+                found = SeatAllocationService.best_available(sections, quantity)
+                latencies.append(timer.perf_counter() - started)
+            latencies.sort()
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            outcome = f'{found[0]} @ {found[1]}' if found else 'no block'
+            self.stdout.write(
+                f'    {quantity} seats: median {statistics.median(latencies) * 1e6:.1f}us, '
+                f'p99 {p99 * 1e6:.1f}us ({outcome})'
+            )
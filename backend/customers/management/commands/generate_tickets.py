@@ -0,0 +1,76 @@
+"""
+Django management command to generate the seat inventory of events
+Usage: python manage.py generate_tickets [--events 1 2 3 | --without-tickets] [--capacity 50000] [--seats-per-row 25]
+"""
+import time
+from django.core.management.base import BaseCommand
+
+from events.models import Event
+from customers.services import TicketInventoryService
+
+
+class Command(BaseCommand):
+    help = 'Create the tickets of every seat of the given events with bulk inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--events',
+            nargs='+',
+            type=int,
+            help='Event IDs to generate tickets for'
+        )
+        parser.add_argument(
+            '--without-tickets',
+            action='store_true',
+            help='Generate tickets for every event that has none yet'
+        )
+        parser.add_argument(
+            '--capacity',
+            type=int,
+            help='Seats per event (default: the venue capacity)'
+        )
+        parser.add_argument(
+            '--seats-per-row',
+            type=int,
+            default=TicketInventoryService.SEATS_PER_ROW,
+            help=f'Seats in each row (default: {TicketInventoryService.SEATS_PER_ROW})'
+        )
+        parser.add_argument(
+            '--rows-per-section',
+            type=int,
+            default=TicketInventoryService.ROWS_PER_SECTION,
+            help=f'Rows in each section (default: {TicketInventoryService.ROWS_PER_SECTION})'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=TicketInventoryService.CHUNK_SIZE,
+            help=f'Tickets built and inserted per chunk (default: {TicketInventoryService.CHUNK_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        if options['events']:
+            events = Event.objects.filter(id__in=options['events'])
+        elif options['without_tickets']:
+            events = Event.objects.filter(tickets__isnull=True)
+        else:
+            self.stdout.write(self.style.ERROR('Pass --events or --without-tickets'))
+            return
+
+        total = 0
+        for event in events.select_related('venue'):
+            started = time.perf_counter()
+            created = TicketInventoryService.generate_inventory(
+                event,
+                capacity=options['capacity'],
+                seats_per_row=options['seats_per_row'],
+                rows_per_section=options['rows_per_section'],
+                chunk_size=options['chunk_size']
+            )
+            elapsed = time.perf_counter() - started
+            total += created
+            self.stdout.write(self.style.SUCCESS(
+                f'  ✓ {event.name}: {created} tickets created in {elapsed:.2f}s'
+            ))
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Created {total} tickets'))
@@ -0,0 +1,26 @@
+"""
+Django management command to delete stored responses of old idempotent booking requests
+Usage: python manage.py prune_idempotency_records [--hours 24]
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from customers.services import IdempotencyService
+
+
+class Command(BaseCommand):
+    help = 'Delete idempotency records older than the retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=getattr(settings, 'IDEMPOTENCY_RETENTION_HOURS', 24),
+            help='Keep records created within this many hours'
+        )
+
+    def handle(self, *args, **options):
+        deleted = IdempotencyService.prune(timezone.now() - timedelta(hours=options['hours']))
+        self.stdout.write(self.style.SUCCESS(f'✓ Deleted {deleted} idempotency records'))
@@ -0,0 +1,40 @@
+"""
+Django management command to reclaim seats from expired checkout holds
+Usage: python manage.py release_expired_holds [--loop --interval 30]
+"""
+import time
+from django.core.management.base import BaseCommand
+
+from customers.services import SeatHoldService
+
+
+class Command(BaseCommand):
+    help = 'Release the seats of expired ticket holds in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep sweeping every --interval seconds instead of running once'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=30,
+            help='Seconds between sweeps in --loop mode (default: 30)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Holds reclaimed per transaction (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            holds, tickets = SeatHoldService.release_expired_holds(batch_size=options['batch_size'])
+            self.stdout.write(f'Expired {holds} holds and released {tickets} tickets')
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
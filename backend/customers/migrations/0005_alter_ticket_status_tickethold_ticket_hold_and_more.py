@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0004_alter_booking_options_alter_feedback_options_and_more'),
+        ('events', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ticket',
+            name='status',
+            field=models.CharField(choices=[('available', 'Available'), ('held', 'Held'), ('booked', 'Booked'), ('cancelled', 'Cancelled'), ('expired', 'Expired')], default='available', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='TicketHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('active', 'Active'), ('converted', 'Converted'), ('released', 'Released'), ('expired', 'Expired')], default='active', max_length=20)),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ticket_holds', to='customers.customer')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ticket_holds', to='events.event')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='hold',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tickets', to='customers.tickethold'),
+        ),
+        migrations.AddIndex(
+            model_name='tickethold',
+            index=models.Index(fields=['status', 'expires_at'], name='customers_t_status_56a969_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tickethold',
+            index=models.Index(fields=['customer', 'event', 'status'], name='customers_t_custome_b795bf_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0005_alter_ticket_status_tickethold_ticket_hold_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data_dir', models.CharField(max_length=500)),
+                ('loader', models.CharField(default='orm', max_length=20)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('error', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['data_dir', 'status'], name='customers_i_data_di_702337_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(max_length=50)),
+                ('file_name', models.CharField(max_length=255)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('rows_done', models.PositiveIntegerField(default=0, help_text='Data rows of the file already committed')),
+                ('rows_written', models.PositiveIntegerField(default=0)),
+                ('completed', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='customers.importrun')),
+            ],
+            options={
+                'unique_together': {('run', 'entity')},
+            },
+        ),
+        migrations.CreateModel(
+            name='QuarantinedRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(max_length=50)),
+                ('file_name', models.CharField(max_length=255)),
+                ('row_index', models.PositiveIntegerField(help_text='Position among the data rows of the file')),
+                ('data', models.JSONField(default=dict)),
+                ('reason', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quarantined_rows', to='customers.importrun')),
+            ],
+            options={
+                'ordering': ['run', 'entity', 'row_index'],
+                'indexes': [models.Index(fields=['run', 'entity'], name='customers_q_run_id_7f1b27_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0007_customer_external_id_customer_source_hash'),
+        ('events', '0003_event_external_id_event_source_hash'),
+        ('pricing', '0002_eventpricingstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='row',
+            field=models.CharField(blank=True, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='seat_index',
+            field=models.PositiveIntegerField(blank=True, help_text='Position of the seat in its row, from 1', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['event', 'section', 'row', 'seat_index'], name='customers_t_event_i_462cad_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0008_ticket_row_ticket_seat_index_and_more'),
+        ('events', '0003_event_external_id_event_source_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SectionAvailability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('section', models.CharField(blank=True, max_length=50)),
+                ('rows', models.JSONField(default=list, help_text='[row, seats] pairs in bitmap order')),
+                ('unnumbered', models.JSONField(default=list, help_text='Seat numbers of tickets without a row position')),
+                ('seats', models.PositiveIntegerField(default=0)),
+                ('available', models.PositiveIntegerField(default=0)),
+                ('bitmap', models.BinaryField(default=b'')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_maps', to='events.event')),
+            ],
+            options={
+                'unique_together': {('event', 'section')},
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:45
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0009_sectionavailability'),
+        ('events', '0003_event_external_id_event_source_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitingRoom',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_active', models.BooleanField(default=True, help_text='Bookings and holds need an admission token while active')),
+                ('admit_per_minute', models.PositiveIntegerField(default=60)),
+                ('admission_ttl_seconds', models.PositiveIntegerField(default=600, help_text='How long an admission token stays valid')),
+                ('last_admission_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='waiting_room', to='events.event')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QueueEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('priority', models.IntegerField(default=0, help_text='Higher priorities are admitted first')),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('admitted', 'Admitted'), ('used', 'Used'), ('expired', 'Expired')], default='waiting', max_length=20)),
+                ('token', models.CharField(max_length=64, unique=True)),
+                ('joined_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('admitted_at', models.DateTimeField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='queue_entries', to='customers.customer')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='customers.waitingroom')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['room', 'status', '-priority', 'joined_at'], name='customers_q_room_id_c16be6_idx'), models.Index(fields=['status', 'expires_at'], name='customers_q_status_fb61d7_idx')],
+                'unique_together': {('room', 'customer')},
+            },
+        ),
+    ]
@@ -1,5 +1,7 @@
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 
@@ -11,6 +13,8 @@ class Customer(models.Model):
     
     # Fields from Excel (Fans table)
     country = models.CharField(max_length=100, blank=True)
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True, help_text='fan_id of the import files')
+    source_hash = models.CharField(max_length=32, blank=True, help_text='Hash of the import row, to skip unchanged rows')
     
     preferred_genres = models.ManyToManyField('artists.Genre', blank=True)
     preferred_artists = models.ManyToManyField('artists.Artist', blank=True)
@@ -29,10 +33,40 @@ class Customer(models.Model):
         ]
 
 
+class TicketQuerySet(models.QuerySet):
+    """
+    Ticket queries; bulk deletes update the event counters per event rather than per ticket.
+
+    The per-ticket post_delete handler only acts on single-ticket deletes,
+    so it leaves the counters of a queryset delete to delete() below.
+    """
+
+    def delete(self):
+        from events.models import EventInventory
+        from .services import SeatMapService
+
+        with transaction.atomic(using=self.db):
+            counts = {}
+            for event_id, status in self.select_for_update().values_list('event_id', 'status'):
+                statuses = counts.setdefault(event_id, {})
+                statuses[status] = statuses.get(status, 0) - 1
+
+            deleted = super().delete()
+
+            for event_id, statuses in counts.items():
+                EventInventory.adjust(event_id, total=sum(statuses.values()), **statuses)
+            SeatMapService.invalidate(list(counts))
+        return deleted
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
 class Ticket(models.Model):
     """Ticket information with dynamic pricing"""
     TICKET_STATUS_CHOICES = [
         ('available', 'Available'),
+        ('held', 'Held'),
         ('booked', 'Booked'),
         ('cancelled', 'Cancelled'),
         ('expired', 'Expired'),
@@ -41,13 +75,18 @@ class Ticket(models.Model):
     event = models.ForeignKey('events.Event', on_delete=models.CASCADE, related_name='tickets')
     seat_number = models.CharField(max_length=20, blank=True)
     section = models.CharField(max_length=50, blank=True)
+    row = models.CharField(max_length=10, blank=True)
+    seat_index = models.PositiveIntegerField(null=True, blank=True, help_text='Position of the seat in its row, from 1')
     base_price = models.DecimalField(max_digits=10, decimal_places=2)
     final_price = models.DecimalField(max_digits=10, decimal_places=2)
     current_tier = models.ForeignKey('pricing.PriceTier', on_delete=models.SET_NULL, null=True, blank=True)
     status = models.CharField(max_length=20, choices=TICKET_STATUS_CHOICES, default='available')
+    hold = models.ForeignKey('TicketHold', on_delete=models.SET_NULL, null=True, blank=True, related_name='tickets')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = TicketQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.event.name} - {self.seat_number}"
     
@@ -56,6 +95,107 @@ class Ticket(models.Model):
         indexes = [
             models.Index(fields=['event', 'status']),
             models.Index(fields=['status']),
+            models.Index(fields=['event', 'section', 'row', 'seat_index']),
+        ]
+
+
+class SectionAvailability(models.Model):
+    """
+    Availability bitmap of one section of an event's seat map.
+
+    Bit i of `bitmap` (little-endian, so bit i is bit i % 8 of byte i // 8) is
+    set while seat i is available. Seats are numbered row by row in `rows`
+    order, seat_index 1 of a row first; tickets without a row position come
+    last, in `unnumbered` order.
+    """
+    event = models.ForeignKey('events.Event', on_delete=models.CASCADE, related_name='seat_maps')
+    section = models.CharField(max_length=50, blank=True)
+    rows = models.JSONField(default=list, help_text='[row, seats] pairs in bitmap order')
+    unnumbered = models.JSONField(default=list, help_text='Seat numbers of tickets without a row position')
+    seats = models.PositiveIntegerField(default=0)
+    available = models.PositiveIntegerField(default=0)
+    bitmap = models.BinaryField(default=b'')
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Seat map of {self.section or 'unsectioned'} - event {self.event_id}"
+    
+    class Meta:
+        unique_together = ['event', 'section']
+
+
+class TicketHold(models.Model):
+    """Short-lived seat reservation between seat selection and payment"""
+    HOLD_STATUS_CHOICES = [
+        ('active', 'Active'),
+        ('converted', 'Converted'),
+        ('released', 'Released'),
+        ('expired', 'Expired'),
+    ]
+    
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='ticket_holds')
+    event = models.ForeignKey('events.Event', on_delete=models.CASCADE, related_name='ticket_holds')
+    status = models.CharField(max_length=20, choices=HOLD_STATUS_CHOICES, default='active')
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    @property
+    def is_expired(self):
+        return timezone.now() >= self.expires_at
+    
+    def __str__(self):
+        return f"Hold {self.id} - {self.customer} - {self.event.name}"
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+            models.Index(fields=['customer', 'event', 'status']),
+        ]
+
+
+class WaitingRoom(models.Model):
+    """Admission gate of an event: queued customers are let through at a fixed rate"""
+    event = models.OneToOneField('events.Event', on_delete=models.CASCADE, related_name='waiting_room')
+    is_active = models.BooleanField(default=True, help_text='Bookings and holds need an admission token while active')
+    admit_per_minute = models.PositiveIntegerField(default=60)
+    admission_ttl_seconds = models.PositiveIntegerField(default=600, help_text='How long an admission token stays valid')
+    last_admission_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Waiting room - {self.event.name}"
+
+
+class QueueEntry(models.Model):
+    """A customer's place in an event's waiting room and, once admitted, their admission token"""
+    ENTRY_STATUS_CHOICES = [
+        ('waiting', 'Waiting'),
+        ('admitted', 'Admitted'),
+        ('used', 'Used'),
+        ('expired', 'Expired'),
+    ]
+    
+    room = models.ForeignKey(WaitingRoom, on_delete=models.CASCADE, related_name='entries')
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='queue_entries')
+    priority = models.IntegerField(default=0, help_text='Higher priorities are admitted first')
+    status = models.CharField(max_length=20, choices=ENTRY_STATUS_CHOICES, default='waiting')
+    token = models.CharField(max_length=64, unique=True)
+    joined_at = models.DateTimeField(default=timezone.now)
+    admitted_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    
+    @property
+    def is_valid(self):
+        return self.status == 'admitted' and timezone.now() < self.expires_at
+    
+    def __str__(self):
+        return f"{self.customer} in {self.room} ({self.status})"
+    
+    class Meta:
+        unique_together = ['room', 'customer']
+        indexes = [
+            models.Index(fields=['room', 'status', '-priority', 'joined_at']),
+            models.Index(fields=['status', 'expires_at']),
         ]
 
 
@@ -88,6 +228,25 @@ class Booking(models.Model):
         ]
 
 
+class IdempotencyRecord(models.Model):
+    """First response to a booking request sent with an Idempotency-Key, replayed for retries"""
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='idempotency_records')
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField()
+    response = models.JSONField(encoder=DjangoJSONEncoder, default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.customer} - {self.key} ({self.status_code})"
+    
+    class Meta:
+        unique_together = ['customer', 'key']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+
+
 class Feedback(models.Model):
     """Customer feedback for events"""
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='feedback')
@@ -144,4 +303,73 @@ class FanInteraction(models.Model):
             models.Index(fields=['interaction_type', '-timestamp']),
         ]
         # Allow multiple interactions of same type at same time
-        unique_together = [['fan', 'track', 'timestamp', 'interaction_type']]
\ No newline at end of file
+        unique_together = [['fan', 'track', 'timestamp', 'interaction_type']]
+
+
+class ImportRun(models.Model):
+    """One run of the data import, resumable from its checkpoints"""
+    RUN_STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    data_dir = models.CharField(max_length=500)
+    loader = models.CharField(max_length=20, default='orm')
+    status = models.CharField(max_length=20, choices=RUN_STATUS_CHOICES, default='running')
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"Import {self.id} - {self.data_dir} ({self.status})"
+    
+    def finish(self, error=''):
+        self.status = 'failed' if error else 'completed'
+        self.error = str(error)
+        self.finished_at = timezone.now()
+        self.save(update_fields=['status', 'error', 'finished_at'])
+    
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['data_dir', 'status']),
+        ]
+
+
+class ImportCheckpoint(models.Model):
+    """Progress of one file of an import run, committed with every chunk"""
+    run = models.ForeignKey(ImportRun, on_delete=models.CASCADE, related_name='checkpoints')
+    entity = models.CharField(max_length=50)
+    file_name = models.CharField(max_length=255)
+    content_hash = models.CharField(max_length=64)
+    rows_done = models.PositiveIntegerField(default=0, help_text='Data rows of the file already committed')
+    rows_written = models.PositiveIntegerField(default=0)
+    completed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.run} - {self.file_name} @ {self.rows_done}"
+    
+    class Meta:
+        unique_together = ['run', 'entity']
+
+
+class QuarantinedRow(models.Model):
+    """An import row that could not be loaded, kept with the reason"""
+    run = models.ForeignKey(ImportRun, on_delete=models.CASCADE, related_name='quarantined_rows')
+    entity = models.CharField(max_length=50)
+    file_name = models.CharField(max_length=255)
+    row_index = models.PositiveIntegerField(help_text='Position among the data rows of the file')
+    data = models.JSONField(default=dict)
+    reason = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.file_name} row {self.row_index}: {self.reason}"
+    
+    class Meta:
+        ordering = ['run', 'entity', 'row_index']
+        indexes = [
+            models.Index(fields=['run', 'entity']),
+        ]
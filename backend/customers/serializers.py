@@ -0,0 +1,28 @@
+from rest_framework import serializers
+from .models import Ticket, TicketHold, Booking
+
+
+class TicketSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Ticket
+        fields = ['id', 'seat_number', 'section', 'final_price', 'status']
+
+
+class BookingSerializer(serializers.ModelSerializer):
+    event_name = serializers.CharField(source='event.name', read_only=True)
+    tickets = TicketSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Booking
+        fields = [
+            'id', 'customer', 'event', 'event_name', 'tickets', 'total_amount',
+            'booking_date', 'status', 'payment_reference', 'special_requests'
+        ]
+
+
+class TicketHoldSerializer(serializers.ModelSerializer):
+    tickets = TicketSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = TicketHold
+        fields = ['id', 'customer', 'event', 'tickets', 'status', 'expires_at', 'created_at']
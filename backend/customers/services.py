@@ -0,0 +1,1219 @@
+import hashlib
+import json
+import math
+import operator
+import secrets
+import time
+from datetime import timedelta
+from itertools import islice
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.cache import caches
+from django.db import connection, transaction, IntegrityError
+from django.db.models import Count, Q
+from django.utils import timezone
+from events.models import Event, EventInventory
+from pricing.services import DynamicPricingService
+from .models import (
+    Customer, Ticket, TicketHold, Booking, SectionAvailability, WaitingRoom, QueueEntry, IdempotencyRecord
+)
+
+
+class BookingError(Exception):
+    """Raised when a booking request cannot be fulfilled"""
+
+
+class TicketsUnavailableError(BookingError):
+    """Raised when the requested seats could not be claimed"""
+
+
+class AdmissionRequiredError(BookingError):
+    """Raised when an event's waiting room has not admitted the customer"""
+
+
+class IdempotencyKeyReusedError(BookingError):
+    """Raised when an Idempotency-Key comes back with a different request"""
+
+
+class BookingService:
+    """Service class for creating bookings under heavy contention"""
+
+    ACTIVE_BOOKING_STATUSES = ['pending', 'confirmed']
+    # Blocks tried when seats picked from the seat map were taken meanwhile
+    ALLOCATION_ATTEMPTS = 5
+
+    @staticmethod
+    def tickets_reserved_by_customer(customer, event):
+        """
+        Count tickets the customer already has for an event, either through
+        active bookings or through holds that have not expired yet
+        """
+        booked = Ticket.objects.filter(
+            bookings__customer=customer,
+            bookings__event=event,
+            bookings__status__in=BookingService.ACTIVE_BOOKING_STATUSES
+        ).count()
+        held = Ticket.objects.filter(
+            status='held',
+            hold__customer=customer,
+            hold__event=event,
+            hold__status='active',
+            hold__expires_at__gt=timezone.now()
+        ).count()
+        return booked + held
+
+    @staticmethod
+    def _check_ticket_limit(customer, event, requested):
+        """
+        Enforce Event.max_tickets_per_customer. Must run inside the transaction
+        that claims the tickets.
+        """
+        # Serialise concurrent requests of the same customer so the limit holds
+        list(Customer.objects.select_for_update().filter(pk=customer.pk).values_list('pk', flat=True))
+
+        already_reserved = BookingService.tickets_reserved_by_customer(customer, event)
+        if already_reserved + requested > event.max_tickets_per_customer:
+            raise BookingError(
+                f'Cannot book more than {event.max_tickets_per_customer} tickets for this event '
+                f'({already_reserved} already reserved)'
+            )
+
+    @staticmethod
+    def _validate_request(event, quantity, ticket_ids):
+        """Return the number of tickets requested"""
+        requested = len(ticket_ids) if ticket_ids else (quantity or 0)
+        if requested <= 0:
+            raise BookingError('At least one ticket must be requested')
+        if requested > event.max_tickets_per_customer:
+            raise BookingError(
+                f'Cannot book more than {event.max_tickets_per_customer} tickets for this event'
+            )
+        return requested
+
+    @staticmethod
+    def _claim_tickets(event, quantity, ticket_ids, together=False, sections=None):
+        """
+        Lock available tickets for the event, skipping rows other transactions hold.
+
+        With explicit ticket_ids every requested seat must be claimable. With
+        `together` the best block of adjacent seats is taken, from the
+        `sections` in their preference order if given; otherwise the first
+        `quantity` free seats are taken in seat order.
+        """
+        tickets = Ticket.objects.select_for_update(skip_locked=True).filter(
+            event=event,
+            status='available'
+        ).only('id', 'final_price', *SeatMapService.SEAT_FIELDS)
+
+        if ticket_ids:
+            claimed = list(tickets.filter(id__in=ticket_ids))
+            if len(claimed) != len(ticket_ids):
+                raise TicketsUnavailableError('Some of the requested seats are no longer available')
+            return claimed
+
+        if together:
+            return BookingService._claim_block(event, tickets, quantity, sections)
+
+        claimed = list(tickets.order_by('id')[:quantity])
+        if len(claimed) < quantity:
+            raise TicketsUnavailableError('Not enough tickets available for this event')
+        return claimed
+
+    @staticmethod
+    def _claim_block(event, tickets, quantity, sections):
+        """
+        Lock the best block of `quantity` adjacent seats found in the seat map.
+
+        The seat map may be a moment behind the ticket rows, so a block that
+        cannot be claimed in full is ruled out and the next best one tried.
+        """
+        seat_map = SeatMapService.sections(event.id)
+        for _ in range(BookingService.ALLOCATION_ATTEMPTS):
+            choice = SeatAllocationService.best_available(seat_map, quantity, sections)
+            if choice is None:
+                break
+            section, position = choice
+            claimed = list(tickets.filter(
+                section=section,
+                **SeatAllocationService.seat_filter(seat_map[section], position, quantity)
+            ))
+            if len(claimed) == quantity:
+                return claimed
+            seat_map = {**seat_map, section: SeatAllocationService.without(seat_map[section], position, quantity)}
+        raise TicketsUnavailableError(f'No {quantity} adjacent seats are available for this event')
+
+    @staticmethod
+    def create_booking(customer, event, quantity=None, ticket_ids=None, hold=None,
+                       payment_reference='', special_requests='', together=False, sections=None,
+                       admission_token=None):
+        """
+        Book tickets for a customer in a single short transaction.
+
+        Ticket rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED so concurrent
+        requests for the same event pick disjoint seats instead of queueing behind
+        each other. The status flip is guarded by the expected status as well, so
+        a seat can never end up in two bookings even on backends without row locks.
+
+        When a hold is given, the seats it reserved are booked instead. With
+        `together` the seats are the best block of adjacent seats, see
+        SeatAllocationService. While the event's waiting room is active an
+        admission token is required, and the booking uses it up.
+        """
+        if hold is not None:
+            return BookingService._book_hold(customer, event, hold, payment_reference, special_requests)
+
+        ticket_ids = sorted(set(ticket_ids or []))
+        requested = BookingService._validate_request(event, quantity, ticket_ids)
+
+        with transaction.atomic():
+            admission = WaitingRoomService.check_admission(customer, event, admission_token)
+            BookingService._check_ticket_limit(customer, event, requested)
+
+            tickets = BookingService._claim_tickets(event, requested, ticket_ids, together, sections)
+            claimed_ids = [ticket.id for ticket in tickets]
+
+            updated = Ticket.objects.filter(
+                id__in=claimed_ids,
+                status='available'
+            ).update(status='booked', updated_at=timezone.now())
+            if updated != len(claimed_ids):
+                raise TicketsUnavailableError('Some of the requested seats are no longer available')
+
+            booking = BookingService._create_booking_record(
+                customer, event, tickets, payment_reference, special_requests
+            )
+            if admission is not None:
+                # Guarded by the status so a token books only once
+                if not QueueEntry.objects.filter(pk=admission.pk, status='admitted').update(status='used'):
+                    raise AdmissionRequiredError('The admission token was already used')
+            # Last statements before commit keep the counter row locked briefly
+            EventInventory.transition(event.id, 'available', 'booked', len(claimed_ids))
+            SeatMapService.mark(event.id, tickets, available=False)
+
+        return booking
+
+    @staticmethod
+    def _book_hold(customer, event, hold, payment_reference, special_requests):
+        """Convert an active hold into a confirmed booking"""
+        with transaction.atomic():
+            hold = TicketHold.objects.select_for_update().filter(
+                pk=hold.pk,
+                customer=customer,
+                event=event
+            ).first()
+            if hold is None:
+                raise BookingError('Hold not found for this customer and event')
+            if hold.status != 'active' or hold.is_expired:
+                raise TicketsUnavailableError('The hold has expired or was already used')
+
+            tickets = list(Ticket.objects.filter(hold=hold, status='held').only('id', 'final_price'))
+            if not tickets:
+                raise TicketsUnavailableError('The hold no longer reserves any seats')
+            claimed_ids = [ticket.id for ticket in tickets]
+
+            updated = Ticket.objects.filter(id__in=claimed_ids, status='held').update(
+                status='booked', updated_at=timezone.now()
+            )
+            if updated != len(claimed_ids):
+                raise TicketsUnavailableError('The hold expired while it was being booked')
+            hold.status = 'converted'
+            hold.save(update_fields=['status'])
+
+            booking = BookingService._create_booking_record(
+                customer, event, tickets, payment_reference, special_requests
+            )
+            EventInventory.transition(event.id, 'held', 'booked', len(claimed_ids))
+
+        return booking
+
+    @staticmethod
+    def book_tickets(event_id, ticket_ids):
+        """
+        Move the given tickets of an event to 'booked' with one UPDATE and
+        adjust the counters and seat map for the statuses they left. Returns
+        the number of tickets booked.
+        """
+        # No savepoint: an error rolls back the enclosing transaction, e.g. the m2m add
+        with transaction.atomic(savepoint=False):
+            tickets = list(Ticket.objects.select_for_update().filter(
+                id__in=ticket_ids,
+                event_id=event_id,
+                status__in=['available', 'held']
+            ).only('status', *SeatMapService.SEAT_FIELDS))
+            if not tickets:
+                return 0
+
+            booked = Ticket.objects.filter(
+                id__in=[ticket.id for ticket in tickets],
+                status__in=['available', 'held']
+            ).update(status='booked', hold=None, updated_at=timezone.now())
+            if booked != len(tickets):
+                raise TicketsUnavailableError('Some of the tickets changed status while being booked')
+            for from_status in ('available', 'held'):
+                EventInventory.transition(
+                    event_id, from_status, 'booked',
+                    sum(1 for ticket in tickets if ticket.status == from_status)
+                )
+            SeatMapService.mark(
+                event_id, [ticket for ticket in tickets if ticket.status == 'available'], available=False
+            )
+        return booked
+
+    @staticmethod
+    def _create_booking_record(customer, event, tickets, payment_reference, special_requests):
+        """Create the confirmed Booking row and link its tickets"""
+        booking = Booking.objects.create(
+            customer=customer,
+            event=event,
+            total_amount=sum(ticket.final_price for ticket in tickets),
+            status='confirmed',
+            payment_reference=payment_reference,
+            special_requests=special_requests
+        )
+        booking.tickets.add(*[ticket.id for ticket in tickets])
+        return booking
+
+
+class SeatHoldService:
+    """Service class for reserving seats during checkout"""
+
+    @staticmethod
+    def hold_ttl():
+        """Default lifetime of a hold"""
+        return timedelta(seconds=getattr(settings, 'TICKET_HOLD_TTL_SECONDS', 600))
+
+    @staticmethod
+    def create_hold(customer, event, quantity=None, ticket_ids=None, ttl=None, together=False, sections=None,
+                    admission_token=None):
+        """
+        Reserve seats for a customer until the hold expires.
+
+        Seats are claimed exactly like a booking, but only move to 'held', so no
+        row lock outlives this short transaction while the customer pays. The
+        admission token of an active waiting room is checked but not used up,
+        as booking the hold later does not ask for it again.
+        """
+        ticket_ids = sorted(set(ticket_ids or []))
+        requested = BookingService._validate_request(event, quantity, ticket_ids)
+
+        with transaction.atomic():
+            WaitingRoomService.check_admission(customer, event, admission_token)
+            BookingService._check_ticket_limit(customer, event, requested)
+
+            tickets = BookingService._claim_tickets(event, requested, ticket_ids, together, sections)
+            claimed_ids = [ticket.id for ticket in tickets]
+
+            hold = TicketHold.objects.create(
+                customer=customer,
+                event=event,
+                expires_at=timezone.now() + (ttl or SeatHoldService.hold_ttl())
+            )
+            updated = Ticket.objects.filter(
+                id__in=claimed_ids,
+                status='available'
+            ).update(status='held', hold=hold, updated_at=timezone.now())
+            if updated != len(claimed_ids):
+                raise TicketsUnavailableError('Some of the requested seats are no longer available')
+            EventInventory.transition(event.id, 'available', 'held', updated)
+            SeatMapService.mark(event.id, tickets, available=False)
+
+        return hold
+
+    @staticmethod
+    def release_hold(hold):
+        """Give the seats of an active hold back to the pool"""
+        with transaction.atomic():
+            # Locked like _book_hold does, so a hold is either converted or released, never both
+            if not TicketHold.objects.select_for_update().filter(pk=hold.pk, status='active').exists():
+                return 0
+            if not TicketHold.objects.filter(pk=hold.pk, status='active').update(status='released'):
+                return 0
+
+            tickets = list(Ticket.objects.select_for_update().filter(
+                hold=hold,
+                status='held'
+            ).only(*SeatMapService.SEAT_FIELDS))
+            released = Ticket.objects.filter(id__in=[ticket.id for ticket in tickets], status='held').update(
+                status='available', hold=None, updated_at=timezone.now()
+            )
+            EventInventory.transition(hold.event_id, 'held', 'available', released)
+            SeatMapService.mark(hold.event_id, tickets, available=True)
+        return released
+
+    @staticmethod
+    def release_expired_holds(now=None, batch_size=1000):
+        """
+        Reclaim the seats of every expired hold.
+
+        Works through expired holds in batches with one UPDATE for their tickets
+        and one for the holds themselves, rather than touching rows one by one.
+        Returns the number of holds expired and tickets released.
+        """
+        now = now or timezone.now()
+        holds_expired = 0
+        tickets_released = 0
+        affected_events = set()
+
+        while True:
+            with transaction.atomic():
+                # Holds being booked right now are locked by _book_hold; leave them to it
+                hold_ids = list(TicketHold.objects.select_for_update(skip_locked=True).filter(
+                    status='active',
+                    expires_at__lte=now
+                ).values_list('id', flat=True)[:batch_size])
+                if not hold_ids:
+                    break
+
+                ticket_ids = list(Ticket.objects.select_for_update().filter(
+                    hold_id__in=hold_ids,
+                    status='held'
+                ).values_list('id', flat=True))
+                released_at = timezone.now()
+                Ticket.objects.filter(
+                    id__in=ticket_ids,
+                    status='held'
+                ).update(status='available', hold=None, updated_at=released_at)
+
+                # Counters and seat maps follow the rows the guarded UPDATE changed, not the ones read before it
+                held_per_event = {}
+                for ticket in Ticket.objects.filter(
+                    id__in=ticket_ids,
+                    status='available',
+                    updated_at=released_at
+                ).only('event_id', *SeatMapService.SEAT_FIELDS):
+                    held_per_event.setdefault(ticket.event_id, []).append(ticket)
+                    tickets_released += 1
+                for event_id, tickets in held_per_event.items():
+                    EventInventory.transition(event_id, 'held', 'available', len(tickets))
+                    SeatMapService.mark(event_id, tickets, available=True)
+                affected_events.update(held_per_event)
+                holds_expired += TicketHold.objects.filter(
+                    id__in=hold_ids,
+                    status='active'
+                ).update(status='expired')
+
+        # Released seats still carry the price quoted when they were held
+        for event in Event.objects.filter(id__in=affected_events):
+            DynamicPricingService.schedule_reprice(event)
+
+        return holds_expired, tickets_released
+
+
+class BookingCancellationService:
+    """
+    Service class for cancelling and refunding bookings in bulk.
+
+    Bookings and their tickets change with one UPDATE each whatever their
+    number. The counters, seat maps, analytics and dashboard cache of each
+    affected event are adjusted once, and each event is repriced once.
+    """
+
+    @staticmethod
+    def cancel_bookings(bookings, refund=False, ticket_status='available'):
+        """
+        Cancel (or refund) the active bookings among `bookings`, a queryset or
+        booking IDs, and move their tickets to `ticket_status`: 'available'
+        to resell the seats, 'cancelled' to retire them. Returns the number of
+        bookings and tickets changed.
+        """
+        from analytics.cache import dashboard_cache
+        from analytics.services import AnalyticsService
+
+        if not hasattr(bookings, 'values'):
+            bookings = Booking.objects.filter(id__in=list(bookings))
+        active = Booking.objects.filter(
+            id__in=bookings.values('id'),
+            status__in=BookingService.ACTIVE_BOOKING_STATUSES
+        )
+
+        with transaction.atomic():
+            rows = list(active.select_for_update().values_list('event_id', 'status', 'total_amount'))
+            if not rows:
+                return 0, 0
+
+            deltas = {}
+            for event_id, booking_status, total_amount in rows:
+                bookings_delta, revenue_delta = AnalyticsService.booking_delta(booking_status, total_amount)
+                event_bookings, event_revenue = deltas.get(event_id, (0, 0))
+                deltas[event_id] = (event_bookings - bookings_delta, event_revenue - revenue_delta)
+
+            # Tickets first, while the locked bookings still match `active`
+            released = BookingCancellationService.release_tickets(active, ticket_status)
+            cancelled = active.update(status='refunded' if refund else 'cancelled')
+
+            for event_id, (bookings_delta, revenue_delta) in deltas.items():
+                AnalyticsService.apply_delta_on_commit(event_id, bookings=bookings_delta, revenue=revenue_delta)
+                dashboard_cache.bump(event_id)
+            for event in Event.objects.filter(id__in=list(deltas)):
+                DynamicPricingService.schedule_reprice(event)
+
+        return cancelled, released
+
+    @staticmethod
+    def release_tickets(bookings, ticket_status='available'):
+        """
+        Move the booked tickets of a queryset of bookings to `ticket_status`
+        with one UPDATE and adjust the counters and seat maps of their events.
+        Only pass active bookings: tickets of older, cancelled bookings may
+        have been sold again since.
+        """
+        tickets = Ticket.objects.filter(bookings__in=bookings, status='booked')
+        if ticket_status == 'available':
+            # Seat maps need the seats that become available
+            per_event = {}
+            for ticket in tickets.only('event_id', *SeatMapService.SEAT_FIELDS):
+                per_event.setdefault(ticket.event_id, []).append(ticket)
+            counts = {event_id: len(event_tickets) for event_id, event_tickets in per_event.items()}
+        else:
+            per_event = {}
+            counts = dict(tickets.values('event_id').annotate(n=Count('id')).values_list('event_id', 'n').order_by())
+        if not counts:
+            return 0
+
+        released = tickets.update(status=ticket_status, hold=None, updated_at=timezone.now())
+        for event_id, count in counts.items():
+            EventInventory.transition(event_id, 'booked', ticket_status, count)
+            if event_id in per_event:
+                SeatMapService.mark(event_id, per_event[event_id], available=True)
+        return released
+
+    @staticmethod
+    def cancel_event(event, refund=True):
+        """
+        Call off an event: deactivate it and cancel or refund all of its
+        active bookings, retiring their seats. Returns the number of bookings
+        and tickets changed.
+        """
+        with transaction.atomic():
+            Event.objects.filter(pk=event.pk).update(is_active=False)
+            return BookingCancellationService.cancel_bookings(
+                Booking.objects.filter(event=event),
+                refund=refund,
+                ticket_status='cancelled'
+            )
+
+
+class WaitingRoomService:
+    """
+    Service class for the virtual waiting rooms of on-sale events.
+
+    Customers join an event's queue and are admitted in priority, then
+    arrival order at the room's admit_per_minute rate, at most a minute's
+    worth at once. Admission hands out a time-boxed token that bookings and
+    holds need while the room is active, so the booking rate the database
+    sees is bounded by the admission rate rather than by demand. Admission
+    runs from the admit_waiting_rooms worker and on every join or poll, each
+    as a couple of statements under a skip-locked room lock.
+    """
+
+    @staticmethod
+    def open_room(event, admit_per_minute=None, admission_ttl_seconds=None):
+        """Create or reactivate the waiting room of an event"""
+        defaults = {'is_active': True}
+        if admit_per_minute is not None:
+            defaults['admit_per_minute'] = admit_per_minute
+        if admission_ttl_seconds is not None:
+            defaults['admission_ttl_seconds'] = admission_ttl_seconds
+        room, _ = WaitingRoom.objects.update_or_create(event=event, defaults=defaults)
+        return room
+
+    @staticmethod
+    def active_room(event):
+        return WaitingRoom.objects.filter(event=event, is_active=True).first()
+
+    @staticmethod
+    def join(customer, room, priority=0):
+        """
+        Queue a customer, keeping their place if they are already waiting or
+        admitted; customers whose token was used or expired start again at the back.
+        Returns (entry, created) like get_or_create.
+        """
+        entry, created = QueueEntry.objects.get_or_create(
+            room=room,
+            customer=customer,
+            defaults={'priority': priority, 'token': secrets.token_urlsafe(32)}
+        )
+        if entry.status in ('used', 'expired') or (entry.status == 'admitted' and not entry.is_valid):
+            entry.status = 'waiting'
+            entry.priority = priority
+            entry.token = secrets.token_urlsafe(32)
+            entry.joined_at = timezone.now()
+            entry.admitted_at = entry.expires_at = None
+            entry.save()
+
+        if entry.status == 'waiting' and WaitingRoomService.admit(room):
+            entry.refresh_from_db()
+        return entry, created
+
+    @staticmethod
+    def admit(room, now=None):
+        """
+        Admit the customers the room's rate allows since its last admission.
+        Returns the number admitted; 0 if another process is admitting.
+        """
+        now = now or timezone.now()
+        with transaction.atomic():
+            room = WaitingRoom.objects.select_for_update(skip_locked=True).filter(
+                pk=room.pk,
+                is_active=True
+            ).first()
+            if room is None or not room.admit_per_minute:
+                return 0
+
+            interval = timedelta(minutes=1) / room.admit_per_minute
+            # Idle time does not build up more than a minute's worth of admissions
+            since = max(room.last_admission_at or now - timedelta(minutes=1), now - timedelta(minutes=1))
+            due = int((now - since) / interval)
+            if not due:
+                return 0
+
+            entry_ids = list(QueueEntry.objects.filter(
+                room=room,
+                status='waiting'
+            ).order_by('-priority', 'joined_at', 'id').values_list('id', flat=True)[:due])
+            if entry_ids:
+                QueueEntry.objects.filter(id__in=entry_ids, status='waiting').update(
+                    status='admitted',
+                    admitted_at=now,
+                    expires_at=now + timedelta(seconds=room.admission_ttl_seconds)
+                )
+                # Unused allowance stays, up to the one minute cap above
+                room.last_admission_at = since + interval * len(entry_ids)
+                room.save(update_fields=['last_admission_at'])
+        return len(entry_ids)
+
+    @staticmethod
+    def admit_all(now=None):
+        """Admit due customers in every active room and expire stale tokens; returns (admitted, expired)"""
+        now = now or timezone.now()
+        admitted = sum(
+            WaitingRoomService.admit(room, now)
+            for room in WaitingRoom.objects.filter(is_active=True, entries__status='waiting').distinct()
+        )
+        expired = QueueEntry.objects.filter(status='admitted', expires_at__lte=now).update(status='expired')
+        return admitted, expired
+
+    @staticmethod
+    def status(entry):
+        """Position, estimated wait and, once admitted, the token of a queue entry"""
+        if entry.status == 'admitted' and not entry.is_valid:
+            entry.status = 'expired'
+        data = {'status': entry.status, 'position': None, 'eta_seconds': None, 'token': None, 'expires_at': None}
+
+        if entry.status == 'waiting':
+            ahead = QueueEntry.objects.filter(room_id=entry.room_id, status='waiting').filter(
+                Q(priority__gt=entry.priority) |
+                Q(priority=entry.priority, joined_at__lt=entry.joined_at) |
+                Q(priority=entry.priority, joined_at=entry.joined_at, id__lt=entry.id)
+            ).count()
+            rate = entry.room.admit_per_minute
+            data['position'] = ahead + 1
+            data['eta_seconds'] = math.ceil((ahead + 1) * 60 / rate) if rate else None
+        elif entry.status == 'admitted':
+            data['token'] = entry.token
+            data['expires_at'] = entry.expires_at
+        return data
+
+    @staticmethod
+    def check_admission(customer, event, token):
+        """
+        Return the customer's valid admission for the event's active waiting
+        room, None if the event has no active room, or raise AdmissionRequiredError
+        """
+        room = WaitingRoomService.active_room(event)
+        if room is None:
+            return None
+        entry = QueueEntry.objects.filter(
+            room=room,
+            customer=customer,
+            token=token or '',
+            status='admitted',
+            expires_at__gt=timezone.now()
+        ).first()
+        if entry is None:
+            raise AdmissionRequiredError('A valid admission token from the waiting room is required to book this event')
+        return entry
+
+
+class IdempotencyService:
+    """
+    Service class for replaying the first response to requests sent with an
+    Idempotency-Key.
+
+    The first request inserts its IdempotencyRecord before doing the work,
+    in the same transaction, so a concurrent duplicate waits on the unique
+    (customer, key) index and then replays the committed response instead of
+    booking again. Responses are also cached for IDEMPOTENCY_CACHE_TTL_SECONDS,
+    so a retry shortly after the first attempt is a single cache hit.
+
+    Only definitive outcomes are kept: a response a retry could change, such
+    as a 403 for a missing admission token or a 409 from seat contention,
+    releases the key again.
+    """
+
+    class _Retryable(Exception):
+        """Rolls the record of a non-definitive response back"""
+
+        def __init__(self, status_code, response):
+            self.status_code, self.response = status_code, response
+
+    @staticmethod
+    def _cache():
+        return caches[getattr(settings, 'IDEMPOTENCY_CACHE', 'default')]
+
+    @staticmethod
+    def _key(user_id, key):
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return f'customers:idempotency:{user_id}:{digest}'
+
+    @staticmethod
+    def fingerprint(path, data, admission_token=None):
+        """Hash of a request, to tell a retry from a different request reusing a key"""
+        payload = json.dumps(
+            {'path': path, 'data': data, 'admission_token': admission_token}, sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def is_definitive(status_code):
+        """Whether a retry of the same request is bound to get the same response: success or invalid input"""
+        return 200 <= status_code < 300 or status_code == 400
+
+    @staticmethod
+    def cached(user_id, key):
+        """The cached entry {request_hash, status_code, response} of a key, or None"""
+        return IdempotencyService._cache().get(IdempotencyService._key(user_id, key))
+
+    @staticmethod
+    def _remember(user_id, key, record):
+        entry = {
+            'request_hash': record.request_hash,
+            'status_code': record.status_code,
+            'response': record.response,
+        }
+        IdempotencyService._cache().set(
+            IdempotencyService._key(user_id, key),
+            entry,
+            timeout=getattr(settings, 'IDEMPOTENCY_CACHE_TTL_SECONDS', 300)
+        )
+        return entry
+
+    @staticmethod
+    def respond(customer, key, request_hash, handler):
+        """
+        Return (entry, replayed) for a request: the stored entry of the key if
+        there is one, otherwise the entry of handler() -> (status_code, data),
+        which runs in the transaction that stores it unless the response is
+        not definitive. Raises IdempotencyKeyReusedError when the stored
+        request differs.
+        """
+        user_id = customer.user_id
+        record = IdempotencyRecord.objects.filter(customer=customer, key=key).first()
+        replayed = record is not None
+        if record is None:
+            try:
+                with transaction.atomic():
+                    record = IdempotencyRecord.objects.create(
+                        customer=customer,
+                        key=key,
+                        request_hash=request_hash,
+                        status_code=0
+                    )
+                    record.status_code, record.response = handler()
+                    # Round-trip through JSON so the first response looks like its replays
+                    record.response = json.loads(json.dumps(record.response, cls=DjangoJSONEncoder))
+                    if not IdempotencyService.is_definitive(record.status_code):
+                        raise IdempotencyService._Retryable(record.status_code, record.response)
+                    record.save(update_fields=['status_code', 'response'])
+            except IdempotencyService._Retryable as e:
+                # Not stored, so a retry with the same key runs again
+                entry = {'request_hash': request_hash, 'status_code': e.status_code, 'response': e.response}
+                return entry, False
+            except IntegrityError:
+                # A concurrent request with the same key committed first
+                record = IdempotencyRecord.objects.filter(customer=customer, key=key).first()
+                if record is None:
+                    raise
+                replayed = True
+
+        entry = IdempotencyService._remember(user_id, key, record)
+        IdempotencyService.check(entry, request_hash)
+        return entry, replayed
+
+    @staticmethod
+    def check(entry, request_hash):
+        """Refuse to replay a response for a different request"""
+        if entry['request_hash'] != request_hash:
+            raise IdempotencyKeyReusedError('This Idempotency-Key was already used for a different request')
+
+    @staticmethod
+    def prune(older_than):
+        """Delete records created before `older_than`; returns how many"""
+        deleted, _ = IdempotencyRecord.objects.filter(created_at__lt=older_than).delete()
+        return deleted
+
+
+class TicketInventoryService:
+    """Service class for generating the seat inventory of events"""
+
+    SEATS_PER_ROW = 25
+    ROWS_PER_SECTION = 40
+    CHUNK_SIZE = 5000
+
+    @staticmethod
+    def label(index):
+        """Spreadsheet style label of a 0-based index: A..Z, AA, AB, ..."""
+        label = ''
+        index += 1
+        while index:
+            index, remainder = divmod(index - 1, 26)
+            label = chr(65 + remainder) + label
+        return label
+
+    @staticmethod
+    def seat_layout(capacity, seats_per_row=None, rows_per_section=None):
+        """
+        Yield (section, row, seat_index, seat_number) for capacity seats,
+        filling each section row by row
+        """
+        seats_per_row = seats_per_row or TicketInventoryService.SEATS_PER_ROW
+        seats_per_section = seats_per_row * (rows_per_section or TicketInventoryService.ROWS_PER_SECTION)
+        for seat in range(capacity):
+            section_index, position = divmod(seat, seats_per_section)
+            row_index, seat_index = divmod(position, seats_per_row)
+            section = TicketInventoryService.label(section_index)
+            row = TicketInventoryService.label(row_index)
+            yield f'Section {section}', row, seat_index + 1, f'{section}-{row}-{seat_index + 1}'
+
+    @staticmethod
+    def build_tickets(event, capacity, seats_per_row=None, rows_per_section=None, tier=None):
+        """Unsaved tickets for the event's full seat map, priced at the given tier"""
+        base_price = event.ticket_price
+        final_price = tier.price if tier else base_price
+        for section, row, seat_index, seat_number in TicketInventoryService.seat_layout(
+            capacity, seats_per_row, rows_per_section
+        ):
+            yield Ticket(
+                event_id=event.pk,
+                seat_number=seat_number,
+                section=section,
+                row=row,
+                seat_index=seat_index,
+                base_price=base_price,
+                final_price=final_price,
+                current_tier=tier,
+                status='available'
+            )
+
+    @staticmethod
+    def generate_inventory(event, capacity=None, seats_per_row=None, rows_per_section=None, chunk_size=None):
+        """
+        Create the tickets of an event's seat map, the venue capacity by default.
+
+        The seat map is built in memory as plain rows and inserted in chunks
+        of multi-row INSERT statements, skipping Ticket instances altogether;
+        seats that already exist are left alone, so generating again only
+        fills gaps. Inserts skip the ticket signals, so the inventory counters
+        are rebuilt afterwards. Returns the number of tickets created.
+        """
+        from analytics.cache import dashboard_cache
+
+        capacity = event.venue.capacity if capacity is None else capacity
+        chunk_size = chunk_size or TicketInventoryService.CHUNK_SIZE
+        tier = DynamicPricingService.calculate_current_tier(event)
+
+        fields = [
+            Ticket._meta.get_field(name)
+            for name in ['event', 'seat_number', 'section', 'row', 'seat_index', 'base_price',
+                         'final_price', 'current_tier', 'status', 'created_at', 'updated_at']
+        ]
+        now = timezone.now()
+        # Values shared by every seat, prepared for the database once
+        shared = [
+            field.get_db_prep_save(value, connection)
+            for field, value in zip(
+                [fields[0], fields[5], fields[6], fields[7], fields[8], fields[9], fields[10]],
+                [event.pk, event.ticket_price, tier.price if tier else event.ticket_price,
+                 tier.pk if tier else None, 'available', now, now]
+            )
+        ]
+        event_id, base_price, final_price, tier_id, status, created_at, updated_at = shared
+
+        with transaction.atomic():
+            # Serialise generators of the same event
+            list(Event.objects.select_for_update().filter(pk=event.pk).values_list('pk', flat=True))
+            existing = set(Ticket.objects.filter(event=event).values_list('seat_number', flat=True))
+
+            rows = (
+                (event_id, seat_number, section, row, seat_index, base_price, final_price,
+                 tier_id, status, created_at, updated_at)
+                for section, row, seat_index, seat_number in TicketInventoryService.seat_layout(
+                    capacity, seats_per_row, rows_per_section
+                )
+                if seat_number not in existing
+            )
+            created = 0
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                TicketInventoryService._insert_rows(fields, chunk)
+                created += len(chunk)
+
+            if created:
+                EventInventory.rebuild([event.pk])
+                dashboard_cache.bump(event.pk)
+                # The booking percentage drops with the new seats
+                DynamicPricingService.schedule_reprice(event)
+        return created
+
+    @staticmethod
+    def _insert_rows(fields, rows):
+        """INSERT ticket rows with multi-row VALUES statements sized to the backend's parameter limit"""
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(field.column) for field in fields)
+        placeholders = f'({", ".join(["%s"] * len(fields))})'
+        batch_size = min(connection.ops.bulk_batch_size(fields, rows), 1000)
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                cursor.execute(
+                    f'INSERT INTO {quote(Ticket._meta.db_table)} ({columns}) '
+                    f'VALUES {", ".join([placeholders] * len(batch))}',
+                    [value for row in batch for value in row]
+                )
+
+
+class SeatMapService:
+    """
+    Service class for the per-section availability bitmaps of events.
+
+    The bitmaps are built from the ticket rows once and then follow every
+    status change through mark(), so rendering a seat map or picking seats
+    reads a few bytes per section instead of the tickets. Adding or removing
+    tickets changes the layout itself, so that invalidates the event's
+    bitmaps and the next read rebuilds them. Readers go through a versioned
+    cache entry per event that writers bump once they commit.
+    """
+
+    SEAT_FIELDS = ['section', 'row', 'seat_index', 'seat_number']
+
+    @staticmethod
+    def _cache():
+        return caches[getattr(settings, 'SEAT_MAP_CACHE', 'default')]
+
+    @staticmethod
+    def _key(event_id, suffix):
+        return f'customers:seatmap:{event_id}:{suffix}'
+
+    @staticmethod
+    def version(event_id):
+        """Current version of an event's cached seat map"""
+        cache = SeatMapService._cache()
+        key = SeatMapService._key(event_id, 'version')
+        version = cache.get(key)
+        if version is None:
+            # Start from the clock so a lost counter never reuses an old version
+            cache.add(key, time.time_ns(), timeout=None)
+            version = cache.get(key)
+        return version
+
+    @staticmethod
+    def bump(event_id):
+        """Invalidate the cached seat map of an event, again once the transaction commits"""
+        SeatMapService._bump(event_id)
+        transaction.on_commit(lambda: SeatMapService._bump(event_id))
+
+    @staticmethod
+    def _bump(event_id):
+        cache = SeatMapService._cache()
+        key = SeatMapService._key(event_id, 'version')
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+    @staticmethod
+    def row_order(row):
+        """Sort key of row and section labels: A..Z before AA"""
+        return len(row), row
+
+    @staticmethod
+    def positions(rows, unnumbered):
+        """Lookup tables of a section layout: row -> (first bit, seats) and seat_number -> bit"""
+        row_offsets = {}
+        offset = 0
+        for row, length in rows:
+            row_offsets[row] = (offset, length)
+            offset += length
+        return row_offsets, {seat_number: offset + i for i, seat_number in enumerate(unnumbered)}
+
+    @staticmethod
+    def position(lookup, ticket):
+        """Bit of a ticket in a section layout, or None if the layout does not have it"""
+        row_offsets, unnumbered = lookup
+        if ticket.seat_index is None:
+            return unnumbered.get(ticket.seat_number)
+        offset, length = row_offsets.get(ticket.row, (0, 0))
+        if not 1 <= ticket.seat_index <= length:
+            return None
+        return offset + ticket.seat_index - 1
+
+    @staticmethod
+    def row_starts(rows, unnumbered):
+        """Mask with the first bit of every row set; the unnumbered seats count as one row"""
+        mask = 0
+        offset = 0
+        for _, length in rows:
+            mask |= 1 << offset
+            offset += length
+        if unnumbered:
+            mask |= 1 << offset
+        return mask
+
+    @staticmethod
+    def build_section(tickets):
+        """Layout and bitmap of a section from its tickets"""
+        row_lengths = {}
+        unnumbered = []
+        for ticket in tickets:
+            if ticket.seat_index is None:
+                unnumbered.append(ticket.seat_number)
+            else:
+                row_lengths[ticket.row] = max(row_lengths.get(ticket.row, 0), ticket.seat_index)
+        rows = [[row, row_lengths[row]] for row in sorted(row_lengths, key=SeatMapService.row_order)]
+        unnumbered.sort()
+
+        lookup = SeatMapService.positions(rows, unnumbered)
+        bits = 0
+        for ticket in tickets:
+            if ticket.status == 'available':
+                bits |= 1 << SeatMapService.position(lookup, ticket)
+        seats = sum(length for _, length in rows) + len(unnumbered)
+        return {
+            'rows': rows,
+            'unnumbered': unnumbered,
+            'seats': seats,
+            'available': bits.bit_count(),
+            'bitmap': bits.to_bytes((seats + 7) // 8, 'little'),
+        }
+
+    @staticmethod
+    def rebuild(event_id):
+        """Recompute and store the bitmaps of an event from its tickets"""
+        with transaction.atomic():
+            # Writers move the counters before the bitmaps, so holding the
+            # counter row keeps their changes out while the tickets are read
+            list(EventInventory.objects.select_for_update().filter(event_id=event_id).values_list('pk', flat=True))
+
+            by_section = {}
+            for ticket in Ticket.objects.filter(event_id=event_id).only('status', *SeatMapService.SEAT_FIELDS):
+                by_section.setdefault(ticket.section, []).append(ticket)
+            sections = {
+                section: SeatMapService.build_section(tickets)
+                for section, tickets in by_section.items()
+            }
+
+            SectionAvailability.objects.filter(event_id=event_id).exclude(section__in=list(sections)).delete()
+            SectionAvailability.objects.bulk_create(
+                [SectionAvailability(event_id=event_id, section=section, **data) for section, data in sections.items()],
+                update_conflicts=True,
+                unique_fields=['event', 'section'],
+                update_fields=['rows', 'unnumbered', 'seats', 'available', 'bitmap', 'updated_at']
+            )
+            SeatMapService.bump(event_id)
+        return sections
+
+    @staticmethod
+    def sections(event_id):
+        """
+        Return {section: {rows, unnumbered, seats, available, bitmap, row_starts}}
+        for an event from the cache, the stored bitmaps or, failing both, the
+        tickets
+        """
+        cache = SeatMapService._cache()
+        # Read the version first so a change during the load leaves the entry stale
+        version = SeatMapService.version(event_id)
+        entry = cache.get(SeatMapService._key(event_id, 'sections'))
+        if entry is not None and entry['version'] == version:
+            return entry['sections']
+
+        sections = {
+            seat_map.section: {
+                'rows': seat_map.rows,
+                'unnumbered': seat_map.unnumbered,
+                'seats': seat_map.seats,
+                'available': seat_map.available,
+                'bitmap': bytes(seat_map.bitmap),
+            }
+            for seat_map in SectionAvailability.objects.filter(event_id=event_id)
+        }
+        if not sections:
+            sections = SeatMapService.rebuild(event_id)
+            version = SeatMapService.version(event_id)
+        for data in sections.values():
+            data['row_starts'] = SeatMapService.row_starts(data['rows'], data['unnumbered'])
+        cache.set(
+            SeatMapService._key(event_id, 'sections'),
+            {'version': version, 'sections': sections},
+            timeout=getattr(settings, 'SEAT_MAP_CACHE_TTL_SECONDS', 300)
+        )
+        return sections
+
+    @staticmethod
+    def mark(event_id, tickets, available):
+        """
+        Set the bits of tickets whose status moved into or out of 'available'.
+
+        The tickets need the SEAT_FIELDS loaded. Call after EventInventory has
+        been adjusted in the same transaction: the counter row lock is what
+        orders these updates against a concurrent rebuild. Events without
+        stored bitmaps are left alone; they are built from the tickets on
+        first read.
+        """
+        by_section = {}
+        for ticket in tickets:
+            by_section.setdefault(ticket.section, []).append(ticket)
+        if not by_section:
+            return
+
+        seat_maps = list(SectionAvailability.objects.select_for_update().filter(
+            event_id=event_id,
+            section__in=list(by_section)
+        ))
+        if len(seat_maps) < len(by_section):
+            if seat_maps or SectionAvailability.objects.filter(event_id=event_id).exists():
+                # A section the bitmaps were built without
+                SeatMapService.invalidate([event_id])
+            return
+
+        now = timezone.now()
+        for seat_map in seat_maps:
+            lookup = SeatMapService.positions(seat_map.rows, seat_map.unnumbered)
+            bits = int.from_bytes(seat_map.bitmap, 'little')
+            for ticket in by_section[seat_map.section]:
+                position = SeatMapService.position(lookup, ticket)
+                if position is None:
+                    # A seat the bitmaps were built without
+                    SeatMapService.invalidate([event_id])
+                    return
+                if available:
+                    bits |= 1 << position
+                else:
+                    bits &= ~(1 << position)
+            seat_map.bitmap = bits.to_bytes(len(seat_map.bitmap), 'little')
+            seat_map.available = bits.bit_count()
+            seat_map.updated_at = now
+
+        SectionAvailability.objects.bulk_update(seat_maps, ['bitmap', 'available', 'updated_at'])
+        SeatMapService.bump(event_id)
+
+    @staticmethod
+    def invalidate(event_ids=None):
+        """Drop the bitmaps of the given events (all events if None) so they are rebuilt on read"""
+        seat_maps = SectionAvailability.objects.all()
+        if event_ids is None:
+            event_ids = list(seat_maps.values_list('event_id', flat=True).distinct())
+        else:
+            seat_maps = seat_maps.filter(event_id__in=event_ids)
+        seat_maps.delete()
+        for event_id in event_ids:
+            SeatMapService.bump(event_id)
+
+
+class SeatAllocationService:
+    """
+    Service class for picking the best block of adjacent available seats.
+
+    Works on the seat map bitmaps of SeatMapService with big-integer bit
+    operations, so a search over a whole section is a handful of shifts and
+    masks rather than a walk over its seats. A block never spans two rows.
+    The best block is the first section in preference order that has one,
+    then the front-most row of that section, then the block nearest the
+    middle of that row.
+    """
+
+    @staticmethod
+    def _fold(bits, width, combine):
+        """Combine every bit with the width - 1 bits above it, in log2(width) shifts"""
+        covered = 1
+        while covered < width:
+            step = min(covered, width - covered)
+            bits = combine(bits, bits >> step)
+            covered += step
+        return bits
+
+    @staticmethod
+    def block_starts(data, quantity):
+        """Mask of the positions where `quantity` available seats of one row begin"""
+        bits = int.from_bytes(data['bitmap'], 'little')
+        starts = SeatAllocationService._fold(bits, quantity, operator.and_)
+        if quantity > 1:
+            # Drop blocks with a row start after their first seat
+            starts &= ~SeatAllocationService._fold(data['row_starts'] >> 1, quantity - 1, operator.or_)
+        return starts
+
+    @staticmethod
+    def find_block(data, quantity):
+        """First position of the best block of a section, or None"""
+        starts = SeatAllocationService.block_starts(data, quantity)
+        if not starts:
+            return None
+
+        # The row of the front-most block, from the row starts around it
+        first = (starts & -starts).bit_length() - 1
+        row_starts = data['row_starts']
+        row_start = (row_starts & ((2 << first) - 1)).bit_length() - 1
+        following = row_starts >> (first + 1)
+        row_end = first + (following & -following).bit_length() if following else data['seats']
+
+        # The block nearest the middle of that row
+        candidates = starts & ((1 << row_end) - 1)
+        middle = row_start + (row_end - row_start - quantity) // 2
+        below = candidates & ((2 << middle) - 1)
+        above = candidates >> middle
+        best_below = below.bit_length() - 1 if below else None
+        best_above = middle + (above & -above).bit_length() - 1 if above else None
+        if best_below is None:
+            return best_above
+        if best_above is None or middle - best_below <= best_above - middle:
+            return best_below
+        return best_above
+
+    @staticmethod
+    def best_available(sections, quantity, preference=None):
+        """
+        Return (section, position) of the best block of `quantity` seats in
+        the seat map `sections`, trying sections in `preference` order (all
+        sections in label order if not given), or None if there is no such block
+        """
+        for section in preference or sorted(sections, key=SeatMapService.row_order):
+            data = sections.get(section)
+            if data is None or data['available'] < quantity:
+                continue
+            position = SeatAllocationService.find_block(data, quantity)
+            if position is not None:
+                return section, position
+        return None
+
+    @staticmethod
+    def seat_filter(data, position, quantity):
+        """Ticket filter kwargs for the `quantity` seats from `position` of a section"""
+        offset = 0
+        for row, length in data['rows']:
+            if position < offset + length:
+                first = position - offset + 1
+                return {'row': row, 'seat_index__range': (first, first + quantity - 1)}
+            offset += length
+        first = position - offset
+        return {'seat_index__isnull': True, 'seat_number__in': data['unnumbered'][first:first + quantity]}
+
+    @staticmethod
+    def without(data, position, quantity):
+        """Copy of a section with a block marked unavailable"""
+        bits = int.from_bytes(data['bitmap'], 'little') & ~(((1 << quantity) - 1) << position)
+        return {
+            **data,
+            'available': bits.bit_count(),
+            'bitmap': bits.to_bytes(len(data['bitmap']), 'little'),
+        }
@@ -1,29 +1,102 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models import QuerySet
+from django.db.models.signals import post_init, post_save, post_delete, pre_delete, m2m_changed
 from django.dispatch import receiver
-from .models import Booking
+from .models import Ticket, Booking
+from .services import BookingService, BookingCancellationService, SeatMapService
+from events.models import Event, EventInventory, EventType, Venue
+from events.signals import inventory_changed
 from pricing.services import DynamicPricingService
 
 
+def deletes_events(origin):
+    """Whether a delete started from events (or their venue or type), taking all their tickets with them"""
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model in (Event, Venue, EventType)
+
+
+@receiver(post_save, sender=Event)
+def create_event_inventory(sender, instance, created, **kwargs):
+    """Start new events with zeroed counters, so ticket writes always have a row to adjust"""
+    if created:
+        EventInventory.objects.get_or_create(event=instance)
+
+
+@receiver(post_init, sender=Ticket)
+def remember_ticket_status(sender, instance, **kwargs):
+    """Remember the loaded status so saves can adjust the event counters"""
+    # Read from __dict__ so deferred status fields are not fetched
+    instance._loaded_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Ticket)
+def update_inventory_on_ticket_save(sender, instance, created, **kwargs):
+    """Keep EventInventory and the seat maps in step with individually saved tickets"""
+    if created:
+        EventInventory.adjust(instance.event_id, total=1, **{instance.status: 1})
+        # A new seat changes the layout the bitmaps were built from
+        SeatMapService.invalidate([instance.event_id])
+    elif instance._loaded_status and instance._loaded_status != instance.status:
+        EventInventory.transition(instance.event_id, instance._loaded_status, instance.status)
+        if 'available' in (instance._loaded_status, instance.status):
+            SeatMapService.mark(instance.event_id, [instance], available=instance.status == 'available')
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Event)
+def drop_seat_maps_on_event_delete(sender, instance, **kwargs):
+    """Bump the deleted event's seat map version once, rather than once per cascaded ticket"""
+    SeatMapService.bump(instance.pk)
+
+
+@receiver(post_delete, sender=Ticket)
+def update_inventory_on_ticket_delete(sender, instance, origin=None, **kwargs):
+    """
+    Remove an individually deleted ticket from the event counters and seat maps.
+
+    Queryset deletes adjust the counters once per event themselves, and
+    tickets cascading from a deleted event go together with its counters.
+    """
+    if not isinstance(origin, Ticket):
+        return
+    EventInventory.adjust(instance.event_id, total=-1, **{instance._loaded_status or instance.status: -1})
+    SeatMapService.invalidate([instance.event_id])
+
+
+@receiver(inventory_changed, sender=EventInventory)
+def invalidate_seat_maps_on_rebuild(sender, event_ids, rebuilt=False, **kwargs):
+    """Counters recomputed after bulk ticket changes mean the bitmaps may be stale too"""
+    if rebuilt:
+        SeatMapService.invalidate(event_ids)
+
+
 @receiver(post_save, sender=Booking)
 def update_pricing_on_booking(sender, instance, created, **kwargs):
     """Update ticket prices when a new booking is created"""
     if created and instance.status == 'confirmed':
-        # Mark tickets as booked
-        for ticket in instance.tickets.all():
-            ticket.status = 'booked'
-            ticket.save()
-        
-        # Update pricing for the event
-        DynamicPricingService.update_ticket_prices(instance.event)
-
-
-@receiver(post_delete, sender=Booking)
-def update_pricing_on_cancellation(sender, instance, **kwargs):
-    """Update ticket prices when a booking is cancelled"""
-    # Mark tickets as available again
-    for ticket in instance.tickets.all():
-        ticket.status = 'available'
-        ticket.save()
-    
-    # Update pricing for the event
-    DynamicPricingService.update_ticket_prices(instance.event)
\ No newline at end of file
+        # Reprice the event once the booking is committed
+        DynamicPricingService.schedule_reprice(instance.event)
+
+
+@receiver(m2m_changed, sender=Booking.tickets.through)
+def book_tickets_added_to_booking(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Mark the tickets added to a confirmed booking as booked with one UPDATE.
+
+    BookingService books its seats before linking them, so there this finds
+    nothing to do; it covers bookings put together elsewhere, e.g. the admin.
+    """
+    if action != 'post_add' or reverse or not pk_set or instance.status != 'confirmed':
+        return
+    BookingService.book_tickets(instance.event_id, pk_set)
+
+
+@receiver(pre_delete, sender=Booking)
+def release_tickets_on_booking_delete(sender, instance, origin=None, **kwargs):
+    """Give the seats of a deleted active booking back, while its ticket links still exist"""
+    if deletes_events(origin):
+        # The seats are deleted along with the event
+        return
+    if instance.status in BookingService.ACTIVE_BOOKING_STATUSES:
+        BookingCancellationService.release_tickets(Booking.objects.filter(pk=instance.pk))
+        # Reprice the event once the cancellation is committed
+        DynamicPricingService.schedule_reprice(instance.event)
@@ -1 +1,902 @@
-from django.test import TestCase
\ No newline at end of file
+import base64
+import os
+import shutil
+import tempfile
+from datetime import time, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from artists.models import Genre, Artist, Album, Track
+from events.models import Event, Venue, EventType, EventInventory
+from .import_engine import DataImporter
+from .import_scheduler import ImportScheduler, ImportStageError
+from .import_sources import open_source, sniff_format, CSVSource, XLSXSource
+from .models import (
+    Customer, Ticket, Booking, FanInteraction, QueueEntry, IdempotencyRecord, ImportRun, ImportCheckpoint,
+    QuarantinedRow
+)
+from .services import (
+    BookingService, SeatHoldService, SeatMapService, SeatAllocationService, TicketInventoryService,
+    WaitingRoomService, BookingCancellationService, BookingError, TicketsUnavailableError, AdmissionRequiredError
+)
+from pricing.services import DynamicPricingService
+
+
+class TicketingTestCase(TestCase):
+    """Event with ten available seats and one customer"""
+
+    def setUp(self):
+        venue = Venue.objects.create(
+            name='Test Arena', location='Mumbai', address='123 Main St',
+            city='Mumbai', state='Maharashtra', capacity=100
+        )
+        self.event = Event.objects.create(
+            name='Rock Concert',
+            venue=venue,
+            event_type=EventType.objects.create(name='Concert'),
+            date=timezone.now().date() + timedelta(days=30),
+            start_time=time(20, 0),
+            end_time=time(23, 0),
+            ticket_price=Decimal('1000.00'),
+            max_tickets_per_customer=4
+        )
+        self.tickets = Ticket.objects.bulk_create([
+            Ticket(
+                event=self.event,
+                seat_number=f'A-{seat:03d}',
+                section='A',
+                base_price=Decimal('1000.00'),
+                final_price=Decimal('1000.00')
+            )
+            for seat in range(1, 11)
+        ])
+        EventInventory.rebuild([self.event.id])
+        self.user = User.objects.create_user(username='customer1', password='customer123')
+        self.customer = Customer.objects.create(user=self.user)
+
+
+class BookingServiceTests(TicketingTestCase):
+    """Booking service and endpoint tests"""
+
+    def test_create_booking_claims_tickets(self):
+        booking = BookingService.create_booking(self.customer, self.event, quantity=3)
+        self.assertEqual(booking.status, 'confirmed')
+        self.assertEqual(booking.tickets.count(), 3)
+        self.assertEqual(booking.total_amount, Decimal('3000.00'))
+        self.assertEqual(Ticket.objects.filter(event=self.event, status='booked').count(), 3)
+
+    def test_specific_seats_cannot_be_booked_twice(self):
+        seat_ids = [self.tickets[0].id, self.tickets[1].id]
+        BookingService.create_booking(self.customer, self.event, ticket_ids=seat_ids)
+        other = Customer.objects.create(user=User.objects.create_user(username='customer2'))
+        with self.assertRaises(TicketsUnavailableError):
+            BookingService.create_booking(other, self.event, ticket_ids=seat_ids)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_max_tickets_per_customer_enforced(self):
+        BookingService.create_booking(self.customer, self.event, quantity=3)
+        with self.assertRaises(BookingError):
+            BookingService.create_booking(self.customer, self.event, quantity=2)
+        self.assertEqual(Ticket.objects.filter(status='booked').count(), 3)
+
+    def test_sold_out_event_is_rejected(self):
+        Ticket.objects.filter(event=self.event).update(status='booked')
+        with self.assertRaises(TicketsUnavailableError):
+            BookingService.create_booking(self.customer, self.event, quantity=1)
+
+    def test_booking_query_count_does_not_depend_on_seats(self):
+        self.event.max_tickets_per_customer = 10
+        self.event.save()
+        Ticket.objects.create(
+            event=self.event, seat_number='B-001', section='B',
+            base_price=Decimal('1000.00'), final_price=Decimal('1000.00')
+        )
+        other = Customer.objects.create(user=User.objects.create_user(username='customer2'))
+        with CaptureQueriesContext(connection) as one_seat:
+            BookingService.create_booking(other, self.event, quantity=1)
+        with self.assertNumQueries(len(one_seat)):
+            booking = BookingService.create_booking(self.customer, self.event, quantity=10)
+        self.assertEqual(booking.tickets.filter(status='booked').count(), 10)
+
+    def test_tickets_linked_outside_the_service_are_booked(self):
+        booking = Booking.objects.create(
+            customer=self.customer, event=self.event, total_amount=Decimal('2000.00'), status='confirmed'
+        )
+        with self.assertNumQueries(7):
+            booking.tickets.add(*self.tickets[:2])
+        self.assertEqual(Ticket.objects.filter(event=self.event, status='booked').count(), 2)
+        self.assertEqual(EventInventory.objects.get(event=self.event).booked_tickets, 2)
+
+    def test_linking_held_tickets_clears_their_hold(self):
+        hold = SeatHoldService.create_hold(self.customer, self.event, quantity=2)
+        booking = Booking.objects.create(
+            customer=self.customer, event=self.event, total_amount=Decimal('2000.00'), status='confirmed'
+        )
+        booking.tickets.add(*hold.tickets.all())
+        self.assertFalse(hold.tickets.exists())
+        self.assertEqual(booking.tickets.filter(status='booked').count(), 2)
+        self.assertEqual(EventInventory.objects.get(event=self.event).held_tickets, 0)
+
+    def test_booking_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.post('/api/customers/book/', {
+            'event_id': self.event.id,
+            'quantity': 2
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['tickets']), 2)
+
+        response = client.post('/api/customers/book/', {
+            'event_id': self.event.id,
+            'ticket_ids': [response.data['tickets'][0]['id']]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_booking_endpoint_rejects_malformed_requests(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        for data in [
+            {'event_id': 'abc', 'quantity': 1},
+            {'quantity': 1},
+            {'event_id': self.event.id, 'ticket_ids': self.tickets[0].id},
+            {'event_id': self.event.id, 'ticket_ids': 'x'},
+            {'event_id': self.event.id, 'hold_id': 'abc'},
+            [self.event.id],
+        ]:
+            response = client.post('/api/customers/book/', data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, data)
+        self.assertFalse(Booking.objects.exists())
+
+
+class SeatHoldServiceTests(TicketingTestCase):
+    """Seat hold tests"""
+
+    def test_hold_reserves_seats_until_booked(self):
+        hold = SeatHoldService.create_hold(self.customer, self.event, quantity=2)
+        self.assertEqual(hold.tickets.filter(status='held').count(), 2)
+        self.assertEqual(self.event.available_tickets_count, 8)
+        self.assertEqual(self.event.held_tickets_count, 2)
+
+        booking = BookingService.create_booking(self.customer, self.event, hold=hold)
+        hold.refresh_from_db()
+        self.assertEqual(hold.status, 'converted')
+        self.assertEqual(booking.tickets.filter(status='booked').count(), 2)
+
+    def test_holds_count_towards_ticket_limit(self):
+        SeatHoldService.create_hold(self.customer, self.event, quantity=3)
+        with self.assertRaises(BookingError):
+            BookingService.create_booking(self.customer, self.event, quantity=2)
+
+    def test_expired_holds_are_released_in_bulk(self):
+        hold = SeatHoldService.create_hold(self.customer, self.event, quantity=2, ttl=timedelta(seconds=-1))
+        other = Customer.objects.create(user=User.objects.create_user(username='customer2'))
+        active = SeatHoldService.create_hold(other, self.event, quantity=1)
+
+        holds, tickets = SeatHoldService.release_expired_holds()
+        self.assertEqual((holds, tickets), (1, 2))
+        hold.refresh_from_db()
+        self.assertEqual(hold.status, 'expired')
+        self.assertEqual(active.tickets.filter(status='held').count(), 1)
+        with self.assertRaises(TicketsUnavailableError):
+            BookingService.create_booking(self.customer, self.event, hold=hold)
+
+
+class SeatMapTests(TicketingTestCase):
+    """Availability bitmap tests"""
+
+    def setUp(self):
+        super().setUp()
+        caches['default'].clear()
+
+    def available_seats(self, section):
+        """Seat positions whose bit is set, from a fresh read of the stored bitmaps"""
+        caches['default'].clear()
+        bits = int.from_bytes(SeatMapService.sections(self.event.id)[section]['bitmap'], 'little')
+        return {position for position in range(bits.bit_length()) if bits >> position & 1}
+
+    def test_bitmap_follows_bookings_and_holds(self):
+        self.assertEqual(SeatMapService.sections(self.event.id)['A']['unnumbered'][:2], ['A-001', 'A-002'])
+        self.assertEqual(self.available_seats('A'), set(range(10)))
+
+        BookingService.create_booking(self.customer, self.event, quantity=2)
+        hold = SeatHoldService.create_hold(self.customer, self.event, ticket_ids=[self.tickets[9].id])
+        self.assertEqual(self.available_seats('A'), set(range(2, 9)))
+
+        SeatHoldService.release_hold(hold)
+        self.assertEqual(self.available_seats('A'), set(range(2, 10)))
+        self.assertEqual(SeatMapService.sections(self.event.id)['A']['available'], 8)
+
+    def test_releasing_a_converted_hold_changes_nothing(self):
+        hold = SeatHoldService.create_hold(self.customer, self.event, ticket_ids=[self.tickets[9].id])
+        BookingService.create_booking(self.customer, self.event, hold=hold)
+        self.assertEqual(SeatHoldService.release_hold(hold), 0)
+        self.assertEqual(self.available_seats('A'), set(range(9)))
+        self.assertEqual(self.event.available_tickets_count, 9)
+
+    def test_reads_do_not_touch_the_ticket_table(self):
+        SeatMapService.sections(self.event.id)
+        BookingService.create_booking(self.customer, self.event, quantity=1)
+        with CaptureQueriesContext(connection) as queries:
+            SeatMapService.sections(self.event.id)
+            SeatMapService.sections(self.event.id)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn(Ticket._meta.db_table, queries[0]['sql'])
+
+    def test_seats_are_numbered_row_by_row(self):
+        self.event.tickets.all().delete()
+        TicketInventoryService.generate_inventory(self.event, capacity=120, seats_per_row=10, rows_per_section=4)
+        section = SeatMapService.sections(self.event.id)['Section B']
+        self.assertEqual(section['rows'], [['A', 10], ['B', 10], ['C', 10], ['D', 10]])
+
+        seat = Ticket.objects.get(event=self.event, seat_number='B-C-7')
+        SeatHoldService.create_hold(self.customer, self.event, ticket_ids=[seat.id], ttl=timedelta(seconds=-1))
+        self.assertNotIn(26, self.available_seats('Section B'))
+        SeatHoldService.release_expired_holds()
+        self.assertIn(26, self.available_seats('Section B'))
+
+    def test_saved_and_added_tickets_are_tracked(self):
+        SeatMapService.sections(self.event.id)
+        ticket = self.tickets[4]
+        ticket.status = 'booked'
+        ticket.save()
+        self.assertNotIn(4, self.available_seats('A'))
+
+        Ticket.objects.create(
+            event=self.event, seat_number='B-001', section='B',
+            base_price=Decimal('1000.00'), final_price=Decimal('1000.00')
+        )
+        self.assertEqual(set(SeatMapService.sections(self.event.id)), {'A', 'B'})
+        self.assertNotIn(4, self.available_seats('A'))
+
+    def test_seat_map_endpoint(self):
+        BookingService.create_booking(self.customer, self.event, quantity=3)
+        response = APIClient().get(f'/api/customers/events/{self.event.id}/seat-map/', {'section': 'A'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        section = response.data['sections'][0]
+        self.assertEqual((section['section'], section['seats'], section['available']), ('A', 10, 7))
+        self.assertEqual(base64.b64decode(section['bitmap']), bytes([0b11111000, 0b11]))
+
+
+class SeatAllocationTests(TicketingTestCase):
+    """Best available seat allocation tests"""
+
+    def setUp(self):
+        super().setUp()
+        caches['default'].clear()
+
+    def section(self, rows, available):
+        """In-memory seat map section with the given row lengths and available positions"""
+        rows = [[TicketInventoryService.label(i), length] for i, length in enumerate(rows)]
+        seats = sum(length for _, length in rows)
+        bits = sum(1 << position for position in available)
+        return {
+            'rows': rows,
+            'unnumbered': [],
+            'seats': seats,
+            'available': len(available),
+            'bitmap': bits.to_bytes((seats + 7) // 8, 'little'),
+            'row_starts': SeatMapService.row_starts(rows, []),
+        }
+
+    def test_blocks_do_not_span_rows(self):
+        # Seats 3-4 of row A and 0-1 of row B are adjacent bits but not adjacent seats
+        data = self.section([5, 5], {3, 4, 5, 6, 8})
+        self.assertIsNone(SeatAllocationService.find_block(data, 3))
+        self.assertEqual(SeatAllocationService.find_block(data, 2), 3)
+
+    def test_front_row_then_middle_of_the_row_wins(self):
+        data = self.section([10, 10], {0, 1, 2, 5, 6, 7} | set(range(10, 20)))
+        self.assertEqual(SeatAllocationService.find_block(data, 3), 5)
+        self.assertEqual(SeatAllocationService.find_block(data, 4), 13)
+
+    def test_section_preference_order(self):
+        sections = {'A': self.section([4], {0, 1}), 'B': self.section([4], {0, 1, 2, 3})}
+        self.assertEqual(SeatAllocationService.best_available(sections, 2), ('A', 0))
+        self.assertEqual(SeatAllocationService.best_available(sections, 2, ['B', 'A']), ('B', 1))
+        self.assertEqual(SeatAllocationService.best_available(sections, 3), ('B', 0))
+        self.assertIsNone(SeatAllocationService.best_available(sections, 5))
+
+    def test_sections_in_label_order(self):
+        sections = {'Section AA': self.section([4], {0, 1}), 'Section B': self.section([4], {0, 1})}
+        self.assertEqual(SeatAllocationService.best_available(sections, 2), ('Section B', 0))
+
+    def test_booking_takes_adjacent_seats(self):
+        BookingService.create_booking(self.customer, self.event, ticket_ids=[self.tickets[2].id, self.tickets[3].id])
+        other = Customer.objects.create(user=User.objects.create_user(username='customer2'))
+        booking = BookingService.create_booking(other, self.event, quantity=4, together=True)
+        self.assertEqual(
+            sorted(booking.tickets.values_list('seat_number', flat=True)),
+            ['A-005', 'A-006', 'A-007', 'A-008']
+        )
+
+    def test_stale_seat_map_falls_back_to_the_next_block(self):
+        self.event.tickets.all().delete()
+        TicketInventoryService.generate_inventory(self.event, capacity=20, seats_per_row=5)
+        SeatMapService.sections(self.event.id)
+        # Sold behind the seat map's back
+        Ticket.objects.filter(event=self.event, row='A').update(status='booked')
+
+        hold = SeatHoldService.create_hold(self.customer, self.event, quantity=3, together=True)
+        self.assertEqual(
+            sorted(hold.tickets.values_list('seat_number', flat=True)),
+            ['A-B-2', 'A-B-3', 'A-B-4']
+        )
+
+    def test_no_adjacent_seats(self):
+        Ticket.objects.filter(id__in=[ticket.id for ticket in self.tickets[1::2]]).update(status='booked')
+        SeatMapService.invalidate([self.event.id])
+        with self.assertRaises(TicketsUnavailableError):
+            BookingService.create_booking(self.customer, self.event, quantity=2, together=True)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_seat_allocation', '--capacity', '2000', '--iterations', '5', stdout=out)
+        self.assertIn('checkerboard', out.getvalue())
+
+
+class WaitingRoomTests(TicketingTestCase):
+    """Waiting room admission tests"""
+
+    def setUp(self):
+        super().setUp()
+        self.room = WaitingRoomService.open_room(self.event, admit_per_minute=2)
+        self.others = [
+            Customer.objects.create(user=User.objects.create_user(username=f'fan{i}'))
+            for i in range(3)
+        ]
+
+    def test_customers_are_admitted_in_order_at_the_room_rate(self):
+        first, _ = WaitingRoomService.join(self.customer, self.room)
+        entries = [WaitingRoomService.join(customer, self.room)[0] for customer in self.others]
+        # The opening minute's allowance admits two customers straight away
+        self.assertEqual(first.status, 'admitted')
+        self.assertEqual([entry.status for entry in entries], ['admitted', 'waiting', 'waiting'])
+        self.assertEqual(WaitingRoomService.status(entries[2])['position'], 2)
+        self.assertEqual(WaitingRoomService.status(entries[2])['eta_seconds'], 60)
+
+        later = timezone.now() + timedelta(seconds=30)
+        self.assertEqual(WaitingRoomService.admit(self.room, now=later), 1)
+        entries[1].refresh_from_db()
+        self.assertEqual(entries[1].status, 'admitted')
+        self.assertEqual(WaitingRoomService.admit(self.room, now=later), 0)
+
+    def test_priority_entries_go_first(self):
+        self.room.last_admission_at = timezone.now()
+        self.room.save()
+        regular, _ = WaitingRoomService.join(self.customer, self.room)
+        vip, _ = WaitingRoomService.join(self.others[0], self.room, priority=10)
+        WaitingRoomService.admit(self.room, now=timezone.now() + timedelta(seconds=30))
+        regular.refresh_from_db()
+        vip.refresh_from_db()
+        self.assertEqual((vip.status, regular.status), ('admitted', 'waiting'))
+
+    def test_booking_requires_and_uses_up_the_token(self):
+        with self.assertRaises(AdmissionRequiredError):
+            BookingService.create_booking(self.customer, self.event, quantity=1)
+
+        token = WaitingRoomService.status(WaitingRoomService.join(self.customer, self.room)[0])['token']
+        SeatHoldService.create_hold(self.customer, self.event, quantity=1, admission_token=token)
+        BookingService.create_booking(self.customer, self.event, quantity=1, admission_token=token)
+        self.assertEqual(QueueEntry.objects.get(customer=self.customer).status, 'used')
+        with self.assertRaises(AdmissionRequiredError):
+            BookingService.create_booking(self.customer, self.event, quantity=1, admission_token=token)
+
+    def test_expired_tokens_are_refused(self):
+        token = WaitingRoomService.status(WaitingRoomService.join(self.customer, self.room)[0])['token']
+        later = timezone.now() + timedelta(seconds=self.room.admission_ttl_seconds + 1)
+        self.assertEqual(WaitingRoomService.admit_all(now=later), (0, 1))
+        with self.assertRaises(AdmissionRequiredError):
+            BookingService.create_booking(self.customer, self.event, quantity=1, admission_token=token)
+
+        entry, created = WaitingRoomService.join(self.customer, self.room)
+        self.assertFalse(created)
+        self.assertNotEqual(entry.token, token)
+
+    def test_queue_endpoints(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.post(f'/api/customers/events/{self.event.id}/queue/')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['status'], 'admitted')
+        self.assertEqual(client.post(f'/api/customers/events/{self.event.id}/queue/').status_code, status.HTTP_200_OK)
+
+        response = client.post('/api/customers/book/', {'event_id': self.event.id, 'quantity': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = client.post(
+            '/api/customers/book/',
+            {'event_id': self.event.id, 'quantity': 1},
+            format='json',
+            HTTP_X_ADMISSION_TOKEN=client.get(f'/api/customers/events/{self.event.id}/queue/').data['token']
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class IdempotentBookingTests(TicketingTestCase):
+    """Idempotency-Key tests"""
+
+    def setUp(self):
+        super().setUp()
+        caches['default'].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def book(self, key, quantity=2):
+        return self.client.post(
+            '/api/customers/book/',
+            {'event_id': self.event.id, 'quantity': quantity},
+            format='json',
+            HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retries_replay_the_first_response(self):
+        first = self.book('checkout-1')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', first)
+
+        with self.assertNumQueries(0):
+            retry = self.book('checkout-1')
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_replay_survives_the_cache(self):
+        first = self.book('checkout-1')
+        caches['default'].clear()
+        retry = self.book('checkout-1')
+        self.assertEqual((retry.status_code, retry.data), (first.status_code, first.data))
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_errors_are_replayed_too(self):
+        self.assertEqual(self.book('too-many', quantity=5).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.book('too-many', quantity=5).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(IdempotencyRecord.objects.get(key='too-many').status_code, 400)
+
+    def test_retryable_errors_release_the_key(self):
+        Ticket.objects.filter(event=self.event).update(status='booked')
+        self.assertEqual(self.book('checkout-1').status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(IdempotencyRecord.objects.exists())
+
+        Ticket.objects.filter(event=self.event).update(status='available')
+        retry = self.book('checkout-1')
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', retry)
+
+    def test_retry_with_an_admission_token_books(self):
+        WaitingRoomService.open_room(self.event)
+        self.assertEqual(self.book('checkout-1').status_code, status.HTTP_403_FORBIDDEN)
+
+        token = self.client.post(f'/api/customers/events/{self.event.id}/queue/').data['token']
+        response = self.client.post(
+            '/api/customers/book/',
+            {'event_id': self.event.id, 'quantity': 2},
+            format='json',
+            HTTP_IDEMPOTENCY_KEY='checkout-1',
+            HTTP_X_ADMISSION_TOKEN=token
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_key_reused_for_a_different_request(self):
+        self.book('checkout-1')
+        response = self.book('checkout-1', quantity=1)
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_different_keys_book_separately(self):
+        self.book('checkout-1')
+        self.book('checkout-2')
+        self.assertEqual(Booking.objects.count(), 2)
+
+    def test_prune_command(self):
+        self.book('checkout-1')
+        IdempotencyRecord.objects.update(created_at=timezone.now() - timedelta(days=2))
+        call_command('prune_idempotency_records', stdout=StringIO())
+        self.assertFalse(IdempotencyRecord.objects.exists())
+
+
+class BookingCancellationTests(TicketingTestCase):
+    """Bulk cancellation and refund tests"""
+
+    def setUp(self):
+        super().setUp()
+        self.event.max_tickets_per_customer = 10
+        self.event.save()
+        # Analytics deltas are applied once the bookings commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bookings = [
+                BookingService.create_booking(self.customer, self.event, quantity=2)
+                for _ in range(4)
+            ]
+
+    def test_cancelled_seats_go_back_on_sale(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            bookings, tickets = BookingCancellationService.cancel_bookings(
+                [booking.id for booking in self.bookings[:3]]
+            )
+        self.assertEqual((bookings, tickets), (3, 6))
+        self.assertEqual(Booking.objects.filter(status='cancelled').count(), 3)
+        inventory = EventInventory.objects.get(event=self.event)
+        self.assertEqual((inventory.available_tickets, inventory.booked_tickets), (8, 2))
+        analytics = self.event.analytics
+        analytics.refresh_from_db()
+        self.assertEqual((analytics.total_bookings, analytics.total_revenue), (1, Decimal('2000.00')))
+
+    def test_statement_count_does_not_grow_with_the_bookings(self):
+        with CaptureQueriesContext(connection) as one:
+            BookingCancellationService.cancel_bookings([self.bookings[0].id])
+        with CaptureQueriesContext(connection) as three:
+            BookingCancellationService.cancel_bookings([booking.id for booking in self.bookings[1:]])
+        self.assertEqual(len(one), len(three))
+
+    def test_inactive_bookings_are_left_alone(self):
+        BookingCancellationService.cancel_bookings(Booking.objects.filter(pk=self.bookings[0].pk), refund=True)
+        rebooked = BookingService.create_booking(self.customer, self.event, ticket_ids=[
+            ticket.id for ticket in self.bookings[0].tickets.all()
+        ])
+        self.assertEqual(BookingCancellationService.cancel_bookings(Booking.objects.all(), refund=True)[0], 4)
+        self.bookings[0].refresh_from_db()
+        rebooked.refresh_from_db()
+        self.assertEqual((self.bookings[0].status, rebooked.status), ('refunded', 'refunded'))
+
+    def test_cancel_event_retires_seats(self):
+        bookings, tickets = BookingCancellationService.cancel_event(self.event)
+        self.assertEqual((bookings, tickets), (4, 8))
+        self.event.refresh_from_db()
+        self.assertFalse(self.event.is_active)
+        self.assertEqual(Ticket.objects.filter(event=self.event, status='cancelled').count(), 8)
+        self.assertEqual(Booking.objects.filter(status='refunded').count(), 4)
+
+    def test_deleting_a_booking_releases_its_seats(self):
+        self.bookings[0].delete()
+        self.assertEqual(Ticket.objects.filter(event=self.event, status='available').count(), 4)
+        self.assertEqual(EventInventory.objects.get(event=self.event).available_tickets, 4)
+
+    def test_command(self):
+        call_command('cancel_bookings', '--events', str(self.event.id), '--refund', stdout=StringIO())
+        self.assertEqual(Booking.objects.filter(status='refunded').count(), 4)
+        self.assertEqual(Ticket.objects.filter(event=self.event, status='available').count(), 10)
+
+
+class TicketInventoryTests(TicketingTestCase):
+    """Bulk seat map generation tests"""
+
+    def setUp(self):
+        super().setUp()
+        self.event.tickets.all().delete()
+
+    def test_seat_map_is_laid_out_by_section_and_row(self):
+        created = TicketInventoryService.generate_inventory(
+            self.event, capacity=120, seats_per_row=10, rows_per_section=4
+        )
+
+        self.assertEqual(created, 120)
+        self.assertEqual(
+            set(Ticket.objects.filter(event=self.event).values_list('section', flat=True)),
+            {'Section A', 'Section B', 'Section C'}
+        )
+        ticket = Ticket.objects.get(event=self.event, seat_number='B-C-7')
+        self.assertEqual((ticket.section, ticket.row, ticket.seat_index), ('Section B', 'C', 7))
+        inventory = EventInventory.objects.get(event=self.event)
+        self.assertEqual((inventory.total_tickets, inventory.available_tickets), (120, 120))
+
+    def test_generating_again_only_fills_missing_seats(self):
+        TicketInventoryService.generate_inventory(self.event, capacity=50)
+        with self.assertNumQueries(10):
+            created = TicketInventoryService.generate_inventory(self.event, capacity=60)
+        self.assertEqual(created, 10)
+        self.assertEqual(EventInventory.objects.get(event=self.event).total_tickets, 60)
+
+    def test_tickets_start_at_the_current_tier(self):
+        DynamicPricingService.create_default_price_tiers(self.event, self.user, self.event.ticket_price)
+        TicketInventoryService.generate_inventory(self.event, capacity=10)
+        tier = DynamicPricingService.calculate_current_tier(self.event)
+        ticket = Ticket.objects.filter(event=self.event).first()
+        self.assertEqual((ticket.current_tier, ticket.final_price), (tier, tier.price))
+        self.assertEqual(ticket.base_price, self.event.ticket_price)
+
+    def test_row_labels_continue_past_z(self):
+        self.assertEqual(
+            [TicketInventoryService.label(index) for index in (0, 25, 26, 701, 702)],
+            ['A', 'Z', 'AA', 'ZZ', 'AAA']
+        )
+
+    def test_command_fills_events_without_tickets(self):
+        call_command('generate_tickets', '--without-tickets', stdout=StringIO())
+        self.assertEqual(Ticket.objects.filter(event=self.event).count(), self.event.venue.capacity)
+
+
+class ImportTestCase(TestCase):
+    """A data directory with a small copy of every import file"""
+
+    FILES = {
+        'Artists.xlsx': 'popularity,followers,genres,artist_id,name\n'
+                        '82,100,"bollywood, desi",A1,Atif Aslam\n'
+                        '60,50,,A2,Wajid\n',
+        'Albums.xlsx': 'album_id,artist_id,release_date,spotify_url,album_name\n'
+                       'AL1,A1,2024-01-02,,Old Phone\n'
+                       'AL2,A2,not a date,,Lover\n',
+        'Tracks.xlsx': 'track_id,track_number,album_id,duration_ms,track_name\n'
+                       'T1,1,AL1,211224,"Pyar Karda - From ""Lover"""\n'
+                       'T2,2,AL1,250600,Lover\n'
+                       'T3,1,AL2,174000,Kitna Chahe\n'
+                       'T4,1,MISSING,174000,Orphan\n',
+        'Fans.xlsx': 'fan_id,name,email,country\n'
+                     'F1,Fan_1,fan1@example.com,Canada\n'
+                     'F2,Fan_2,fan2@example.com,UK\n',
+        'Events.xlsx': 'event_id,name,location,date,artist_id,revenue\n'
+                       'E1,Atif Aslam Live,London,2099-04-29,A1,20000\n',
+        'Fan_interactions.xlsx': 'fan_id,track_id,type_of_interaction,timestamp\n'
+                                 'F1,T1,shared,2022-12-16 11:23:53\n'
+                                 'F2,T3,liked,2025-01-11 11:23:53\n'
+                                 'F1,T1,shared,2022-12-16 11:23:53\n',
+    }
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.data_dir)
+        for name, content in self.FILES.items():
+            with open(os.path.join(self.data_dir, name), 'w') as f:
+                f.write(content)
+
+    def write_workbook(self, name, rows):
+        from openpyxl import Workbook
+        workbook = Workbook()
+        for row in rows:
+            workbook.active.append(row)
+        path = os.path.join(self.data_dir, name)
+        workbook.save(path)
+        return path
+
+
+class ImportEngineTests(ImportTestCase):
+    """Chunked bulk import tests"""
+
+    def test_skipped_conflicts_are_not_counted_as_written(self):
+        self.assertEqual(DataImporter(self.data_dir).run()['fan_interactions'].written, 2)
+        self.assertEqual(DataImporter(self.data_dir).run()['fan_interactions'].written, 0)
+        self.assertEqual(FanInteraction.objects.count(), 2)
+
+    def test_import_resolves_foreign_keys_in_chunks(self):
+        stats = DataImporter(self.data_dir, chunk_size=2).run()
+
+        self.assertEqual(stats['tracks'].rows, 4)
+        self.assertEqual(stats['tracks'].skipped, 1)
+        self.assertEqual(Artist.objects.get(name='Wajid').genre.name, 'Unknown')
+        self.assertEqual(Album.objects.get(album_name='Old Phone').total_tracks, 2)
+        self.assertEqual(Track.objects.get(track_name='Kitna Chahe').album.artist.name, 'Wajid')
+        self.assertEqual(
+            sorted(FanInteraction.objects.values_list('interaction_type', flat=True)), ['like', 'share']
+        )
+        event = Event.objects.get(name='Atif Aslam Live')
+        self.assertEqual(event.ticket_price, Decimal('200.00'))
+        self.assertEqual(event.artists.get().name, 'Atif Aslam')
+        self.assertEqual(EventInventory.objects.get(event=event).available_tickets, 50)
+
+    def test_new_events_get_default_price_tiers(self):
+        manager = User.objects.create_user(username='manager1')
+        DataImporter(self.data_dir, tier_manager=manager).run()
+
+        event = Event.objects.get(name='Atif Aslam Live')
+        self.assertEqual(event.price_tiers.count(), len(DynamicPricingService.DEFAULT_TIERS))
+        tier = DynamicPricingService.calculate_current_tier(event)
+        self.assertEqual(set(event.tickets.values_list('current_tier', 'final_price')), {(tier.pk, tier.price)})
+
+        DataImporter(self.data_dir, tier_manager=manager).run()
+        self.assertEqual(event.price_tiers.count(), len(DynamicPricingService.DEFAULT_TIERS))
+
+    def test_reimport_is_idempotent(self):
+        DataImporter(self.data_dir).run()
+        counts = [model.objects.count() for model in (Artist, Album, Track, Customer, Event, Ticket, FanInteraction)]
+        DataImporter(self.data_dir).run()
+        self.assertEqual(
+            [model.objects.count() for model in (Artist, Album, Track, Customer, Event, Ticket, FanInteraction)],
+            counts
+        )
+
+    def test_copy_loader_falls_back_to_batched_inserts(self):
+        importer = DataImporter(self.data_dir, loader='copy')
+        self.assertFalse(importer.uses_copy(FanInteraction))
+        importer.run()
+        self.assertEqual(Track.objects.count(), 3)
+        self.assertEqual(FanInteraction.objects.count(), 2)
+
+
+class ImportSchedulerTests(ImportTestCase):
+    """Dependency-aware import scheduling tests"""
+
+    def test_stages_are_ordered_after_their_dependencies(self):
+        order = ImportScheduler(DataImporter(self.data_dir), workers=0).order()
+        for entity, _, dependencies in DataImporter.STAGES:
+            for dependency in dependencies:
+                self.assertLess(order.index(dependency), order.index(entity))
+
+    def test_independent_stages_are_ordered_together_largest_first(self):
+        with open(os.path.join(self.data_dir, 'Fans.xlsx'), 'a') as f:
+            f.write(''.join(f'F{n},Fan_{n},fan{n}@example.com,UK\n' for n in range(3, 100)))
+        order = ImportScheduler(DataImporter(self.data_dir), workers=0).order()
+        self.assertEqual(order, ['fans', 'artists', 'albums', 'events', 'tracks', 'fan_interactions'])
+
+    def test_parses_in_process_pool_and_loads_sequentially_on_sqlite(self):
+        scheduler = ImportScheduler(DataImporter(self.data_dir, chunk_size=2), workers=1)
+        self.assertFalse(scheduler.parallel)
+        stats = scheduler.run()
+        self.assertEqual(stats['tracks'].rows, 4)
+        self.assertEqual(Track.objects.count(), 3)
+        self.assertEqual(FanInteraction.objects.count(), 2)
+
+    def test_parse_errors_reach_the_loader_through_the_queue(self):
+        with open(os.path.join(self.data_dir, 'Albums.xlsx'), 'wb') as f:
+            f.write(b'\xd0\xcf\x11\xe0legacy workbook')
+        with self.assertRaises(ImportStageError) as raised:
+            ImportScheduler(DataImporter(self.data_dir, chunk_size=1), workers=2).run()
+
+        self.assertIn('legacy .xls workbook', str(raised.exception.errors['albums']))
+        self.assertEqual(set(raised.exception.errors), {'albums', 'tracks', 'fan_interactions'})
+        self.assertEqual(Customer.objects.count(), 2)
+
+    def test_failed_stage_skips_dependents_and_keeps_committed_stages(self):
+        importer = DataImporter(self.data_dir)
+        with mock.patch.object(importer, 'import_albums_chunk', side_effect=RuntimeError('albums went away')):
+            with self.assertRaises(ImportStageError) as raised:
+                ImportScheduler(importer, workers=0).run()
+
+        self.assertEqual(set(raised.exception.errors), {'albums', 'tracks', 'fan_interactions'})
+        self.assertEqual(Album.objects.count(), 0)
+        self.assertTrue(Artist.objects.exists())
+        self.assertTrue(Customer.objects.exists())
+        self.assertTrue(Event.objects.exists())
+
+
+class DeltaImportTests(ImportTestCase):
+    """Source ID keyed, delta import tests"""
+
+    def test_source_ids_are_stored(self):
+        DataImporter(self.data_dir).run()
+        self.assertEqual(Artist.objects.get(external_id='A1').name, 'Atif Aslam')
+        self.assertEqual(Album.objects.get(external_id='AL2').artist.external_id, 'A2')
+        self.assertEqual(Track.objects.get(external_id='T3').track_name, 'Kitna Chahe')
+        self.assertEqual(Customer.objects.get(external_id='F2').country, 'UK')
+        self.assertEqual(Event.objects.get(external_id='E1').name, 'Atif Aslam Live')
+
+    def test_delta_only_writes_changed_rows(self):
+        DataImporter(self.data_dir).run()
+        with open(os.path.join(self.data_dir, 'Tracks.xlsx'), 'w') as f:
+            f.write(self.FILES['Tracks.xlsx'].replace('T3,1,AL2,174000,Kitna Chahe', 'T3,1,AL2,174000,Kitna Chahe (Live)'))
+        with open(os.path.join(self.data_dir, 'Fans.xlsx'), 'a') as f:
+            f.write('F3,Fan_3,fan3@example.com,India\n')
+
+        stats = DataImporter(self.data_dir, delta=True).run()
+
+        self.assertEqual(stats['artists'].unchanged, 2)
+        self.assertEqual(stats['artists'].written, 0)
+        self.assertEqual((stats['tracks'].written, stats['tracks'].unchanged), (1, 2))
+        self.assertEqual((stats['fans'].written, stats['fans'].unchanged), (1, 2))
+        self.assertEqual(Track.objects.get(external_id='T3').track_name, 'Kitna Chahe (Live)')
+        self.assertEqual(Track.objects.count(), 3)
+        self.assertEqual(Customer.objects.get(external_id='F3').country, 'India')
+        self.assertEqual(FanInteraction.objects.count(), 2)
+
+    def test_rows_imported_before_source_ids_are_adopted(self):
+        genre = Genre.objects.create(name='Unknown')
+        legacy = Artist.objects.create(name='Wajid', genre=genre)
+
+        DataImporter(self.data_dir).run()
+
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.external_id, 'A2')
+        self.assertEqual(Artist.objects.filter(name='Wajid').count(), 1)
+        self.assertEqual(Album.objects.get(external_id='AL2').artist, legacy)
+
+
+class CheckpointedImportTests(ImportTestCase):
+    """Checkpointed, resumable import tests"""
+
+    def setUp(self):
+        super().setUp()
+        self.import_run = ImportRun.objects.create(data_dir=self.data_dir)
+
+    def test_bad_rows_are_quarantined_with_the_reason(self):
+        importer = DataImporter(self.data_dir, chunk_size=10, import_run=self.import_run)
+        import_tracks_chunk = importer.import_tracks_chunk
+
+        def fail_on_bad_name(df):
+            if (df['track_name'] == 'Lover').any():
+                raise ValueError('track name rejected')
+            return import_tracks_chunk(df)
+
+        with mock.patch.object(importer, 'import_tracks_chunk', side_effect=fail_on_bad_name):
+            stats = importer.run()
+
+        self.assertEqual(stats['tracks'].quarantined, 2)
+        self.assertEqual(Track.objects.count(), 2)
+        self.assertEqual(
+            {(row.row_index, row.reason) for row in QuarantinedRow.objects.filter(entity='tracks')},
+            {(1, 'ValueError: track name rejected'), (3, "Unknown album_id 'MISSING'")}
+        )
+        self.assertEqual(QuarantinedRow.objects.get(row_index=3).data['track_name'], 'Orphan')
+        self.assertTrue(ImportCheckpoint.objects.get(run=self.import_run, entity='tracks').completed)
+
+    def test_programming_errors_fail_the_run(self):
+        importer = DataImporter(self.data_dir, chunk_size=10, import_run=self.import_run)
+        with mock.patch.object(importer, 'import_tracks_chunk', side_effect=TypeError('bad transform')):
+            with self.assertRaises(TypeError):
+                importer.run()
+        self.assertFalse(QuarantinedRow.objects.filter(entity='tracks').exists())
+
+    def test_resume_continues_after_the_last_committed_chunk(self):
+        importer = DataImporter(self.data_dir, chunk_size=1, import_run=self.import_run)
+        import_chunk = importer.import_fan_interactions_chunk
+        calls = []
+
+        def fail_on_second_chunk(df):
+            calls.append(len(df))
+            if len(calls) == 2:
+                raise RuntimeError('connection lost')
+            return import_chunk(df)
+
+        with mock.patch.object(importer, 'import_fan_interactions_chunk', side_effect=fail_on_second_chunk):
+            with self.assertRaises(RuntimeError):
+                importer.run()
+        self.assertEqual(FanInteraction.objects.count(), 1)
+        self.assertEqual(ImportCheckpoint.objects.get(entity='fan_interactions').rows_done, 1)
+
+        stats = DataImporter(self.data_dir, chunk_size=1, import_run=self.import_run).run()
+
+        self.assertEqual(stats['tracks'].rows, 0)
+        self.assertNotIn('events', stats)
+        self.assertEqual(stats['fan_interactions'].rows, 2)
+        self.assertEqual(FanInteraction.objects.count(), 2)
+        self.assertEqual(ImportCheckpoint.objects.get(entity='fan_interactions').rows_done, 3)
+
+    def test_changed_file_is_loaded_from_the_start(self):
+        DataImporter(self.data_dir, import_run=self.import_run).run()
+        with open(os.path.join(self.data_dir, 'Fans.xlsx'), 'a') as f:
+            f.write('F3,Fan_3,fan3@example.com,India\n')
+
+        stats = DataImporter(self.data_dir, import_run=self.import_run).run()
+
+        self.assertEqual(stats['fans'].rows, 3)
+        self.assertTrue(Customer.objects.filter(user__email='fan3@example.com').exists())
+
+
+class ImportSourceTests(ImportTestCase):
+    """Streaming CSV/XLSX reader tests"""
+
+    def test_sniffs_real_format(self):
+        csv_path = os.path.join(self.data_dir, 'Fans.xlsx')
+        xlsx_path = self.write_workbook('Real.xlsx', [['fan_id', 'email'], ['F1', 'fan1@example.com']])
+        self.assertEqual(sniff_format(csv_path), 'csv')
+        self.assertEqual(sniff_format(xlsx_path), 'xlsx')
+        self.assertIsInstance(open_source(csv_path), CSVSource)
+        self.assertIsInstance(open_source(xlsx_path), XLSXSource)
+
+    def test_xlsx_batches_are_bounded_and_textual(self):
+        path = self.write_workbook('Tracks.xlsx', [['track_id', 'track_number', 'released']] + [
+            [f'T{i}', i, timezone.datetime(2024, 1, i % 28 + 1)] for i in range(1, 6)
+        ])
+        batches = list(open_source(path).batches(2))
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertEqual(list(batches[2].index), [4])
+        self.assertEqual(batches[0].iloc[0].tolist(), ['T1', '1', '2024-01-02 00:00:00'])
+
+    def test_import_reads_true_workbooks(self):
+        os.remove(os.path.join(self.data_dir, 'Fans.xlsx'))
+        self.write_workbook('Fans.xlsx', [
+            ['fan_id', 'name', 'email', 'country'],
+            ['F1', 'Fan_1', 'fan1@example.com', 'Canada'],
+            ['F2', 'Fan_2', 'fan2@example.com', None],
+        ])
+        DataImporter(self.data_dir, chunk_size=1).run()
+        self.assertEqual(Customer.objects.get(user__email='fan1@example.com').country, 'Canada')
+        self.assertEqual(FanInteraction.objects.count(), 2)
+
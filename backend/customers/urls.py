@@ -9,5 +9,9 @@ app_name = 'customers'
 urlpatterns = [
     path('', include(router.urls)),
     path('book/', views.BookingCreateView.as_view(), name='create-booking'),
+    path('holds/', views.TicketHoldCreateView.as_view(), name='create-hold'),
+    path('holds/<int:hold_id>/', views.TicketHoldDetailView.as_view(), name='hold-detail'),
+    path('events/<int:event_id>/seat-map/', views.SeatMapView.as_view(), name='seat-map'),
+    path('events/<int:event_id>/queue/', views.WaitingRoomView.as_view(), name='waiting-room'),
     path('my-bookings/', views.CustomerBookingsView.as_view(), name='my-bookings'),
 ]
\ No newline at end of file
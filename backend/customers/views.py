@@ -1,14 +1,263 @@
-from django.shortcuts import render
+import base64
+from django.shortcuts import render, get_object_or_404
 from rest_framework import generics
+from rest_framework import status
+from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from events.models import Event
+from .models import Customer, TicketHold, QueueEntry
+from .serializers import BookingSerializer, TicketHoldSerializer
+from .services import (
+    BookingService, SeatHoldService, SeatMapService, WaitingRoomService, IdempotencyService,
+    BookingError, TicketsUnavailableError, AdmissionRequiredError, IdempotencyKeyReusedError
+)
+
+
+TICKET_REQUEST_ERROR = 'event_id and quantity must be integers and ticket_ids a list of integers'
+
+
+def parse_ticket_request(data):
+    """Extract event_id, quantity and ticket_ids from request data; raises TypeError/ValueError if malformed"""
+    if not isinstance(data, dict):
+        raise TypeError('The request body must be an object')
+    event_id = int(data.get('event_id'))
+    quantity = int(data.get('quantity', 0))
+    # Form data repeats the field, JSON sends a list
+    ticket_ids = data.getlist('ticket_ids') if hasattr(data, 'getlist') else data.get('ticket_ids') or []
+    if not isinstance(ticket_ids, list):
+        raise TypeError('ticket_ids must be a list')
+    return event_id, quantity, [int(ticket_id) for ticket_id in ticket_ids]
+
+
+def parse_seating_request(data):
+    """Extract the adjacent seats flag and the section preference order from request data"""
+    together = str(data.get('together', '')).lower() in ('1', 'true', 'yes')
+    sections = data.get('sections') or []
+    if isinstance(sections, str):
+        sections = [sections]
+    return together, [str(section) for section in sections] or None
+
+
+def admission_token(request):
+    """Waiting room admission token from the request body or the X-Admission-Token header"""
+    return request.data.get('admission_token') or request.headers.get('X-Admission-Token')
 
 
 class BookingCreateView(generics.CreateAPIView):
+    """
+    Book tickets for an event.
+
+    Requests with an Idempotency-Key header are booked at most once per
+    customer and key: retries get the first definitive response replayed,
+    flagged with an Idempotent-Replayed header. Responses a retry could
+    change (403, 409) are not kept.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        key = request.headers.get('Idempotency-Key')
+        if key is None:
+            return self.book(request)
+        if not 0 < len(key) <= 255:
+            return Response(
+                {'error': 'Idempotency-Key must be 1 to 255 characters'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        request_hash = IdempotencyService.fingerprint(request.path, request.data, admission_token(request))
+        try:
+            # Retries seen recently are answered without touching the database
+            entry = IdempotencyService.cached(request.user.pk, key)
+            if entry is not None:
+                IdempotencyService.check(entry, request_hash)
+                replayed = True
+            else:
+                customer = request.user.customer_profile
+                entry, replayed = IdempotencyService.respond(
+                    customer, key, request_hash,
+                    lambda: self.respond_with(self.book(request, customer))
+                )
+        except Customer.DoesNotExist:
+            return self.book(request)
+        except IdempotencyKeyReusedError as e:
+            return Response({'error': str(e)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        
+        headers = {'Idempotent-Replayed': 'true'} if replayed else None
+        return Response(entry['response'], status=entry['status_code'], headers=headers)
+    
+    @staticmethod
+    def respond_with(response):
+        return response.status_code, response.data
+    
+    def book(self, request, customer=None):
+        if customer is None:
+            try:
+                customer = request.user.customer_profile
+            except Customer.DoesNotExist:
+                return Response(
+                    {'error': 'Only customers can book tickets'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+        
+        try:
+            event_id, quantity, ticket_ids = parse_ticket_request(request.data)
+            together, sections = parse_seating_request(request.data)
+            hold_id = int(request.data['hold_id']) if request.data.get('hold_id') else None
+        except (TypeError, ValueError):
+            return Response({'error': TICKET_REQUEST_ERROR}, status=status.HTTP_400_BAD_REQUEST)
+        
+        event = get_object_or_404(Event, id=event_id, is_active=True)
+        hold = None
+        if hold_id is not None:
+            hold = get_object_or_404(TicketHold, id=hold_id, customer=customer)
+        
+        try:
+            booking = BookingService.create_booking(
+                customer,
+                event,
+                quantity=quantity,
+                ticket_ids=ticket_ids,
+                hold=hold,
+                payment_reference=request.data.get('payment_reference', ''),
+                special_requests=request.data.get('special_requests', ''),
+                together=together,
+                sections=sections,
+                admission_token=admission_token(request)
+            )
+        except AdmissionRequiredError as e:
+            return Response({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
+        except TicketsUnavailableError as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        except BookingError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(BookingSerializer(booking).data, status=status.HTTP_201_CREATED)
+
+
+class TicketHoldCreateView(generics.CreateAPIView):
+    """Reserve seats for the duration of checkout"""
     permission_classes = [IsAuthenticated]
     
     def post(self, request):
-        # Placeholder for booking creation logic
-        return render(request, 'customers/booking.html')
+        try:
+            customer = request.user.customer_profile
+        except Customer.DoesNotExist:
+            return Response(
+                {'error': 'Only customers can hold tickets'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        try:
+            event_id, quantity, ticket_ids = parse_ticket_request(request.data)
+            together, sections = parse_seating_request(request.data)
+        except (TypeError, ValueError):
+            return Response({'error': TICKET_REQUEST_ERROR}, status=status.HTTP_400_BAD_REQUEST)
+        
+        event = get_object_or_404(Event, id=event_id, is_active=True)
+        
+        try:
+            hold = SeatHoldService.create_hold(
+                customer, event, quantity=quantity, ticket_ids=ticket_ids, together=together, sections=sections,
+                admission_token=admission_token(request)
+            )
+        except AdmissionRequiredError as e:
+            return Response({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
+        except TicketsUnavailableError as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        except BookingError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(TicketHoldSerializer(hold).data, status=status.HTTP_201_CREATED)
+
+
+class TicketHoldDetailView(generics.RetrieveDestroyAPIView):
+    """Inspect or release one of the current customer's holds"""
+    permission_classes = [IsAuthenticated]
+    
+    def get_hold(self, request, hold_id):
+        return get_object_or_404(TicketHold, id=hold_id, customer__user=request.user)
+    
+    def get(self, request, hold_id):
+        return Response(TicketHoldSerializer(self.get_hold(request, hold_id)).data)
+    
+    def delete(self, request, hold_id):
+        SeatHoldService.release_hold(self.get_hold(request, hold_id))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class SeatMapView(generics.GenericAPIView):
+    """
+    Availability of an event's seats as one base64 bitmap per section.
+
+    Bit i (bit i % 8 of byte i // 8) is set while seat i of the section is
+    available; seats are counted row by row in `rows` order, then through
+    `unnumbered`. Served from the seat map cache, never from the ticket rows.
+    """
+    
+    def get(self, request, event_id):
+        event = get_object_or_404(Event, id=event_id, is_active=True)
+        sections = SeatMapService.sections(event.id)
+        
+        wanted = request.query_params.get('section')
+        if wanted is not None:
+            sections = {wanted: sections[wanted]} if wanted in sections else {}
+        
+        return Response({
+            'event_id': event.id,
+            'encoding': 'base64',
+            'bit_order': 'little',
+            'sections': [
+                {
+                    'section': section,
+                    'rows': data['rows'],
+                    'unnumbered': data['unnumbered'],
+                    'seats': data['seats'],
+                    'available': data['available'],
+                    'bitmap': base64.b64encode(data['bitmap']).decode('ascii'),
+                }
+                for section, data in sorted(sections.items(), key=lambda item: SeatMapService.row_order(item[0]))
+            ],
+        })
+
+
+class WaitingRoomView(generics.GenericAPIView):
+    """
+    Join an event's waiting room (POST) or poll the current customer's place
+    in it (GET): position and ETA while waiting, the admission token to pass
+    to booking and hold requests once admitted
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, event_id):
+        try:
+            customer = request.user.customer_profile
+        except Customer.DoesNotExist:
+            return Response(
+                {'error': 'Only customers can join the waiting room'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        event = get_object_or_404(Event, id=event_id, is_active=True)
+        room = WaitingRoomService.active_room(event)
+        if room is None:
+            return Response({'status': 'open'})
+        
+        entry, created = WaitingRoomService.join(customer, room)
+        return Response(
+            WaitingRoomService.status(entry),
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+    
+    def get(self, request, event_id):
+        entry = get_object_or_404(
+            QueueEntry.objects.select_related('room'),
+            room__event_id=event_id,
+            room__is_active=True,
+            customer__user=request.user
+        )
+        if entry.status == 'waiting' and WaitingRoomService.admit(entry.room):
+            entry.refresh_from_db()
+        return Response(WaitingRoomService.status(entry))
 
 
 class CustomerBookingsView(generics.ListAPIView):
@@ -16,4 +265,4 @@ class CustomerBookingsView(generics.ListAPIView):
     
     def get(self, request):
         # Placeholder for customer bookings list
-        return render(request, 'customers/bookings.html')
\ No newline at end of file
+        return render(request, 'customers/bookings.html')
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Event, Venue, EventType, Performs, EventManager
+from .models import Event, Venue, EventType, Performs, EventManager, EventInventory
 
 
 @admin.register(EventType)
@@ -27,11 +27,39 @@ class PerformsInline(admin.TabularInline):
 class EventAdmin(admin.ModelAdmin):
     list_display = ['name', 'date', 'start_time', 'venue', 'event_type', 'ticket_price', 'is_active']
     list_filter = ['date', 'event_type', 'venue__city', 'is_active']
-    search_fields = ['name', 'venue__name']
+    search_fields = ['name', 'venue__name', 'external_id']
     list_editable = ['is_active']
     date_hierarchy = 'date'
     ordering = ['-date', '-start_time']
     inlines = [PerformsInline]
+    actions = ['generate_ticket_inventory', 'cancel_events']
+
+    @admin.action(description='Generate tickets for every seat of the venue')
+    def generate_ticket_inventory(self, request, queryset):
+        from customers.services import TicketInventoryService
+
+        created = 0
+        for event in queryset.select_related('venue'):
+            created += TicketInventoryService.generate_inventory(event)
+        self.message_user(request, f'Created {created} tickets for {queryset.count()} events')
+
+    @admin.action(description='Cancel events and refund all of their bookings')
+    def cancel_events(self, request, queryset):
+        from customers.services import BookingCancellationService
+
+        bookings = tickets = 0
+        for event in queryset:
+            event_bookings, event_tickets = BookingCancellationService.cancel_event(event)
+            bookings += event_bookings
+            tickets += event_tickets
+        self.message_user(request, f'Cancelled {queryset.count()} events, refunding {bookings} bookings ({tickets} tickets)')
+
+
+@admin.register(EventInventory)
+class EventInventoryAdmin(admin.ModelAdmin):
+    list_display = ['event', 'total_tickets', 'available_tickets', 'held_tickets', 'booked_tickets', 'updated_at']
+    search_fields = ['event__name']
+    readonly_fields = ['total_tickets', 'available_tickets', 'held_tickets', 'booked_tickets', 'updated_at']
 
 
 @admin.register(Performs)
@@ -9,6 +9,7 @@ from accounts.models import UserProfile
 from artists.models import Genre, Artist
 from events.models import EventType, Venue, Event, Performs, EventManager
 from customers.models import Customer, Ticket, Booking, Feedback
+from customers.services import TicketInventoryService
 from pricing.models import PriceTier
 from pricing.services import DynamicPricingService
 
@@ -229,18 +230,7 @@ class Command(BaseCommand):
                 
                 # Create tickets for the event
                 ticket_count = min(venue.capacity, 200)  # Limit for demo
-                for seat_num in range(1, ticket_count + 1):
-                    current_tier = DynamicPricingService.calculate_current_tier(event)
-                    price = current_tier.price if current_tier else Decimal(str(base_price))
-                    
-                    Ticket.objects.create(
-                        event=event,
-                        seat_number=f'A-{seat_num:03d}',
-                        section='General',
-                        base_price=Decimal(str(base_price)),
-                        final_price=price,
-                        current_tier=current_tier
-                    )
+                TicketInventoryService.generate_inventory(event, capacity=ticket_count)
                 
                 events.append(event)
 
@@ -262,9 +252,8 @@ class Command(BaseCommand):
                     status='confirmed'
                 )
                 
+                # Linking the ticket to the confirmed booking books it
                 booking.tickets.add(ticket)
-                ticket.status = 'booked'
-                ticket.save()
                 
                 # Create some feedback (70% chance)
                 if random.random() < 0.7:
@@ -0,0 +1,60 @@
+"""
+Django management command to verify EventInventory counters against the ticket table
+Usage: python manage.py reconcile_inventory [--events 1 2 3] [--fix]
+"""
+from django.core.management.base import BaseCommand
+
+from events.models import Event, EventInventory
+
+
+class Command(BaseCommand):
+    help = 'Compare per-event ticket counters with the ticket rows and optionally repair them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--events',
+            nargs='+',
+            type=int,
+            help='Only reconcile these event IDs'
+        )
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Rebuild counters that do not match the ticket rows'
+        )
+
+    def handle(self, *args, **options):
+        event_ids = options['events']
+        if event_ids is None:
+            event_ids = list(Event.objects.values_list('id', flat=True))
+
+        actual = EventInventory.count_tickets(event_ids)
+        stored = EventInventory.objects.filter(event_id__in=event_ids).in_bulk()
+        fields = ['total_tickets', 'available_tickets', 'held_tickets', 'booked_tickets']
+
+        mismatched = []
+        for event_id in event_ids:
+            expected = actual.get(event_id, dict.fromkeys(fields, 0))
+            inventory = stored.get(event_id)
+            if inventory is None:
+                # Missing rows are rebuilt lazily on first read
+                continue
+
+            differences = [
+                f'{field} {getattr(inventory, field)} != {expected[field]}'
+                for field in fields
+                if getattr(inventory, field) != expected[field]
+            ]
+            if differences:
+                mismatched.append(event_id)
+                self.stdout.write(self.style.WARNING(f'  ! Event {event_id}: {", ".join(differences)}'))
+
+        if mismatched and options['fix']:
+            EventInventory.rebuild(mismatched)
+            self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt counters for {len(mismatched)} events'))
+        elif mismatched:
+            self.stdout.write(self.style.ERROR(
+                f'✗ {len(mismatched)} of {len(stored)} counters out of sync (run with --fix to repair)'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✓ All {len(stored)} counters match the ticket rows'))
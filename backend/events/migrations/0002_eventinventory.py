@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventInventory',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='inventory', serialize=False, to='events.event')),
+                ('total_tickets', models.IntegerField(default=0)),
+                ('available_tickets', models.IntegerField(default=0)),
+                ('held_tickets', models.IntegerField(default=0)),
+                ('booked_tickets', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 01:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_eventinventory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='external_id',
+            field=models.CharField(blank=True, help_text='event_id of the import files', max_length=100, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='source_hash',
+            field=models.CharField(blank=True, help_text='Hash of the import row, to skip unchanged rows', max_length=32),
+        ),
+    ]
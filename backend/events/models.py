@@ -1,6 +1,9 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
+from django.utils import timezone
+from .signals import inventory_changed
 
 
 class EventType(models.Model):
@@ -56,23 +59,25 @@ class Event(models.Model):
     ticket_price = models.DecimalField(max_digits=10, decimal_places=2)  # Base price
     max_tickets_per_customer = models.PositiveIntegerField(default=10)
     is_active = models.BooleanField(default=True)
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True, help_text='event_id of the import files')
+    source_hash = models.CharField(max_length=32, blank=True, help_text='Hash of the import row, to skip unchanged rows')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     @property
     def available_tickets_count(self):
         """Calculate available tickets"""
-        from customers.models import Ticket
-        return self.tickets.filter(status='available').count()
+        return EventInventory.for_event(self.pk).available_tickets
+    
+    @property
+    def held_tickets_count(self):
+        """Calculate tickets reserved by checkout holds"""
+        return EventInventory.for_event(self.pk).held_tickets
     
     @property
     def booking_percentage(self):
         """Calculate current booking percentage"""
-        total_tickets = self.tickets.count()
-        if total_tickets == 0:
-            return 0
-        booked_tickets = self.tickets.filter(status='booked').count()
-        return (booked_tickets / total_tickets) * 100
+        return EventInventory.for_event(self.pk).booking_percentage
     
     def __str__(self):
         return f"{self.name} - {self.date}"
@@ -86,6 +91,126 @@ class Event(models.Model):
         ]
 
 
+class EventInventory(models.Model):
+    """
+    Denormalized ticket counters per event.
+
+    Rows are created with their event, delta-maintained with F-expressions
+    whenever ticket status changes and rebuilt from the tickets when missing
+    (events that predate the counters), so availability and booking
+    percentage cost one primary-key lookup regardless of venue capacity.
+    Code that writes tickets with bulk_create or queryset.update() must call
+    adjust()/transition() or rebuild() itself; Ticket querysets' delete()
+    adjusts the counters once per event.
+    """
+    COUNTED_STATUSES = {
+        'available': 'available_tickets',
+        'held': 'held_tickets',
+        'booked': 'booked_tickets',
+    }
+    
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, primary_key=True, related_name='inventory')
+    total_tickets = models.IntegerField(default=0)
+    available_tickets = models.IntegerField(default=0)
+    held_tickets = models.IntegerField(default=0)
+    booked_tickets = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    @property
+    def booking_percentage(self):
+        """Calculate current booking percentage"""
+        if self.total_tickets == 0:
+            return 0
+        return (self.booked_tickets / self.total_tickets) * 100
+    
+    def __str__(self):
+        return f"Inventory for {self.event.name}"
+    
+    @classmethod
+    def for_event(cls, event_id):
+        """Return the counters of an event, building them under the event's lock if they do not exist yet"""
+        inventory = cls.objects.filter(event_id=event_id).first()
+        if inventory is None:
+            inventory = cls.rebuild([event_id], lazy=True)[0]
+        return inventory
+    
+    @classmethod
+    def adjust(cls, event_id, total=0, **status_deltas):
+        """
+        Apply counter deltas, e.g. adjust(event_id, available=-2, booked=2).
+
+        Callers apply deltas after writing the tickets, so a missing row is
+        rebuilt from the tickets, which already include the change.
+        """
+        changes = {}
+        if total:
+            changes['total_tickets'] = F('total_tickets') + total
+        for status, delta in status_deltas.items():
+            if delta and status in cls.COUNTED_STATUSES:
+                field = cls.COUNTED_STATUSES[status]
+                changes[field] = F(field) + delta
+        if not changes:
+            return
+        if cls.objects.filter(event_id=event_id).update(updated_at=timezone.now(), **changes):
+            inventory_changed.send(sender=cls, event_ids=[event_id])
+        else:
+            cls.rebuild([event_id])
+    
+    @classmethod
+    def transition(cls, event_id, from_status, to_status, count=1):
+        """Move `count` tickets of an event from one status to another"""
+        if count and from_status != to_status:
+            cls.adjust(event_id, **{from_status: -count, to_status: count})
+    
+    @classmethod
+    def count_tickets(cls, event_ids=None):
+        """Count tickets per event and status straight from the ticket table"""
+        from customers.models import Ticket
+        tickets = Ticket.objects.all()
+        if event_ids is not None:
+            tickets = tickets.filter(event_id__in=event_ids)
+        
+        counts = {}
+        for row in tickets.values('event_id', 'status').annotate(n=Count('id')).order_by():
+            event_counts = counts.setdefault(row['event_id'], {
+                'total_tickets': 0, 'available_tickets': 0, 'held_tickets': 0, 'booked_tickets': 0
+            })
+            event_counts['total_tickets'] += row['n']
+            if row['status'] in cls.COUNTED_STATUSES:
+                event_counts[cls.COUNTED_STATUSES[row['status']]] += row['n']
+        return counts
+    
+    @classmethod
+    def rebuild(cls, event_ids=None, lazy=False):
+        """
+        Recompute the counters of the given events (all events if None).
+
+        lazy=True is for rows created on first read: no ticket changed, so
+        listeners are not told the counters were rebuilt.
+        The events are locked while counting, so concurrent rebuilds of the
+        same event write one after the other, each from a fresh count.
+        """
+        with transaction.atomic(savepoint=False):
+            events = Event.objects.select_for_update().order_by('pk')
+            if event_ids is not None:
+                events = events.filter(id__in=event_ids)
+            event_ids = list(events.values_list('id', flat=True))
+            counts = cls.count_tickets(event_ids)
+            
+            inventories = [
+                cls(event_id=event_id, **counts.get(event_id, {}))
+                for event_id in event_ids
+            ]
+            inventories = cls.objects.bulk_create(
+                inventories,
+                update_conflicts=True,
+                unique_fields=['event'],
+                update_fields=['total_tickets', 'available_tickets', 'held_tickets', 'booked_tickets', 'updated_at']
+            )
+        inventory_changed.send(sender=cls, event_ids=event_ids, rebuilt=not lazy)
+        return inventories
+
+
 class Performs(models.Model):
     """Artist performance relationship with timing"""
     artist = models.ForeignKey('artists.Artist', on_delete=models.CASCADE)
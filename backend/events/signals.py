@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent with event_ids (None for every event) whenever EventInventory counters change;
+# rebuilt=True when they were recomputed from the ticket rows after bulk changes
+inventory_changed = Signal()
@@ -1,3 +1,122 @@
+from datetime import time, timedelta
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from customers.models import Customer, SectionAvailability, Ticket
+from customers.services import BookingService, SeatHoldService, SeatMapService
+from .models import Event, Venue, EventType, EventInventory
 
-# Create your tests here.
+
+class EventInventoryTests(TestCase):
+    """Denormalized ticket counter tests"""
+
+    def setUp(self):
+        venue = Venue.objects.create(
+            name='Test Arena', location='Mumbai', address='123 Main St',
+            city='Mumbai', state='Maharashtra', capacity=100
+        )
+        self.event = Event.objects.create(
+            name='Rock Concert',
+            venue=venue,
+            event_type=EventType.objects.create(name='Concert'),
+            date=timezone.now().date() + timedelta(days=30),
+            start_time=time(20, 0),
+            end_time=time(23, 0),
+            ticket_price=Decimal('1000.00')
+        )
+        for seat in range(1, 11):
+            Ticket.objects.create(
+                event=self.event,
+                seat_number=f'A-{seat:03d}',
+                section='A',
+                base_price=Decimal('1000.00'),
+                final_price=Decimal('1000.00')
+            )
+        self.customer = Customer.objects.create(user=User.objects.create_user(username='customer1'))
+
+    def assertCounters(self, total, available, held, booked):
+        inventory = EventInventory.objects.get(event=self.event)
+        self.assertEqual(
+            (inventory.total_tickets, inventory.available_tickets, inventory.held_tickets, inventory.booked_tickets),
+            (total, available, held, booked)
+        )
+
+    def test_counters_follow_status_changes(self):
+        self.assertEqual(self.event.available_tickets_count, 10)
+
+        hold = SeatHoldService.create_hold(self.customer, self.event, quantity=2)
+        self.assertCounters(10, 8, 2, 0)
+        BookingService.create_booking(self.customer, self.event, hold=hold)
+        self.assertCounters(10, 8, 0, 2)
+        BookingService.create_booking(self.customer, self.event, quantity=3)
+        self.assertCounters(10, 5, 0, 5)
+        self.assertEqual(self.event.booking_percentage, 50)
+
+        ticket = Ticket.objects.filter(event=self.event, status='available').first()
+        ticket.status = 'cancelled'
+        ticket.save()
+        Ticket.objects.filter(event=self.event, status='available').first().delete()
+        self.assertCounters(9, 3, 0, 5)
+
+    def test_bulk_delete_adjusts_counters_once_per_event(self):
+        EventInventory.for_event(self.event.id)
+        BookingService.create_booking(self.customer, self.event, quantity=2)
+        tickets = Ticket.objects.filter(event=self.event)
+
+        with CaptureQueriesContext(connection) as two:
+            tickets.filter(id__in=tickets.filter(status='available').values('id')[:2]).delete()
+        self.assertCounters(8, 6, 0, 2)
+        with CaptureQueriesContext(connection) as six:
+            tickets.filter(id__in=tickets.values('id')[:6]).delete()
+        self.assertCounters(2, 2, 0, 0)
+        self.assertEqual(len(two), len(six))
+
+    def test_event_delete_skips_per_ticket_bookkeeping(self):
+        BookingService.create_booking(self.customer, self.event, quantity=2)
+        with CaptureQueriesContext(connection) as ten:
+            self.event.delete()
+        self.assertFalse(Ticket.objects.exists())
+
+        event = Event.objects.create(
+            name='Jazz Night', venue=self.event.venue, event_type=self.event.event_type,
+            date=self.event.date, start_time=time(20, 0), end_time=time(23, 0), ticket_price=Decimal('1000.00')
+        )
+        Ticket.objects.create(event=event, seat_number='A-001', section='A',
+                              base_price=Decimal('1000.00'), final_price=Decimal('1000.00'))
+        BookingService.create_booking(self.customer, event, quantity=1)
+        with CaptureQueriesContext(connection) as one:
+            event.delete()
+        self.assertEqual(len(ten), len(one))
+
+    def test_lazy_counters_keep_seat_maps(self):
+        SeatMapService.sections(self.event.id)
+        EventInventory.objects.filter(event=self.event).delete()
+        EventInventory.for_event(self.event.id)
+        self.assertTrue(SectionAvailability.objects.filter(event=self.event).exists())
+
+    def test_adjusting_missing_counters_rebuilds_them(self):
+        self.assertCounters(10, 10, 0, 0)
+        EventInventory.objects.filter(event=self.event).delete()
+        BookingService.create_booking(self.customer, self.event, quantity=2)
+        self.assertCounters(10, 8, 0, 2)
+
+    def test_booking_percentage_costs_one_query(self):
+        EventInventory.for_event(self.event.id)
+        with self.assertNumQueries(1):
+            self.event.booking_percentage
+
+    def test_reconcile_repairs_drift(self):
+        EventInventory.for_event(self.event.id)
+        Ticket.objects.filter(event=self.event).update(status='booked')
+
+        out = StringIO()
+        call_command('reconcile_inventory', stdout=out)
+        self.assertIn('out of sync', out.getvalue())
+
+        call_command('reconcile_inventory', '--fix', stdout=out)
+        self.assertCounters(10, 0, 0, 10)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import PriceTier, PriceHistory
+from .models import PriceTier, PriceHistory, EventPricingState
 
 
 @admin.register(PriceTier)
@@ -33,4 +33,12 @@ class PriceHistoryAdmin(admin.ModelAdmin):
     
     def has_change_permission(self, request, obj=None):
         # Price history should not be editable
-        return False
\ No newline at end of file
+        return False
+
+
+@admin.register(EventPricingState)
+class EventPricingStateAdmin(admin.ModelAdmin):
+    list_display = ['event', 'current_tier', 'is_dirty', 'marked_dirty_at', 'last_repriced_at']
+    list_filter = ['is_dirty']
+    search_fields = ['event__name']
+    readonly_fields = ['current_tier', 'marked_dirty_at', 'last_repriced_at']
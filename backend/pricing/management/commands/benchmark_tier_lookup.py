@@ -0,0 +1,74 @@
+"""
+Django management command to benchmark price tier resolution
+Usage: python manage.py benchmark_tier_lookup --lookups 100000
+"""
+import random
+import time as timer
+from datetime import time, timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from events.models import EventType, Venue, Event
+from pricing.models import PriceTier
+from pricing.services import DynamicPricingService
+from pricing.tier_index import price_tier_index
+
+
+class Command(BaseCommand):
+    help = 'Compare tier lookups/sec of the in-memory index against a filtered PriceTier query'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lookups', type=int, default=100000, help='Index lookups to time')
+        parser.add_argument('--queries', type=int, default=2000, help='Database lookups to time')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            event = self.create_fixture()
+            percentages = [random.uniform(0, 100) for _ in range(options['lookups'])]
+
+            started = timer.perf_counter()
+            for percentage in percentages[:options['queries']]:
+                PriceTier.objects.filter(
+                    event=event,
+                    is_active=True,
+                    tier_percentage_start__lte=percentage,
+                    tier_percentage_end__gt=percentage
+                ).first()
+            query_rate = options['queries'] / (timer.perf_counter() - started)
+
+            price_tier_index.invalidate(event.pk)
+            started = timer.perf_counter()
+            for percentage in percentages:
+                price_tier_index.lookup(event.pk, percentage)
+            index_rate = len(percentages) / (timer.perf_counter() - started)
+
+            self.stdout.write(f'  Database query: {query_rate:,.0f} lookups/sec')
+            self.stdout.write(f'  Tier index:     {index_rate:,.0f} lookups/sec')
+            self.stdout.write(self.style.SUCCESS(f'✓ Index is {index_rate / query_rate:,.0f}x faster'))
+
+            # Nothing created here should outlive the benchmark
+            transaction.set_rollback(True)
+        price_tier_index.invalidate(event.pk)
+
+    def create_fixture(self):
+        """Create a throwaway event with the default tiers"""
+        event_type, _ = EventType.objects.get_or_create(name='Concert')
+        venue = Venue.objects.create(
+            name='Tier Benchmark Arena', location='Benchmark', address='Benchmark',
+            city='Benchmark', state='Benchmark', capacity=1000
+        )
+        event = Event.objects.create(
+            name='Tier Benchmark',
+            date=timezone.now().date() + timedelta(days=30),
+            start_time=time(20, 0),
+            end_time=time(23, 0),
+            venue=venue,
+            event_type=event_type,
+            ticket_price=Decimal('100.00')
+        )
+        manager = User.objects.create(username=f'tier_benchmark_{timezone.now().timestamp()}')
+        DynamicPricingService.create_default_price_tiers(event, manager, event.ticket_price)
+        return event
@@ -0,0 +1,41 @@
+"""
+Django management command to reprice events marked dirty by bookings
+Usage: python manage.py reprice_events [--loop]
+"""
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from pricing.services import DynamicPricingService
+
+
+class Command(BaseCommand):
+    help = 'Reprice dirty events, each at most once per repricing interval'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and reprice every --interval seconds'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=getattr(settings, 'PRICING_REPRICE_INTERVAL_SECONDS', 5),
+            help='Minimum seconds between two reprices of the same event'
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+
+        while True:
+            repriced = DynamicPricingService.reprice_dirty_events(
+                min_interval=timedelta(seconds=interval)
+            )
+            if repriced or not options['loop']:
+                self.stdout.write(f'Repriced {repriced} events')
+
+            if not options['loop']:
+                break
+            time.sleep(interval)
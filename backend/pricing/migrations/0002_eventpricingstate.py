@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0001_initial'),
+        ('pricing', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventPricingState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_dirty', models.BooleanField(default=False)),
+                ('marked_dirty_at', models.DateTimeField(blank=True, null=True)),
+                ('last_repriced_at', models.DateTimeField(blank=True, null=True)),
+                ('current_tier', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='pricing.pricetier')),
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='pricing_state', to='events.event')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['is_dirty', 'last_repriced_at'], name='pricing_eve_is_dirt_a97f3d_idx')],
+            },
+        ),
+    ]
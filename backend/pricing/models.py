@@ -17,16 +17,17 @@ class PriceTier(models.Model):
         return f"{self.event.name} - {self.tier_name} ({self.tier_percentage_start}-{self.tier_percentage_end}%)"
     
     def save(self, *args, **kwargs):
-        # Validate tier ranges don't overlap
-        overlapping_tiers = PriceTier.objects.filter(
-            event=self.event,
-            is_active=True
-        ).exclude(id=self.id)
-        
-        for tier in overlapping_tiers:
-            if not (self.tier_percentage_end <= tier.tier_percentage_start or 
-                   self.tier_percentage_start >= tier.tier_percentage_end):
-                raise ValueError(f"Price tier overlaps with existing tier: {tier.tier_name}")
+        # Validate tier ranges don't overlap, letting the database find the clash
+        if self.is_active:
+            overlapping_tier = PriceTier.objects.filter(
+                event_id=self.event_id,
+                is_active=True,
+                tier_percentage_start__lt=self.tier_percentage_end,
+                tier_percentage_end__gt=self.tier_percentage_start
+            ).exclude(id=self.id).first()
+            
+            if overlapping_tier:
+                raise ValueError(f"Price tier overlaps with existing tier: {overlapping_tier.tier_name}")
         
         super().save(*args, **kwargs)
     
@@ -54,4 +55,21 @@ class PriceHistory(models.Model):
         ordering = ['-changed_at']
         indexes = [
             models.Index(fields=['event', 'changed_at']),
-        ]
\ No newline at end of file
+        ]
+
+
+class EventPricingState(models.Model):
+    """Repricing bookkeeping per event, used to coalesce price updates"""
+    event = models.OneToOneField('events.Event', on_delete=models.CASCADE, related_name='pricing_state')
+    current_tier = models.ForeignKey(PriceTier, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    is_dirty = models.BooleanField(default=False)
+    marked_dirty_at = models.DateTimeField(null=True, blank=True)
+    last_repriced_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"Pricing state for {self.event.name}"
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_dirty', 'last_repriced_at']),
+        ]
@@ -0,0 +1,12 @@
+from rest_framework import serializers
+from .models import PriceTier
+
+
+class PriceTierScheduleSerializer(serializers.ModelSerializer):
+    """One entry of a tier schedule submitted by a manager"""
+
+    class Meta:
+        model = PriceTier
+        fields = ['tier_name', 'tier_percentage_start', 'tier_percentage_end', 'price']
+        # Uniqueness is checked for the whole schedule by the pricing service
+        validators = []
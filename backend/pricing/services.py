@@ -1,8 +1,14 @@
-from django.db.models import Count, Q
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 from decimal import Decimal
-from .models import PriceTier, PriceHistory
+from .models import PriceTier, PriceHistory, EventPricingState
+from .tier_index import price_tier_index
+from analytics.cache import dashboard_cache
 from customers.models import Ticket
-from events.models import Event
+from events.models import Event, EventInventory
 
 
 class DynamicPricingService:
@@ -15,84 +21,253 @@ class DynamicPricingService:
         """
         booking_percentage = event.booking_percentage
         
-        # Get active price tiers for this event
-        current_tier = PriceTier.objects.filter(
-            event=event,
-            is_active=True,
-            tier_percentage_start__lte=booking_percentage,
-            tier_percentage_end__gt=booking_percentage
-        ).first()
-        
-        return current_tier
+        # Resolve against the in-memory interval index of active tiers
+        return price_tier_index.lookup(event.pk, booking_percentage)
     
     @staticmethod
     def update_ticket_prices(event):
         """
-        Update all available tickets for an event based on current tier
+        Update all available tickets for an event based on current tier.
+        Held seats keep the price quoted when they were reserved.
+
+        Only tickets that are not on the current tier price yet are touched, and
+        PriceHistory is only written when the tier actually changes.
         """
         current_tier = DynamicPricingService.calculate_current_tier(event)
         
         if current_tier:
-            # Update all available tickets to current tier price
+            # Update available tickets that are not on the current tier price yet
             updated_count = Ticket.objects.filter(
                 event=event,
                 status='available'
+            ).exclude(
+                current_tier=current_tier,
+                final_price=current_tier.price
             ).update(
                 final_price=current_tier.price,
                 current_tier=current_tier
             )
             
-            # Log price change
-            PriceHistory.objects.create(
-                event=event,
-                new_tier=current_tier,
-                booking_percentage=Decimal(str(event.booking_percentage)),
-                tickets_sold_count=Ticket.objects.filter(
-                    event=event, 
-                    status='booked'
-                ).count()
-            )
+            state, _ = EventPricingState.objects.get_or_create(event=event)
+            if state.current_tier_id != current_tier.id:
+                # Log price change
+                inventory = EventInventory.for_event(event.pk)
+                PriceHistory.objects.create(
+                    event=event,
+                    old_tier_id=state.current_tier_id,
+                    new_tier=current_tier,
+                    booking_percentage=Decimal(str(inventory.booking_percentage)),
+                    tickets_sold_count=inventory.booked_tickets
+                )
+                state.current_tier = current_tier
+                state.save(update_fields=['current_tier'])
             
             return updated_count, current_tier.price
         
         return 0, None
     
+    @staticmethod
+    def schedule_reprice(event):
+        """
+        Request a price update after bookings changed for an event.
+
+        In 'coalesced' mode (the default) the event is only marked dirty once the
+        current transaction commits, and `reprice_dirty_events` reprices it later.
+        In 'immediate' mode prices are updated synchronously.
+        """
+        if getattr(settings, 'PRICING_REPRICE_MODE', 'coalesced') == 'immediate':
+            return DynamicPricingService.update_ticket_prices(event)
+        
+        event_id = event.pk
+        transaction.on_commit(lambda: DynamicPricingService.mark_dirty(event_id))
+    
+    @staticmethod
+    def mark_dirty(event_id):
+        """
+        Flag an event for repricing. Events that are already dirty are not
+        written again, so a burst of bookings costs no extra row updates.
+        """
+        updated = EventPricingState.objects.filter(
+            event_id=event_id,
+            is_dirty=False
+        ).update(is_dirty=True, marked_dirty_at=timezone.now())
+        
+        if not updated and not EventPricingState.objects.filter(event_id=event_id).exists():
+            EventPricingState.objects.get_or_create(
+                event_id=event_id,
+                defaults={'is_dirty': True, 'marked_dirty_at': timezone.now()}
+            )
+    
+    @staticmethod
+    def reprice_dirty_events(min_interval=None):
+        """
+        Reprice every dirty event that was not repriced within `min_interval`.
+
+        The dirty flag is cleared before repricing so bookings that arrive while
+        the update runs mark the event again. Returns the number of events repriced.
+        """
+        if min_interval is None:
+            min_interval = timedelta(seconds=getattr(settings, 'PRICING_REPRICE_INTERVAL_SECONDS', 5))
+        now = timezone.now()
+        
+        due_event_ids = EventPricingState.objects.filter(
+            Q(last_repriced_at__isnull=True) | Q(last_repriced_at__lte=now - min_interval),
+            is_dirty=True
+        ).values_list('event_id', flat=True)
+        
+        repriced = 0
+        for event in Event.objects.filter(id__in=list(due_event_ids)):
+            # Another worker may have claimed the event in the meantime
+            claimed = EventPricingState.objects.filter(
+                event=event,
+                is_dirty=True
+            ).update(is_dirty=False, last_repriced_at=now)
+            if claimed:
+                DynamicPricingService.update_ticket_prices(event)
+                repriced += 1
+        
+        return repriced
+    
+    DEFAULT_TIERS = [
+        {
+            'tier_name': 'Early Bird',
+            'start': 0,
+            'end': 30,
+            'multiplier': 0.8
+        },
+        {
+            'tier_name': 'Regular',
+            'start': 30,
+            'end': 70,
+            'multiplier': 1.0
+        },
+        {
+            'tier_name': 'Premium',
+            'start': 70,
+            'end': 100,
+            'multiplier': 1.5
+        }
+    ]
+    
+    @staticmethod
+    def validate_tier_schedule(tiers):
+        """
+        Validate a complete tier schedule in one sort-and-sweep pass.
+        
+        `tiers` is a list of dicts with tier_name, tier_percentage_start and
+        tier_percentage_end. Returns the tiers sorted by start, or raises
+        ValueError on the first invalid range or overlap.
+        """
+        schedule = sorted(tiers, key=lambda tier: tier['tier_percentage_start'])
+        
+        previous = None
+        for tier in schedule:
+            start = tier['tier_percentage_start']
+            end = tier['tier_percentage_end']
+            if not 0 <= start < end <= 100:
+                raise ValueError(f"Invalid range for price tier {tier['tier_name']}: {start}-{end}%")
+            if previous and start < previous['tier_percentage_end']:
+                raise ValueError(
+                    f"Price tier {tier['tier_name']} overlaps with tier {previous['tier_name']}"
+                )
+            previous = tier
+        
+        return schedule
+    
+    @staticmethod
+    def replace_price_tiers(event, tiers, manager):
+        """
+        Atomically replace the active tier schedule of an event.
+        
+        Existing tiers with the same range are updated in place (keeping their
+        price history), new ranges are inserted with bulk_create and tiers
+        missing from the schedule are deactivated.
+        """
+        schedule = DynamicPricingService.validate_tier_schedule(tiers)
+        
+        with transaction.atomic():
+            existing = {
+                (tier.tier_percentage_start, tier.tier_percentage_end): tier
+                for tier in PriceTier.objects.select_for_update().filter(event=event)
+            }
+            
+            to_update = []
+            to_create = []
+            for tier_data in schedule:
+                key = (tier_data['tier_percentage_start'], tier_data['tier_percentage_end'])
+                tier = existing.pop(key, None)
+                if tier:
+                    tier.tier_name = tier_data['tier_name']
+                    tier.price = tier_data['price']
+                    tier.is_active = True
+                    to_update.append(tier)
+                else:
+                    to_create.append(PriceTier(
+                        event=event,
+                        tier_name=tier_data['tier_name'],
+                        tier_percentage_start=tier_data['tier_percentage_start'],
+                        tier_percentage_end=tier_data['tier_percentage_end'],
+                        price=tier_data['price'],
+                        created_by_manager=manager
+                    ))
+            
+            PriceTier.objects.filter(id__in=[tier.id for tier in existing.values()]).update(is_active=False)
+            PriceTier.objects.bulk_update(to_update, ['tier_name', 'price', 'is_active'])
+            PriceTier.objects.bulk_create(to_create)
+            
+            # Bulk writes bypass the PriceTier signals
+            price_tier_index.invalidate(event.pk)
+            transaction.on_commit(lambda: price_tier_index.invalidate(event.pk))
+            dashboard_cache.bump(event.pk)
+            DynamicPricingService.schedule_reprice(event)
+        
+        return sorted(to_update + to_create, key=lambda tier: tier.tier_percentage_start)
+    
     @staticmethod
     def create_default_price_tiers(event, manager, base_price):
         """
         Create default price tiers for an event
         """
-        default_tiers = [
-            {
-                'tier_name': 'Early Bird',
-                'start': 0,
-                'end': 30,
-                'multiplier': 0.8
-            },
-            {
-                'tier_name': 'Regular',
-                'start': 30,
-                'end': 70,
-                'multiplier': 1.0
-            },
+        return DynamicPricingService.create_default_price_tiers_for_events(
+            [(event, base_price)], manager
+        )
+    
+    @staticmethod
+    def create_default_price_tiers_for_events(events, manager):
+        """
+        Create default price tiers for many new events with a single bulk insert.
+        
+        `events` is a list of (event, base_price) pairs, e.g. freshly imported
+        events. The default schedule is validated once instead of per tier.
+        """
+        schedule = DynamicPricingService.validate_tier_schedule([
             {
-                'tier_name': 'Premium',
-                'start': 70,
-                'end': 100,
-                'multiplier': 1.5
+                'tier_name': tier_data['tier_name'],
+                'tier_percentage_start': tier_data['start'],
+                'tier_percentage_end': tier_data['end']
             }
-        ]
+            for tier_data in DynamicPricingService.DEFAULT_TIERS
+        ])
+        multipliers = {
+            tier_data['start']: Decimal(str(tier_data['multiplier']))
+            for tier_data in DynamicPricingService.DEFAULT_TIERS
+        }
         
-        created_tiers = []
-        for tier_data in default_tiers:
-            tier = PriceTier.objects.create(
+        created_tiers = PriceTier.objects.bulk_create([
+            PriceTier(
                 event=event,
                 tier_name=tier_data['tier_name'],
-                tier_percentage_start=tier_data['start'],
-                tier_percentage_end=tier_data['end'],
-                price=base_price * Decimal(str(tier_data['multiplier'])),
+                tier_percentage_start=tier_data['tier_percentage_start'],
+                tier_percentage_end=tier_data['tier_percentage_end'],
+                price=base_price * multipliers[tier_data['tier_percentage_start']],
                 created_by_manager=manager
             )
-            created_tiers.append(tier)
+            for event, base_price in events
+            for tier_data in schedule
+        ])
+        
+        for event, _ in events:
+            price_tier_index.invalidate(event.pk)
+            dashboard_cache.bump(event.pk)
         
-        return created_tiers
\ No newline at end of file
+        return created_tiers
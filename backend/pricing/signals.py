@@ -0,0 +1,23 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from events.models import Event
+from .models import PriceTier
+from .tier_index import price_tier_index
+
+
+@receiver(post_save, sender=PriceTier)
+@receiver(post_delete, sender=PriceTier)
+def invalidate_tier_index(sender, instance, **kwargs):
+    """Drop cached tiers of the event when one of its tiers changes"""
+    event_id = instance.event_id
+    price_tier_index.invalidate(event_id)
+    # Readers inside other transactions may reload the old rows until commit
+    transaction.on_commit(lambda: price_tier_index.invalidate(event_id))
+
+
+@receiver(post_save, sender=Event)
+def reset_tier_index_for_new_event(sender, instance, created, **kwargs):
+    """Make sure a new event never sees tiers cached under a reused ID"""
+    if created:
+        price_tier_index.invalidate(instance.pk)
@@ -1 +1,178 @@
-from django.test import TestCase
\ No newline at end of file
+from datetime import time, timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from events.models import Event, Venue, EventType, EventInventory, EventManager
+from customers.models import Ticket
+from .models import PriceTier, PriceHistory, EventPricingState
+from .services import DynamicPricingService
+from .tier_index import PriceTierIndex, price_tier_index
+
+
+class PricingTestCase(TestCase):
+    """Event with ten available seats and the default price tiers"""
+
+    def setUp(self):
+        venue = Venue.objects.create(
+            name='Test Arena', location='Mumbai', address='123 Main St',
+            city='Mumbai', state='Maharashtra', capacity=100
+        )
+        self.event = Event.objects.create(
+            name='Rock Concert',
+            venue=venue,
+            event_type=EventType.objects.create(name='Concert'),
+            date=timezone.now().date() + timedelta(days=30),
+            start_time=time(20, 0),
+            end_time=time(23, 0),
+            ticket_price=Decimal('1000.00')
+        )
+        self.manager = User.objects.create_user(username='manager1')
+        DynamicPricingService.create_default_price_tiers(self.event, self.manager, Decimal('1000.00'))
+        Ticket.objects.bulk_create([
+            Ticket(
+                event=self.event,
+                seat_number=f'A-{seat:03d}',
+                section='A',
+                base_price=Decimal('1000.00'),
+                final_price=Decimal('1000.00')
+            )
+            for seat in range(1, 11)
+        ])
+
+
+class RepricingTests(PricingTestCase):
+    """Coalesced repricing tests"""
+
+    def test_price_history_only_written_on_tier_change(self):
+        DynamicPricingService.update_ticket_prices(self.event)
+        DynamicPricingService.update_ticket_prices(self.event)
+        self.assertEqual(PriceHistory.objects.filter(event=self.event).count(), 1)
+
+        Ticket.objects.filter(id__in=Ticket.objects.filter(event=self.event).values('id')[:4]).update(status='booked')
+        EventInventory.rebuild([self.event.id])
+        updated, price = DynamicPricingService.update_ticket_prices(self.event)
+        self.assertEqual(price, Decimal('1000.00'))
+        self.assertEqual(updated, 6)
+        history = PriceHistory.objects.filter(event=self.event).first()
+        self.assertEqual(history.new_tier.tier_name, 'Regular')
+        self.assertEqual(history.old_tier.tier_name, 'Early Bird')
+
+    def test_dirty_events_are_repriced_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            DynamicPricingService.schedule_reprice(self.event)
+            DynamicPricingService.schedule_reprice(self.event)
+        self.assertTrue(EventPricingState.objects.get(event=self.event).is_dirty)
+        self.assertEqual(PriceHistory.objects.count(), 0)
+
+        self.assertEqual(DynamicPricingService.reprice_dirty_events(), 1)
+        self.assertEqual(DynamicPricingService.reprice_dirty_events(), 0)
+        self.assertFalse(Ticket.objects.filter(event=self.event, current_tier__isnull=True).exists())
+
+    def test_reprice_respects_interval(self):
+        DynamicPricingService.mark_dirty(self.event.id)
+        DynamicPricingService.reprice_dirty_events()
+        DynamicPricingService.mark_dirty(self.event.id)
+        self.assertEqual(DynamicPricingService.reprice_dirty_events(min_interval=timedelta(minutes=5)), 0)
+        self.assertEqual(DynamicPricingService.reprice_dirty_events(min_interval=timedelta(0)), 1)
+
+    @override_settings(PRICING_REPRICE_MODE='immediate')
+    def test_immediate_mode_reprices_synchronously(self):
+        DynamicPricingService.schedule_reprice(self.event)
+        self.assertEqual(PriceHistory.objects.filter(event=self.event).count(), 1)
+
+
+class PriceTierIndexTests(PricingTestCase):
+    """In-memory tier index tests"""
+
+    def test_lookup_matches_tier_ranges(self):
+        self.assertEqual(price_tier_index.lookup(self.event.id, 0).tier_name, 'Early Bird')
+        self.assertEqual(price_tier_index.lookup(self.event.id, 29.9).tier_name, 'Early Bird')
+        self.assertEqual(price_tier_index.lookup(self.event.id, 30).tier_name, 'Regular')
+        self.assertEqual(price_tier_index.lookup(self.event.id, 99.5).tier_name, 'Premium')
+        self.assertIsNone(price_tier_index.lookup(self.event.id, 100))
+
+    def test_lookup_does_not_query_once_loaded(self):
+        price_tier_index.lookup(self.event.id, 10)
+        with self.assertNumQueries(0):
+            price_tier_index.lookup(self.event.id, 50)
+
+    def test_tier_changes_invalidate_index(self):
+        price_tier_index.lookup(self.event.id, 10)
+        tier = PriceTier.objects.get(event=self.event, tier_name='Early Bird')
+        tier.price = Decimal('650.00')
+        tier.save()
+        self.assertEqual(price_tier_index.lookup(self.event.id, 10).price, Decimal('650.00'))
+
+        tier.delete()
+        self.assertIsNone(price_tier_index.lookup(self.event.id, 10))
+
+    @override_settings(PRICING_TIER_CACHE='default')
+    def test_invalidation_reaches_other_processes_through_shared_cache(self):
+        caches['default'].clear()
+        this_process, other_process = PriceTierIndex(), PriceTierIndex()
+        other_process.lookup(self.event.id, 10)
+        PriceTier.objects.filter(event=self.event, tier_name='Early Bird').update(price=Decimal('650.00'))
+
+        this_process.invalidate(self.event.id)
+        self.assertEqual(other_process.lookup(self.event.id, 10).price, Decimal('650.00'))
+        with self.assertNumQueries(0):
+            this_process.lookup(self.event.id, 10)
+
+
+class TierScheduleTests(PricingTestCase):
+    """Bulk tier schedule tests"""
+
+    def schedule(self, *ranges):
+        return [
+            {'tier_name': f'Tier {start}', 'tier_percentage_start': start,
+             'tier_percentage_end': end, 'price': Decimal(price)}
+            for start, end, price in ranges
+        ]
+
+    def test_validate_rejects_overlap_and_bad_ranges(self):
+        with self.assertRaises(ValueError):
+            DynamicPricingService.validate_tier_schedule(self.schedule((0, 50, '1'), (40, 100, '2')))
+        with self.assertRaises(ValueError):
+            DynamicPricingService.validate_tier_schedule(self.schedule((50, 50, '1')))
+        schedule = DynamicPricingService.validate_tier_schedule(self.schedule((50, 100, '2'), (0, 50, '1')))
+        self.assertEqual([tier['tier_percentage_start'] for tier in schedule], [0, 50])
+
+    def test_replace_price_tiers(self):
+        early_bird = PriceTier.objects.get(event=self.event, tier_percentage_start=0)
+        DynamicPricingService.replace_price_tiers(
+            self.event, self.schedule((0, 30, '700.00'), (30, 100, '1200.00')), self.manager
+        )
+        active = PriceTier.objects.filter(event=self.event, is_active=True).order_by('tier_percentage_start')
+        self.assertEqual([tier.price for tier in active], [Decimal('700.00'), Decimal('1200.00')])
+        self.assertEqual(active[0].id, early_bird.id)
+        self.assertEqual(PriceTier.objects.filter(event=self.event, is_active=False).count(), 2)
+        self.assertEqual(price_tier_index.lookup(self.event.id, 50).price, Decimal('1200.00'))
+
+    def test_replace_schedule_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(user=self.manager)
+        url = f'/api/pricing/tiers/{self.event.id}/'
+        payload = {'tiers': [
+            {'tier_name': 'All', 'tier_percentage_start': 0, 'tier_percentage_end': 100, 'price': '900.00'}
+        ]}
+        self.assertEqual(client.put(url, payload, format='json').status_code, status.HTTP_403_FORBIDDEN)
+
+        manager_profile = EventManager.objects.create(user=self.manager)
+        manager_profile.managed_events.add(self.event)
+        response = client.put(url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['tiers']), 1)
+
+        payload['tiers'].append(
+            {'tier_name': 'Late', 'tier_percentage_start': 90, 'tier_percentage_end': 100, 'price': '1.00'}
+        )
+        self.assertEqual(client.put(url, payload, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+
+        # A bare list is taken as the tiers
+        response = client.put(url, payload['tiers'][:1], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(client.put(url, 'tiers', format='json').status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,104 @@
+import threading
+import time
+from bisect import bisect_right
+from django.conf import settings
+from django.core.cache import caches
+from .models import PriceTier
+
+
+class PriceTierIndex:
+    """
+    Process-local index of each event's active price tiers.
+
+    Tiers are held as a sorted interval array per event, so resolving the tier
+    for a booking percentage is a bisect instead of a query. Entries are dropped
+    by the PriceTier signals and otherwise live PRICING_TIER_CACHE_TTL_SECONDS,
+    which bounds staleness for other processes. When PRICING_TIER_CACHE names a
+    Django cache alias, every event has a version counter there that
+    invalidate() bumps: local entries are only served while their version is
+    current, so an invalidation reaches every process on its next lookup, and
+    loaded tiers are shared per version so a cold process does not have to hit
+    the database.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _shared_cache():
+        alias = getattr(settings, 'PRICING_TIER_CACHE', None)
+        return caches[alias] if alias else None
+
+    @staticmethod
+    def _cache_key(event_id, suffix):
+        return f'pricing:tiers:{event_id}:{suffix}'
+
+    def _version(self, shared, event_id):
+        """Current version of an event's tiers in the shared cache"""
+        key = self._cache_key(event_id, 'version')
+        version = shared.get(key)
+        if version is None:
+            # Start from the clock so a lost counter never reuses an old version
+            shared.add(key, time.time_ns(), timeout=None)
+            version = shared.get(key)
+        return version
+
+    def _load(self, event_id, shared=None, version=None):
+        """Build the interval array of an event from the shared cache or the database"""
+        key = self._cache_key(event_id, version)
+        tiers = shared.get(key) if shared else None
+        if tiers is None:
+            tiers = list(PriceTier.objects.filter(
+                event_id=event_id,
+                is_active=True
+            ).order_by('tier_percentage_start'))
+            if shared:
+                # Keyed by the version read before loading, so tiers loaded while an
+                # invalidation lands are never served under the newer version
+                shared.set(key, tiers)
+
+        starts = [tier.tier_percentage_start for tier in tiers]
+        ends = [tier.tier_percentage_end for tier in tiers]
+        return starts, ends, tiers
+
+    def tiers(self, event_id):
+        """Return (starts, ends, tiers) for an event, loading it if needed"""
+        shared = self._shared_cache()
+        version = self._version(shared, event_id) if shared else None
+        entry = self._entries.get(event_id)
+        now = time.monotonic()
+        if entry is None or entry[0] < now or entry[1] != version:
+            with self._lock:
+                entry = self._entries.get(event_id)
+                if entry is None or entry[0] < now or entry[1] != version:
+                    ttl = getattr(settings, 'PRICING_TIER_CACHE_TTL_SECONDS', 60)
+                    entry = (now + ttl, version, self._load(event_id, shared, version))
+                    self._entries[event_id] = entry
+        return entry[2]
+
+    def lookup(self, event_id, booking_percentage):
+        """Return the active tier covering `booking_percentage`, or None"""
+        starts, ends, tiers = self.tiers(event_id)
+        position = bisect_right(starts, booking_percentage) - 1
+        if position >= 0 and booking_percentage < ends[position]:
+            return tiers[position]
+        return None
+
+    def invalidate(self, event_id):
+        """Forget the tiers of an event in this process, and in every process through the shared cache"""
+        self._entries.pop(event_id, None)
+        shared = self._shared_cache()
+        if shared:
+            key = self._cache_key(event_id, 'version')
+            try:
+                shared.incr(key)
+            except ValueError:
+                shared.set(key, time.time_ns(), timeout=None)
+
+    def clear(self):
+        """Forget every event in this process"""
+        self._entries.clear()
+
+
+price_tier_index = PriceTierIndex()
@@ -2,18 +2,56 @@ from django.shortcuts import render, get_object_or_404
 from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework import status
-from events.models import Event
+from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from events.models import Event, EventInventory
 from .models import PriceTier
+from .serializers import PriceTierScheduleSerializer
 from .services import DynamicPricingService
 
 
-class EventPriceTiersView(generics.RetrieveAPIView):
-    """Get all price tiers for an event"""
+class EventPriceTiersView(generics.RetrieveUpdateAPIView):
+    """Get all price tiers for an event, or replace the whole schedule (PUT)"""
+    permission_classes = [IsAuthenticatedOrReadOnly]
     
     def get(self, request, event_id):
         event = get_object_or_404(Event, id=event_id)
         tiers = PriceTier.objects.filter(event=event, is_active=True).order_by('tier_percentage_start')
+        return self.tiers_response(event, tiers)
+    
+    def put(self, request, event_id):
+        event = get_object_or_404(Event, id=event_id)
         
+        user = request.user
+        can_manage = user.is_staff or event.managers.filter(
+            user=user,
+            is_active=True,
+            can_manage_pricing=True
+        ).exists()
+        if not can_manage:
+            return Response({
+                'error': 'You do not manage pricing for this event'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        # {"tiers": [...]} or the bare list of tiers
+        if isinstance(request.data, list):
+            tiers = request.data
+        elif isinstance(request.data, dict):
+            tiers = request.data.get('tiers')
+        else:
+            return Response({
+                'error': 'Send the tiers as a list or as {"tiers": [...]}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        serializer = PriceTierScheduleSerializer(data=tiers, many=True, allow_empty=False)
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            tiers = DynamicPricingService.replace_price_tiers(event, serializer.validated_data, user)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return self.tiers_response(event, tiers)
+    
+    def tiers_response(self, event, tiers):
         tier_data = [{
             'id': tier.id,
             'tier_name': tier.tier_name,
@@ -25,7 +63,7 @@ class EventPriceTiersView(generics.RetrieveAPIView):
         } for tier in tiers]
         
         return Response({
-            'event_id': event_id,
+            'event_id': event.id,
             'event_name': event.name,
             'tiers': tier_data
         })
@@ -37,6 +75,7 @@ class CurrentPriceView(generics.RetrieveAPIView):
     def get(self, request, event_id):
         event = get_object_or_404(Event, id=event_id)
         current_tier = DynamicPricingService.calculate_current_tier(event)
+        inventory = EventInventory.for_event(event.id)
         
         if not current_tier:
             return Response({
@@ -46,13 +85,13 @@ class CurrentPriceView(generics.RetrieveAPIView):
         return Response({
             'event_id': event_id,
             'event_name': event.name,
-            'current_booking_percentage': float(event.booking_percentage),
+            'current_booking_percentage': float(inventory.booking_percentage),
             'current_tier': {
                 'id': current_tier.id,
                 'tier_name': current_tier.tier_name,
                 'price': str(current_tier.price),
                 'tier_range': f'{current_tier.tier_percentage_start}-{current_tier.tier_percentage_end}%'
             },
-            'available_tickets': event.available_tickets_count,
-            'total_tickets': event.tickets.count()
+            'available_tickets': inventory.available_tickets,
+            'total_tickets': inventory.total_tickets
         })
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""
+Database-side search indexes for the autocomplete.
+
+PostgreSQL gets pg_trgm GIN indexes on the searched columns, so substring and
+similarity matches are index scans, and a `search_vector` tsvector column per
+table kept current by a trigger for word-prefix matches. SQLite gets an FTS5
+table with the trigram tokenizer per searched table, kept in step by triggers.
+Other backends have no index and fall back to plain LIKE queries.
+
+SQLite drops triggers when Django rebuilds a table to alter it, so run the
+rebuild_search_index command after migrations that touch these tables.
+"""
+
+# table -> searched text columns
+SEARCHED_TABLES = {
+    'artists_artist': ['name'],
+    'events_event': ['name'],
+    'events_venue': ['name', 'city'],
+}
+
+
+def fts_table(table):
+    return f'{table}_fts'
+
+
+def postgresql_install(table, columns):
+    document = " || ' ' || ".join(f"coalesce(NEW.{column}, '')" for column in columns)
+    statements = ['CREATE EXTENSION IF NOT EXISTS pg_trgm']
+    statements += [
+        f'CREATE INDEX IF NOT EXISTS {table}_{column}_trgm ON {table} USING gin ({column} gin_trgm_ops)'
+        for column in columns
+    ]
+    statements += [
+        f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector',
+        f'CREATE INDEX IF NOT EXISTS {table}_search_vector ON {table} USING gin (search_vector)',
+        f"""
+        CREATE OR REPLACE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := to_tsvector('simple', {document});
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        f'DROP TRIGGER IF EXISTS {table}_search_vector ON {table}',
+        f"""
+        CREATE TRIGGER {table}_search_vector BEFORE INSERT OR UPDATE OF {', '.join(columns)} ON {table}
+        FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update()
+        """,
+        # Fill the column for existing rows through the trigger
+        f'UPDATE {table} SET {columns[0]} = {columns[0]}',
+    ]
+    return statements
+
+
+def postgresql_uninstall(table, columns):
+    statements = [
+        f'DROP TRIGGER IF EXISTS {table}_search_vector ON {table}',
+        f'DROP FUNCTION IF EXISTS {table}_search_vector_update()',
+        f'DROP INDEX IF EXISTS {table}_search_vector',
+        f'ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector',
+    ]
+    statements += [f'DROP INDEX IF EXISTS {table}_{column}_trgm' for column in columns]
+    return statements
+
+
+def sqlite_install(table, columns):
+    fts = fts_table(table)
+    names = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    statements = sqlite_uninstall(table, columns)
+    statements += [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({names}, content='{table}', content_rowid='id', tokenize='trigram')",
+        f"""
+        CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER {fts}_update AFTER UPDATE OF {names} ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values});
+        END
+        """,
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+    return statements
+
+
+def sqlite_uninstall(table, columns):
+    fts = fts_table(table)
+    return [
+        f'DROP TRIGGER IF EXISTS {fts}_insert',
+        f'DROP TRIGGER IF EXISTS {fts}_delete',
+        f'DROP TRIGGER IF EXISTS {fts}_update',
+        f'DROP TABLE IF EXISTS {fts}',
+    ]
+
+
+INSTALLERS = {
+    'postgresql': (postgresql_install, postgresql_uninstall),
+    'sqlite': (sqlite_install, sqlite_uninstall),
+}
+
+
+def install(connection):
+    """(Re)create the search indexes of every searched table for the connection's backend"""
+    _run(connection, 0)
+
+
+def uninstall(connection):
+    """Drop the search indexes again"""
+    _run(connection, 1)
+
+
+def _run(connection, which):
+    installers = INSTALLERS.get(connection.vendor)
+    if installers is None:
+        return
+    with connection.cursor() as cursor:
+        for table, columns in SEARCHED_TABLES.items():
+            for statement in installers[which](table, columns):
+                cursor.execute(statement)
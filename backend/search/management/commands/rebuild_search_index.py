@@ -0,0 +1,31 @@
+"""
+Django management command to (re)create the autocomplete search indexes and refill them
+Usage: python manage.py rebuild_search_index [--drop]
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from search import index
+
+
+class Command(BaseCommand):
+    help = 'Recreate the trigram / full-text search indexes used by the autocomplete'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--drop', action='store_true', help='Drop the search indexes instead')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in index.INSTALLERS:
+            self.stdout.write(
+                self.style.WARNING(f'! No search index for {connection.vendor}, autocomplete uses LIKE queries')
+            )
+            return
+
+        if options['drop']:
+            index.uninstall(connection)
+            self.stdout.write(self.style.SUCCESS('✓ Dropped the search indexes'))
+            return
+
+        index.install(connection)
+        tables = ', '.join(index.SEARCHED_TABLES)
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt the {connection.vendor} search indexes of {tables}'))
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+from search import index
+
+
+def install_search_indexes(apps, schema_editor):
+    index.install(schema_editor.connection)
+
+
+def uninstall_search_indexes(apps, schema_editor):
+    index.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+        ('artists', '0003_album_external_id_album_source_hash_and_more'),
+        ('events', '0003_event_external_id_event_source_hash'),
+    ]
+
+    operations = [
+        # pg_trgm + tsvector triggers on PostgreSQL, FTS5 trigram tables on SQLite
+        migrations.RunPython(install_search_indexes, uninstall_search_indexes),
+    ]
@@ -0,0 +1,126 @@
+import re
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+from events.models import Event, Venue
+from artists.models import Artist
+from .index import fts_table
+
+
+def trigrams(text):
+    """pg_trgm style trigrams: every word lowercased and padded with two spaces in front, one behind"""
+    grams = set()
+    for word in re.findall(r'\w+', text.lower()):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a, b):
+    """Share of trigrams two strings have in common, as pg_trgm's similarity()"""
+    a, b = trigrams(a), trigrams(b)
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+class SearchService:
+    """
+    Service class for the autocomplete across artists, events and venues.
+
+    Matches come from the search indexes of search.index, so the cost of a
+    lookup follows the number of matches rather than the catalog size, and
+    are ranked by trigram similarity to the query: by the database on
+    PostgreSQL, in Python over the active FTS5 matches on SQLite.
+    """
+
+    # (model, searched fields, returned values)
+    ENTITIES = {
+        'artist': (Artist, ['name'], ['id', 'name', 'genre__name']),
+        'event': (Event, ['name'], ['id', 'name', 'date', 'venue__name']),
+        'venue': (Venue, ['name', 'city'], ['id', 'name', 'city', 'capacity']),
+    }
+
+    # Substring matches re-ranked per entity on backends without a search index
+    CANDIDATES = 50
+
+    @staticmethod
+    def autocomplete(query, limit=5):
+        """Return {entity: [values, ...]} of the best matches of each entity type"""
+        search = {
+            'postgresql': SearchService._postgresql_matches,
+            'sqlite': SearchService._sqlite_matches,
+        }.get(connection.vendor, SearchService._like_matches)
+
+        results = {}
+        for entity, (model, fields, values) in SearchService.ENTITIES.items():
+            results[entity] = search(model, fields, values, query, limit)
+        return results
+
+    @staticmethod
+    def _rank(rows, fields, query, limit):
+        """Best `limit` rows by similarity of their best matching field"""
+        def score(row):
+            return max(similarity(row[field], query) for field in fields)
+        return sorted(rows, key=lambda row: (-score(row), row['name']))[:limit]
+
+    @staticmethod
+    def _postgresql_matches(model, fields, values, query, limit):
+        table = connection.ops.quote_name(model._meta.db_table)
+        words = re.findall(r'\w+', query.lower())
+        pattern = '%' + re.sub(r'([\\%_])', r'\\\1', query) + '%'
+
+        # `%` (similarity above pg_trgm.similarity_threshold) and ILIKE both use the trigram indexes
+        conditions = []
+        params = []
+        for field in fields:
+            conditions += [f'{table}.{field} %% %s', f'{table}.{field} ILIKE %s']
+            params += [query, pattern]
+        if words:
+            conditions.append(f"{table}.search_vector @@ to_tsquery('simple', %s)")
+            params.append(' & '.join(f'{word}:*' for word in words))
+        matches = RawSQL(f'({" OR ".join(conditions)})', params, output_field=BooleanField())
+
+        scores = ', '.join(f'similarity({table}.{field}, %s)' for field in fields)
+        rank = RawSQL(f'greatest({scores})', [query] * len(fields), output_field=FloatField())
+
+        return list(
+            model.objects.filter(matches, is_active=True)
+            .annotate(rank=rank)
+            .order_by('-rank', 'name')
+            .values(*values)[:limit]
+        )
+
+    @staticmethod
+    def _sqlite_matches(model, fields, values, query, limit):
+        fts = fts_table(model._meta.db_table)
+        table = connection.ops.quote_name(model._meta.db_table)
+        if len(query) >= 3:
+            # The trigram tokenizer matches any substring of three characters or more
+            condition, params = f'{fts} MATCH ?', ['"' + query.replace('"', '""') + '"']
+        else:
+            condition = ' OR '.join(f'{fts}.{field} LIKE ?' for field in fields)
+            params = [f'{query}%'] * len(fields)
+        # Inactive rows are dropped in the join, and every match is ranked before the best are kept
+        columns = ', '.join(f'{table}.{field}' for field in fields)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT {table}.id, {columns} FROM {fts} JOIN {table} ON {table}.id = {fts}.rowid '
+                f'WHERE ({condition}) AND {table}.is_active',
+                params
+            )
+            matches = [dict(zip(['id', *fields], row)) for row in cursor.fetchall()]
+
+        ids = [row['id'] for row in SearchService._rank(matches, fields, query, limit)]
+        rows = {row['id']: row for row in model.objects.filter(id__in=ids).values(*values)}
+        return [rows[pk] for pk in ids if pk in rows]
+
+    @staticmethod
+    def _like_matches(model, fields, values, query, limit):
+        """No search index on this backend: substring matches, ranked in Python"""
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f'{field}__icontains': query})
+        rows = model.objects.filter(condition, is_active=True).values(*values, *fields)[:SearchService.CANDIDATES]
+        return [
+            {key: row[key] for key in values}
+            for row in SearchService._rank(rows, fields, query, limit)
+        ]
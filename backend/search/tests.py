@@ -1 +1,89 @@
-from django.test import TestCase
\ No newline at end of file
+from datetime import time, timedelta
+from decimal import Decimal
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from artists.models import Artist, Genre
+from events.models import Event, Venue, EventType
+from .index import fts_table
+from .models import PopularSearches
+from .services import SearchService, similarity
+
+
+class SearchIndexTests(TestCase):
+    """Autocomplete search index tests"""
+
+    def setUp(self):
+        genre = Genre.objects.create(name='Rock')
+        for name in ['Coldplay', 'Cold War Kids', 'The Cold', 'Arctic Monkeys']:
+            Artist.objects.create(name=name, genre=genre)
+        self.venue = Venue.objects.create(
+            name='Jawaharlal Nehru Stadium', location='Delhi', address='Lodhi Road',
+            city='New Delhi', state='Delhi', capacity=60000
+        )
+        self.event = Event.objects.create(
+            name='Coldplay Music of the Spheres',
+            venue=self.venue,
+            event_type=EventType.objects.create(name='Concert'),
+            date=timezone.now().date() + timedelta(days=30),
+            start_time=time(20, 0),
+            end_time=time(23, 0),
+            ticket_price=Decimal('1000.00')
+        )
+
+    def indexed_ids(self, model, query):
+        if connection.vendor != 'sqlite':
+            self.skipTest('FTS5 index is SQLite only')
+        table = fts_table(model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [f'"{query}"'])
+            return {row[0] for row in cursor.fetchall()}
+
+    def names(self, query, entity='artist'):
+        return [row['name'] for row in SearchService.autocomplete(query)[entity]]
+
+    def test_triggers_keep_index_in_sync(self):
+        artist = Artist.objects.get(name='Arctic Monkeys')
+        self.assertEqual(self.indexed_ids(Artist, 'monkeys'), {artist.id})
+
+        artist.name = 'Arctic Foxes'
+        artist.save()
+        self.assertEqual(self.indexed_ids(Artist, 'monkeys'), set())
+        self.assertEqual(self.indexed_ids(Artist, 'foxes'), {artist.id})
+
+        artist.delete()
+        self.assertEqual(self.indexed_ids(Artist, 'foxes'), set())
+
+    def test_ranked_by_similarity(self):
+        self.assertEqual(self.names('cold'), ['The Cold', 'Coldplay', 'Cold War Kids'])
+        self.assertGreater(similarity('The Cold', 'cold'), similarity('Coldplay', 'cold'))
+
+    def test_substring_match(self):
+        self.assertEqual(self.names('onkey'), ['Arctic Monkeys'])
+        self.assertEqual(self.names('ar', 'artist'), ['Arctic Monkeys'])
+
+    def test_inactive_excluded(self):
+        Artist.objects.filter(name='The Cold').update(is_active=False)
+        self.assertNotIn('The Cold', self.names('cold'))
+
+    def test_inactive_matches_do_not_crowd_out_active_ones(self):
+        genre = Genre.objects.get(name='Rock')
+        Artist.objects.bulk_create([
+            Artist(name=f'Cold {n}', genre=genre, is_active=False)
+            for n in range(SearchService.CANDIDATES + 10)
+        ])
+        self.assertEqual(self.names('cold'), ['The Cold', 'Coldplay', 'Cold War Kids'])
+
+    def test_venue_matches_city(self):
+        self.assertEqual(self.names('delhi', 'venue'), ['Jawaharlal Nehru Stadium'])
+
+    def test_autocomplete_endpoint(self):
+        response = self.client.get('/api/search/autocomplete/', {'q': 'coldplay'})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(
+            [(result['type'], result['name']) for result in results],
+            [('artist', 'Coldplay'), ('event', 'Coldplay Music of the Spheres')]
+        )
+        self.assertEqual(results[1]['venue'], 'Jawaharlal Nehru Stadium')
+        self.assertEqual(PopularSearches.objects.get(keyword='coldplay').search_count, 1)
@@ -1,10 +1,9 @@
 from django.shortcuts import render
-from django.db.models import Q, F
+from django.db.models import F
 from rest_framework import generics
 from rest_framework.response import Response
-from events.models import Event, Venue
-from artists.models import Artist
 from .models import SearchHistory, PopularSearches
+from .services import SearchService
 
 
 class AutocompleteView(generics.ListAPIView):
@@ -20,21 +19,9 @@ class AutocompleteView(generics.ListAPIView):
                 'message': 'Query too short (minimum 2 characters)'
             })
         
-        # Prefix matching across different entities
-        artists = Artist.objects.filter(
-            Q(name__istartswith=query) | Q(name__icontains=query),
-            is_active=True
-        ).values('id', 'name', 'genre__name')[:5]
-        
-        events = Event.objects.filter(
-            Q(name__istartswith=query) | Q(name__icontains=query),
-            is_active=True
-        ).values('id', 'name', 'date', 'venue__name')[:5]
-        
-        venues = Venue.objects.filter(
-            Q(name__istartswith=query) | Q(name__icontains=query) | Q(city__icontains=query),
-            is_active=True
-        ).values('id', 'name', 'city', 'capacity')[:5]
+        # Index-backed matches, best trigram similarity first
+        matches = SearchService.autocomplete(query, limit=5)
+        artists, events, venues = matches['artist'], matches['event'], matches['venue']
         
         # Format results
         results = []